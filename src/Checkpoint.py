@@ -0,0 +1,103 @@
+"""
+Checkpoint
+----------
+
+Compact snapshot of an evolution run, written every few generations so that an interrupted run
+(or one that ran out of devices) can be resumed where it left off instead of being re-populated
+and re-evaluated from scratch. The genomes are stored bit-packed in a NumPy .npz archive next to
+the fitness of every circuit; everything else (generation counters, random number generator and
+selection state, fitness memo) is stored as one JSON document inside the same archive.
+"""
+import json
+import os
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+class Checkpoint:
+    def __init__(self, names: List[str], bits: np.ndarray, fitness: np.ndarray, data: List[list], state: dict):
+        """
+        Parameters
+        ----------
+        names : list[str]
+            The circuit names, in the order of the rows below
+        bits : np.ndarray
+            (circuits x bits) 0/1 matrix of the modifiable bits of every circuit
+        fitness : np.ndarray
+            The fitness of every circuit
+        data : list[list]
+            The measurements behind the fitness of every circuit
+        state : dict
+            The rest of the run's state, which must be JSON serializable
+        """
+        self.names = list(names)
+        self.bits = bits
+        self.fitness = fitness
+        self.data = data
+        self.state = state
+
+    def save(self, path: Path):
+        """
+        Writes the checkpoint. The file is replaced atomically, so an interruption while saving
+        leaves the previous checkpoint intact.
+        """
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = path.with_name(path.name + ".tmp")
+        with open(temp_path, "wb") as checkpoint_file:
+            np.savez_compressed(
+                checkpoint_file,
+                names=np.array(self.names),
+                genome=np.packbits(self.bits.astype(np.uint8), axis=1),
+                genome_length=self.bits.shape[1],
+                fitness=np.asarray(self.fitness, dtype=np.float64),
+                data_values=np.array([point for data in self.data for point in data], dtype=np.float64),
+                data_lengths=np.array([len(data) for data in self.data], dtype=np.int64),
+                state=np.array(json.dumps(self.state))
+            )
+        os.replace(temp_path, path)
+
+    @staticmethod
+    def load(path: Path) -> "Checkpoint":
+        """
+        Reads a checkpoint written by save()
+        """
+        with np.load(path, allow_pickle=False) as archive:
+            length = int(archive["genome_length"])
+            bits = np.unpackbits(archive["genome"], axis=1, count=length)
+            offsets = np.cumsum(archive["data_lengths"])[:-1]
+            data = [values.tolist() for values in np.split(archive["data_values"], offsets)]
+            return Checkpoint(
+                [str(name) for name in archive["names"]],
+                bits,
+                archive["fitness"],
+                data,
+                json.loads(str(archive["state"]))
+            )
+
+    def match(self, circuits: list) -> Optional[Dict[str, object]]:
+        """
+        Picks the circuit each saved circuit is restored into: the circuit of the same name, or else
+        one whose name was not saved. Steady state evolution swaps nursery circuits (offspringK) into
+        the population, and the nursery may be smaller when the run is resumed on fewer devices.
+
+        Parameters
+        ----------
+        circuits : list
+            The circuits the checkpoint may be restored into
+
+        Returns
+        -------
+        dict[str, Circuit] | None
+            The circuit for each saved name, None if there are fewer circuits than saved names
+        """
+        if len(circuits) < len(self.names):
+            return None
+        by_name = {str(c): c for c in circuits}
+        matched = {name: by_name[name] for name in self.names if name in by_name}
+        unused = [c for c in circuits if str(c) not in matched]
+        for name in self.names:
+            if name not in matched:
+                matched[name] = unused.pop(0)
+        return matched
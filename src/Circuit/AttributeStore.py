@@ -0,0 +1,79 @@
+import json
+from pathlib import Path
+from typing import Dict, Optional
+
+# Name of the sidecar file, written next to the hardware files it describes
+ATTRIBUTES_FILENAME = "attributes.jsonl"
+
+class AttributeStore:
+    """
+    In-memory table of circuit attributes (fitness, pulse_count, src_population, ...), replacing the
+    FILE_ATTRIBUTES comment that used to be rewritten into every hardware file whenever an attribute changed.
+    Changes are appended to a JSON lines sidecar once per generation, one line per flush:
+
+        {"generation": 3, "circuits": {"hardware1": {"fitness": "0.5"}, ...}}
+
+    Replaying the lines in order gives the latest attributes of every circuit.
+    """
+
+    def __init__(self, path: Path):
+        """
+        Parameters
+        ----------
+        path : Path
+            The sidecar file. Any existing contents are replaced.
+        """
+        self._path = Path(path)
+        self._attributes: Dict[str, Dict[str, str]] = {}
+        # Attributes changed since the last flush
+        self._changed: Dict[str, Dict[str, str]] = {}
+
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        open(self._path, "w").close()
+
+    def get(self, circuit: str, attribute: str) -> Optional[str]:
+        """Returns the value of a circuit's attribute, or None if it was never set"""
+        return self._attributes.get(circuit, {}).get(attribute)
+
+    def set(self, circuit: str, attribute: str, value: str):
+        self._attributes.setdefault(circuit, {})[attribute] = value
+        self._changed.setdefault(circuit, {})[attribute] = value
+
+    def flush(self, generation: int):
+        """
+        Appends every attribute changed since the last flush to the sidecar
+
+        Parameters
+        ----------
+        generation : int
+            The generation the changes were made in
+        """
+        if not self._changed:
+            return
+        with open(self._path, "a") as sidecar:
+            sidecar.write(json.dumps({"generation": generation, "circuits": self._changed}) + "\n")
+        self._changed = {}
+
+    @staticmethod
+    def load(path: Path) -> Dict[str, Dict[str, str]]:
+        """
+        Reads the latest attributes of every circuit from a sidecar
+
+        Parameters
+        ----------
+        path : Path
+            The sidecar file
+
+        Returns
+        -------
+        dict[str, dict[str, str]]
+            Attribute name-value pairs by circuit name
+        """
+        attributes = {}
+        with open(path, "r") as sidecar:
+            for line in sidecar:
+                if not line.strip():
+                    continue
+                for circuit, changes in json.loads(line)["circuits"].items():
+                    attributes.setdefault(circuit, {}).update(changes)
+        return attributes
@@ -0,0 +1,208 @@
+import binascii
+from pathlib import Path
+from threading import Lock
+from subprocess import run
+from typing import Dict, Optional
+
+import numpy as np
+
+from Circuit.ModifiableIndex import ModifiableIndex, body_start
+
+# The bitstream ends with a CRC check command (0x22) followed by a big endian CRC16-CCITT
+# of everything written since the last CRC reset command (0x01 0x05)
+CRC_CHECK_CMD = 0x22
+CRC_RESET_CMD = b"\x01\x05"
+# Bytes searched at each end of the bitstream for the CRC commands
+CRC_SEARCH_WINDOW = 64
+
+class BinPatchException(Exception):
+    pass
+
+def find_crc(bitstream: bytes) -> tuple[int, int]:
+    """
+    Locates the CRC of a bitstream.
+
+    Parameters
+    ----------
+    bitstream : bytes
+        A bitstream written by icepack
+
+    Returns
+    -------
+    tuple[int, int]
+        The position of the first byte covered by the CRC, and the position of the (2 byte) CRC.
+        The CRC covers every byte in between.
+    """
+    starts = []
+    reset = bitstream.find(CRC_RESET_CMD, 0, CRC_SEARCH_WINDOW)
+    while reset >= 0:
+        starts.append(reset + len(CRC_RESET_CMD))
+        reset = bitstream.find(CRC_RESET_CMD, reset + 1, CRC_SEARCH_WINDOW)
+
+    for check in range(len(bitstream) - 3, max(len(bitstream) - CRC_SEARCH_WINDOW, 0), -1):
+        if bitstream[check] != CRC_CHECK_CMD:
+            continue
+        crc = int.from_bytes(bitstream[check + 1:check + 3], "big")
+        for start in starts:
+            if binascii.crc_hqx(bitstream[start:check + 1], 0xFFFF) == crc:
+                return start, check + 1
+
+    raise BinPatchException("Could not locate the CRC of the template bitstream")
+
+class BinPatcher:
+    """
+    Produces the .bin for a hardware file without running icepack.
+    Every modifiable .asc bit is a single configuration (CRAM) bit in the .bin, so the seed is
+    compiled once with every modifiable bit cleared (the template), and the position of each
+    modifiable bit in the .bin is found by compiling a handful of probe files. A circuit's .bin is
+    then the template with the bits of its set modifiable bits flipped, and the CRC recomputed.
+    """
+
+    def __init__(self, body: bytes, index: ModifiableIndex, work_dir: Path, compile_cmd: str = "icepack"):
+        """
+        Compiles the template and probe files and builds the bit map.
+        Takes log2(len(index)) + 2 icepack runs.
+
+        Parameters
+        ----------
+        body : bytes
+            A hardware file's contents following the FILE_ATTRIBUTES comment (if any).
+            Its non-modifiable bits become the template every patched circuit must share.
+        index : ModifiableIndex
+            The modifiable bits to map
+        work_dir : Path
+            Directory to write the template and probe files to
+        compile_cmd : str
+            The icepack command
+        """
+        self._index = index
+        self._work_dir = Path(work_dir)
+        self._compile_cmd = compile_cmd
+
+        template = np.frombuffer(bytearray(body), dtype=np.uint8)
+        template[index.offsets] = ord("0")
+        self._template_body = template.tobytes()
+
+        template_bin = self._compile_bits(np.zeros(len(index), dtype=np.uint8), "template")
+        self._template_bin = template_bin
+        self._crc_start, self._crc_pos = find_crc(template_bin)
+        self._template_bits = np.unpackbits(np.frombuffer(template_bin, dtype=np.uint8))
+
+        # Ignore the CRC when comparing probes, it changes with every probe
+        crc_mask = np.ones(self._template_bits.size, dtype=bool)
+        crc_mask[self._crc_pos * 8:(self._crc_pos + 2) * 8] = False
+
+        # Probe k sets the modifiable bits whose (index + 1) has bit k set, so reading
+        # which probes flip each .bin bit gives back (index + 1) of the .asc bit behind it
+        codes = np.arange(1, len(index) + 1, dtype=np.int64)
+        bin_codes = np.zeros(self._template_bits.size, dtype=np.int64)
+        for k in range(int(codes[-1]).bit_length() if len(codes) > 0 else 0):
+            probe_bin = self._compile_bits(((codes >> k) & 1).astype(np.uint8), "probe")
+            if len(probe_bin) != len(template_bin):
+                raise BinPatchException("Probe bitstream size differs from the template")
+            flipped = (np.unpackbits(np.frombuffer(probe_bin, dtype=np.uint8)) != self._template_bits) & crc_mask
+            bin_codes[flipped] += 1 << k
+
+        mapped = np.flatnonzero(bin_codes)
+        asc_bits = bin_codes[mapped] - 1
+        if mapped.size != len(index) or np.any(np.bincount(asc_bits, minlength=len(index)) != 1):
+            raise BinPatchException("Modifiable bits do not map one to one onto bitstream bits")
+
+        # Position (in the unpacked template) of the .bin bit behind each modifiable bit
+        self.bit_positions = np.empty(len(index), dtype=np.int64)
+        self.bit_positions[asc_bits] = mapped
+
+    def _compile_bits(self, bits: np.ndarray, name: str) -> bytes:
+        """Compiles the template body with the provided modifiable bits and returns the bitstream"""
+        body = np.frombuffer(bytearray(self._template_body), dtype=np.uint8)
+        body[self._index.offsets] = bits + ord("0")
+        asc_path = self._work_dir.joinpath(f"patch_{name}.asc")
+        bin_path = self._work_dir.joinpath(f"patch_{name}.bin")
+        asc_path.write_bytes(body.tobytes())
+        try:
+            # Run from the work directory: sandboxed icepack builds (e.g. yowasp) only see files below it
+            run([self._compile_cmd, asc_path.name, bin_path.name], cwd=self._work_dir, check=True)
+            return bin_path.read_bytes()
+        except Exception as e:
+            raise BinPatchException(f"Failed to compile {asc_path}: {e}")
+        finally:
+            asc_path.unlink(missing_ok=True)
+            bin_path.unlink(missing_ok=True)
+
+    def matches(self, hardware_file) -> bool:
+        """
+        Returns True if the hardware file only differs from the template in its modifiable bits
+        (and FILE_ATTRIBUTES comment), i.e. it can be patched.
+        """
+        start = body_start(hardware_file)
+        if len(hardware_file) - start != len(self._template_body):
+            return False
+        body = np.frombuffer(bytearray(hardware_file[start:]), dtype=np.uint8)
+        body[self._index.offsets] = ord("0")
+        return body.tobytes() == self._template_body
+
+    def patch(self, bits: np.ndarray) -> bytes:
+        """
+        Returns the bitstream of a circuit sharing the template.
+
+        Parameters
+        ----------
+        bits : np.ndarray
+            The circuit's modifiable bits (0/1), in ModifiableIndex order
+
+        Returns
+        -------
+        bytes
+            The bitstream icepack would produce for the circuit
+        """
+        bitstream_bits = self._template_bits.copy()
+        bitstream_bits[self.bit_positions[np.flatnonzero(bits)]] ^= 1
+        bitstream = bytearray(np.packbits(bitstream_bits).tobytes())
+        crc = binascii.crc_hqx(bitstream[self._crc_start:self._crc_pos], 0xFFFF)
+        bitstream[self._crc_pos:self._crc_pos + 2] = crc.to_bytes(2, "big")
+        return bytes(bitstream)
+
+# Patchers by index; None records a template that could not be mapped
+_patcher_cache: Dict[ModifiableIndex, Optional[BinPatcher]] = {}
+# Circuits may be compiled concurrently, only one of them should build the patcher
+_patcher_lock = Lock()
+
+def get_bin_patcher(hardware_file, index: ModifiableIndex, work_dir: Path, compile_cmd: str = "icepack") -> Optional[BinPatcher]:
+    """
+    Returns the BinPatcher for a layout, building it from this hardware file the first time it is requested.
+
+    Parameters
+    ----------
+    hardware_file : mmap
+        The hardware file to build the template from
+    index : ModifiableIndex
+        The modifiable bits of the hardware file
+    work_dir : Path
+        Directory to write the template and probe files to
+    compile_cmd : str
+        The icepack command
+
+    Returns
+    -------
+    BinPatcher | None
+        The patcher, or None if an earlier attempt to build it failed
+
+    Raises
+    ------
+    BinPatchException
+        If the patcher cannot be built. Later calls for the same index return None.
+    """
+    if index in _patcher_cache:
+        return _patcher_cache[index]
+
+    with _patcher_lock:
+        if index in _patcher_cache:
+            return _patcher_cache[index]
+
+        try:
+            patcher = BinPatcher(bytes(hardware_file[body_start(hardware_file):]), index, work_dir, compile_cmd)
+        except BinPatchException:
+            _patcher_cache[index] = None
+            raise
+        _patcher_cache[index] = patcher
+        return patcher
@@ -1,5 +1,7 @@
 from abc import ABC, abstractmethod
+import numpy as np
 import Config
+from ga.genome import zobrist_hash
 
 class Circuit(ABC):
     def __repr__(self):
@@ -41,6 +43,25 @@ class Circuit(ABC):
         """
         self._data.extend(self._get_measurement())
 
+    def get_genome(self):
+        """
+        Returns the PopulationGenome holding this circuit's bits, or None if the circuit is not bound to one
+        """
+        return None
+
+    def get_genome_row(self) -> int:
+        """
+        Returns the row of this circuit in its PopulationGenome, or None if the circuit is not bound to one
+        """
+        return None
+
+    def get_genome_hash(self) -> int:
+        """
+        Returns the 64-bit Zobrist hash of the circuit's bitstream (see ga.genome.zobrist_hash).
+        Circuits with identical bitstreams have the same hash.
+        """
+        return zobrist_hash(np.asarray(self.get_bitstream()))
+
     def get_extra_data(self, key):
         return 0
 
@@ -70,6 +91,21 @@ class Circuit(ABC):
     def _calculate_fitness(self) -> float:
         pass
 
+    def restore_fitness(self, fitness: float, data: list):
+        """
+        Sets the fitness of this Circuit to a previously measured value instead of calculating it
+
+        Parameters
+        ----------
+        fitness : float
+            The fitness to use
+        data : list
+            The measurements behind the fitness
+        """
+        self._data = list(data)
+        self._fitness = fitness
+        self._update_all_live_data()
+
     def clear_data(self):
         """
         Clears the stored measurement data
@@ -119,6 +155,9 @@ class Circuit(ABC):
     def get_fitness(self):
         return self._fitness
 
+    def get_index(self) -> int:
+        return self._index
+
     def _get_all_live_reported_value(self) -> list[float]:
         return [self._fitness]
 
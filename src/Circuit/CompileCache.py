@@ -0,0 +1,124 @@
+from collections import OrderedDict
+import hashlib
+import os
+from pathlib import Path
+from shutil import copyfile
+from threading import Lock
+
+from Circuit.ModifiableIndex import body_start
+
+class CompileCache:
+    """
+    Content addressed store of compiled bitstreams.
+    Entries are keyed by a hash of the hardware description (everything after the
+    FILE_ATTRIBUTES comment), so any circuit whose hardware is byte-identical to one
+    compiled before (elites, unmodified clones, reverted mutations) reuses that bitstream.
+    The least recently used entries are evicted once the cache holds more than
+    max_entries bitstreams or max_bytes bytes.
+    """
+
+    def __init__(self, directory: Path, max_entries: int, max_bytes: int):
+        """
+        Parameters
+        ----------
+        directory : Path
+            Directory the cached bitstreams are stored in. Bitstreams already in it are reused.
+        max_entries : int
+            Maximum number of cached bitstreams
+        max_bytes : int
+            Maximum total size of the cached bitstreams
+        """
+        self._directory = Path(directory)
+        self._max_entries = max_entries
+        self._max_bytes = max_bytes
+        self._lock = Lock()
+        # key -> size of the bitstream, least recently used first
+        self._entries: OrderedDict[str, int] = OrderedDict()
+        self._size = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        os.makedirs(self._directory, exist_ok=True)
+        # Left behind by a store() that was interrupted
+        for path in self._directory.glob("*.tmp"):
+            path.unlink(missing_ok=True)
+        existing = sorted(self._directory.glob("*.bin"), key=lambda path: path.stat().st_mtime)
+        for path in existing:
+            size = path.stat().st_size
+            self._entries[path.stem] = size
+            self._size += size
+        with self._lock:
+            self.__evict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    @staticmethod
+    def key(hardware_file) -> str:
+        """
+        Returns the cache key of a hardware file
+
+        Parameters
+        ----------
+        hardware_file : mmap | bytes
+            The hardware file contents
+
+        Returns
+        -------
+        str
+            Hex digest of the hardware description, excluding the FILE_ATTRIBUTES comment
+        """
+        return hashlib.blake2b(memoryview(hardware_file)[body_start(hardware_file):], digest_size=16).hexdigest()
+
+    def __path(self, key: str) -> Path:
+        return self._directory.joinpath(key + ".bin")
+
+    def fetch(self, key: str, destination: Path) -> bool:
+        """
+        Copies the cached bitstream for a key to the destination, if there is one
+
+        Returns
+        -------
+        bool
+            True on a cache hit
+        """
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return False
+            self._entries.move_to_end(key)
+            self.hits += 1
+            copyfile(self.__path(key), destination)
+            return True
+
+    def store(self, key: str, source: Path):
+        """
+        Adds a compiled bitstream to the cache, evicting the least recently used bitstreams if needed.
+        The bitstream is copied to a temporary file first, so an interrupted copy never leaves a
+        truncated entry behind.
+        """
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return
+            temp_path = self._directory.joinpath(key + ".tmp")
+            copyfile(source, temp_path)
+            os.replace(temp_path, self.__path(key))
+            size = self.__path(key).stat().st_size
+            self._entries[key] = size
+            self._size += size
+            self.__evict()
+
+    def reset_counts(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __evict(self):
+        while self._entries and (len(self._entries) > self._max_entries or self._size > self._max_bytes):
+            key, size = self._entries.popitem(last=False)
+            self._size -= size
+            self.evictions += 1
+            self.__path(key).unlink(missing_ok=True)
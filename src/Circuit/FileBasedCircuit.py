@@ -3,16 +3,22 @@ from pathlib import Path
 from shutil import copyfile
 from subprocess import run
 import os
-from typing import TYPE_CHECKING, Tuple
+from typing import TYPE_CHECKING, List, Tuple
 
 from ascutil import mutate
+import numpy as np
 
 from Circuit.Circuit import Circuit
+from Circuit.BinPatcher import BinPatchException, get_bin_patcher
+from Circuit.ModifiableIndex import ModifiableIndex, ROUTING_ROWS, get_modifiable_index
 from Config import Config
+from ga.genome import zobrist_hash
 from Logger import EvolutionLogger
 
 if TYPE_CHECKING:
-    import numpy as np
+    from Circuit.AttributeStore import AttributeStore
+    from Circuit.CompileCache import CompileCache
+    from ga.genome import PopulationGenome
 
 COMPILE_CMD = "icepack"
 
@@ -55,37 +61,219 @@ class FileBasedCircuit(Circuit):
         self._hardware_file = mmap(hardware_file.fileno(), 0)
         hardware_file.close()
 
+        # Built lazily the first time the modifiable bits are accessed
+        self._modifiable_index = None
+        self._genome_index = None
+
+        # Set by bind_genome when the population keeps this circuit's bits in memory
+        self._genome = None
+        self._genome_row = None
+
+        # Whether the hardware has changed since the bitstream was last compiled
+        self._bitstream_stale = True
+        self._compile_cache = None
+        # When set, attributes are kept here instead of in the hardware file
+        self._attribute_store = None
+
+    def bind_genome(self, genome: "PopulationGenome", row: int):
+        """
+        Makes a row of the population's genome the source of truth for this circuit's modifiable bits.
+        The row is loaded from the hardware file now, and the hardware file is only rewritten
+        from the row when it is needed (see _render).
+
+        Parameters
+        ----------
+        genome : PopulationGenome
+            The genome store owned by the population
+        row : int
+            The row of the genome that belongs to this circuit
+        """
+        index = self.get_genome_index()
+        genome.set_row(row, index.read_bits(self._hardware_file))
+        genome.dirty[row] = False
+        self._genome = genome
+        self._genome_row = row
+
+    def get_genome(self) -> "PopulationGenome":
+        return self._genome
+
+    def get_genome_row(self) -> int:
+        return self._genome_row
+
+    def get_genome_hash(self) -> int:
+        """
+        Returns the 64-bit Zobrist hash of this circuit's modifiable bits. Circuits with identical
+        modifiable bits have the same hash.
+        """
+        if self._genome is not None:
+            return int(self._genome.hashes[self._genome_row])
+        return zobrist_hash(self.get_bitstream())
+
+    def _render(self):
+        """
+        Writes this circuit's genome row into its hardware file if it has changed since the last write.
+        """
+        if self._genome is not None and self._genome.dirty[self._genome_row]:
+            self.get_genome_index().write_bits(self._hardware_file, self._genome.bits[self._genome_row])
+            self._genome.dirty[self._genome_row] = False
+
+    def _shares_genome(self, other) -> bool:
+        return self._genome is not None and other.get_genome() is self._genome
+
     def copy_from(self, other):
-        copyfile(other._hardware_filepath, self._hardware_filepath)
+        self._bitstream_stale = True
+        if self._shares_genome(other):
+            self._genome.copy_row(other.get_genome_row(), self._genome_row)
+            src_pop = other.get_file_attribute("src_population")
+            if src_pop != None:
+                self.set_file_attribute("src_population", src_pop)
+            return
+
+        copyfile(other.get_hardware_file_path(), self._hardware_filepath)
+        # The other file may have a different length (i.e. a different attributes comment)
+        # or a different layout, so re-map it and take over its indexes, which describe the copy.
+        # They were built for the other circuit's config, so they are looked up again if it differs
+        hardware_file = open(self._hardware_filepath, "r+")
+        self._hardware_file = mmap(hardware_file.fileno(), 0)
+        hardware_file.close()
+        if isinstance(other, FileBasedCircuit) and other._config is self._config:
+            self._modifiable_index = other._modifiable_index
+            self._genome_index = other._genome_index
+        else:
+            self._modifiable_index = None
+            self._genome_index = None
 
     def mutate(self, chance=None):
         if chance is None:
             chance = self._config.get_mutation_probability()
 
+        self._bitstream_stale = True
+        if self._genome is not None:
+            self._genome.mutate_row(self._genome_row, chance, self._rand)
+            return
+
         # ascutil uses 0 based indexing
         rows = [row-1 for row in self._config.get_routing_rows()]
         columns = [int(column)-1 for column in self._config.get_accessed_columns()]
         mutate(self._hardware_filepath, rows, columns, chance)
 
+    @staticmethod
+    def mutate_batch(circuits: List["FileBasedCircuit"], chances: List[float], rand: "np.random.Generator"):
+        """
+        Mutates several circuits at once. Circuits sharing a genome are mutated with a single
+        mask draw over their rows; any other circuit is mutated on its own.
+
+        Parameters
+        ----------
+        circuits : list[FileBasedCircuit]
+            Distinct circuits to mutate
+        chances : list[float]
+            The chance of flipping each bit, one per circuit
+        rand : np.random.Generator
+            Generator the genome mask is drawn with
+        """
+        genomes = {}
+        for circuit, chance in zip(circuits, chances):
+            if circuit.get_genome() is None:
+                circuit.mutate(chance)
+                continue
+            genome, batch = genomes.setdefault(id(circuit.get_genome()), (circuit.get_genome(), []))
+            batch.append((circuit, chance))
+
+        for genome, batch in genomes.values():
+            genome.mutate_rows([circuit.get_genome_row() for circuit, _ in batch], [chance for _, chance in batch], rand)
+            for circuit, _ in batch:
+                circuit._bitstream_stale = True
+
     def randomize_bitstream(self):
+        self._bitstream_stale = True
+        if self._genome is not None:
+            self._genome.randomize_row(self._genome_row, self._rand)
+            return
+
         # def randomize_bit(*rest):
         #     return self._rand.integers(48, 50)
         # self._run_at_each_modifiable(randomize_bit)
-        routing_type = self._config.get_routing_type()
-        if routing_type == "MOORE":
-            rows = [1, 2, 13]
-        elif routing_type == "NEWSE":
-            rows = [1, 2]
-        elif routing_type == "ALL":
-            rows = list(range(1, 17))
-
-        rows = [row-1 for row in rows]
+        rows = [row-1 for row in ROUTING_ROWS[self._config.get_routing_type()]]
         columns = [int(column)-1 for column in self._config.get_accessed_columns()]
         mutate(self._hardware_filepath, rows, columns, 0.5)
 
+    def set_bitstream(self, bits: np.ndarray):
+        """
+        Replaces every modifiable bit of this circuit
+
+        Parameters
+        ----------
+        bits : np.ndarray
+            0/1 array laid out like get_bitstream()
+        """
+        self._bitstream_stale = True
+        if self._genome is not None:
+            self._genome.set_row(self._genome_row, bits)
+            return
+        self.get_genome_index().write_bits(self._hardware_file, bits)
+
+    def crossover_mask(self, parent, mask: np.ndarray):
+        """
+        Copies the modifiable rows selected by a tile table mask from the parent into this circuit.
+        Additionally, need to copy the parent's info line
+
+        Parameters
+        ----------
+        parent : FileBasedCircuit
+            The circuit this circuit is being crossed with
+        mask : np.ndarray
+            bool array of shape (tiles, rows) over the modifiable rows of each modifiable tile
+        """
+        FileBasedCircuit.crossover_batch([parent], [self], np.asarray(mask)[None])
+
+    @staticmethod
+    def crossover_batch(parents: List["FileBasedCircuit"], children: List["FileBasedCircuit"], masks: np.ndarray):
+        """
+        Performs a generation's worth of crossovers at once. When every circuit shares one genome
+        this is a single vectorized copy; otherwise each child is crossed with its parent in turn.
+        Every parent is read before any child is written.
+
+        Parameters
+        ----------
+        parents : list[FileBasedCircuit]
+            The circuit to copy from for each crossover
+        children : list[FileBasedCircuit]
+            The circuit to copy into for each crossover
+        masks : np.ndarray
+            bool array of shape (crossovers, tiles, rows), see crossover_mask()
+        """
+        if not children:
+            return
+
+        genome = children[0].get_genome()
+        if genome is not None and all(circuit.get_genome() is genome for circuit in parents + children):
+            # Read the attributes first too, a parent may also be a child
+            src_pops = [parent.get_file_attribute("src_population") for parent in parents]
+            genome.crossover_rows(
+                [parent.get_genome_row() for parent in parents],
+                [child.get_genome_row() for child in children],
+                masks)
+            for child, src_pop in zip(children, src_pops):
+                child._bitstream_stale = True
+                if src_pop != None:
+                    child.set_file_attribute("src_population", src_pop)
+            return
+
+        parent_bits = [parent.get_bitstream() for parent in parents]
+        src_pops = [parent.get_file_attribute("src_population") for parent in parents]
+        for child, bits, src_pop, mask in zip(children, parent_bits, src_pops, masks):
+            cells = np.repeat(np.asarray(mask, dtype=bool).reshape(-1), len(child.get_genome_index().columns))
+            child_bits = child.get_bitstream()
+            child_bits[cells] = bits[cells]
+            child.set_bitstream(child_bits)
+            if src_pop != None:
+                child.set_file_attribute("src_population", src_pop)
+
     def crossover(self, parent, crossover_point: int):
         """
         Copy part of the hardware file from parent into this circuit's hardware file.
+        Copies the crossover point's row of every modifiable tile.
         Additionally, need to copy the parent's info line
 
         Parameters
@@ -93,37 +281,11 @@ class FileBasedCircuit(Circuit):
         parent : Circuit
             The circuit file this circuit is being crossed with
         crossover_point : int
-            The index in the editable bitstream this crossover is occouring at
-        """
-        # If crossover point is not an int, then we get a weird error about defining __index__
-        # further down; fix manually to avoid confusion
-        crossover_point = int(crossover_point)
-
-        parent_hw_file = parent.get_hardware_file()
-        # Need to keep track separately since we can have different-length comments
-        parent_tile = parent_hw_file.find(b".logic_tile")
-        my_tile = self._hardware_file.find(b".logic_tile")
-        while my_tile > 0:
-            my_pos = my_tile + len(".logic_tile")
-            parent_pos = parent_tile + len(".logic_tile")
-            if self.__tile_is_included(self._hardware_file, my_pos):
-                line_start = parent_hw_file.find(b"\n", parent_tile) + 1
-                line_end = parent_hw_file.find(b"\n", line_start + 1)
-                line_size = line_end - line_start + 1
-
-                my_pos = my_tile + line_size * (crossover_point - 1)
-                parent_pos = parent_tile + line_size * (crossover_point - 1)
-
-                data = parent_hw_file[parent_pos:parent_pos + line_size]
-                self.update_hardware_file(my_pos, line_size, data)
-
-            parent_tile = parent_hw_file.find(b".logic_tile", parent_tile + 1)
-            my_tile = self._hardware_file.find(b".logic_tile", my_tile + 1)
-
-        # Need to set our source population to our parent's
-        src_pop = parent.get_file_attribute("src_population")
-        if src_pop != None:
-            self.set_file_attribute("src_population", src_pop)
+            The (1 indexed) modifiable row this crossover is occouring at
+        """
+        index = self.get_genome_index()
+        points = np.full(index.num_tiles, int(crossover_point))
+        self.crossover_mask(parent, index.point_mask(points))
 
     def crossover_each(self, parent, crossover_bounds: Tuple[int, int], rand: "np.random.Generator"):
         """
@@ -134,38 +296,67 @@ class FileBasedCircuit(Circuit):
         ----------
         parent : Circuit
             The circuit file this circuit is being crossed with
-        crossover_point : int
-            The index in the editable bitstream this crossover is occouring at
-        """
-        # If crossover point is not an int, then we get a weird error about defining __index__
-        # further down; fix manually to avoid confusion
-
-        parent_hw_file = parent.get_hardware_file()
-        # Need to keep track separately since we can have different-length comments
-        parent_tile = parent_hw_file.find(b".logic_tile")
-        my_tile = self._hardware_file.find(b".logic_tile")
-        while my_tile > 0:
-            my_pos = my_tile + len(".logic_tile")
-            parent_pos = parent_tile + len(".logic_tile")
-            if self.__tile_is_included(self._hardware_file, my_pos):
-                line_start = parent_hw_file.find(b"\n", parent_tile) + 1
-                line_end = parent_hw_file.find(b"\n", line_start + 1)
-                line_size = line_end - line_start + 1
-
-                crossover_point = rand.integers(*crossover_bounds)
-                my_pos = my_tile + line_size * (crossover_point - 1)
-                parent_pos = parent_tile + line_size * (crossover_point - 1)
-
-                data = parent_hw_file[parent_pos:parent_pos + line_size]
-                self.update_hardware_file(my_pos, line_size, data)
-
-            parent_tile = parent_hw_file.find(b".logic_tile", parent_tile + 1)
-            my_tile = self._hardware_file.find(b".logic_tile", my_tile + 1)
-
-        # Need to set our source population to our parent's
-        src_pop = parent.get_file_attribute("src_population")
-        if src_pop != None:
-            self.set_file_attribute("src_population", src_pop)
+        crossover_bounds : tuple[int, int]
+            The range (1 indexed, upper bound exclusive) the crossover point of each tile is drawn from
+        rand : np.random.Generator
+            Generator the crossover points are drawn with
+        """
+        index = self.get_genome_index()
+        points = rand.integers(*crossover_bounds, size=index.num_tiles)
+        self.crossover_mask(parent, index.point_mask(points))
+
+    def _get_modifiable_index(self, hardware_file = None, accessible_columns = None,
+        routing_type=None) -> ModifiableIndex:
+        """
+        Returns the index of the modifiable bit positions for a hardware file.
+        The index for this Circuit's own hardware file under the current configuration is
+        kept after the first lookup, since its layout only changes when the file is replaced.
+
+        Parameters
+        ----------
+        hardware_file : mmap | None
+            The hardware file to index. If no value provided, uses this Circuit's hardware file.
+        accessible_columns : list[str] | None
+            The accessible columns. If no value provided, uses the current configuration value.
+        routing_type: str | None
+            The routing type (MOORE, NEWSE or ALL). If no value provided, uses the current configuration value.
+
+        Returns
+        -------
+        ModifiableIndex
+            Offsets of every modifiable bit in the hardware file
+        """
+        is_own_index = hardware_file is None and accessible_columns is None and routing_type is None
+        if is_own_index and self._modifiable_index is not None:
+            return self._modifiable_index
+
+        if hardware_file is None:
+            hardware_file = self._hardware_file
+
+        if accessible_columns is None:
+            accessible_columns = self._config.get_accessed_columns()
+
+        if routing_type is None:
+            routing_type = self._config.get_routing_type()
+
+        # The int cast sanitizes user input
+        columns = [int(col) for col in accessible_columns]
+        index = get_modifiable_index(hardware_file, ROUTING_ROWS[routing_type], columns)
+        if is_own_index:
+            self._modifiable_index = index
+        return index
+
+    def get_genome_index(self) -> ModifiableIndex:
+        """
+        Returns the index of the bits that mutation and randomization modify.
+        These use ascutil's 0 based column convention (accessed column c is character c - 1
+        of a row), which is also the layout of this circuit's genome row.
+        """
+        if self._genome_index is None:
+            columns = [int(col) - 1 for col in self._config.get_accessed_columns()]
+            self._genome_index = get_modifiable_index(
+                self._hardware_file, ROUTING_ROWS[self._config.get_routing_type()], columns)
+        return self._genome_index
 
     def _run_at_each_modifiable(self, lambda_func, hardware_file = None, accessible_columns = None,
         routing_type=None):
@@ -176,8 +367,8 @@ class FileBasedCircuit(Circuit):
         If lambda_func returns None, then the bit is left unmodified
         Keep in mind the bytes are the ASCII codes, so for example 49 = 1
 
-        .. todo::
-            Go over this with someone who can clarify what all of the data types are.
+        NOTE This calls back into Python once per bit. Bulk reads and writes should use
+        the ModifiableIndex from _get_modifiable_index directly.
 
         Parameters
         ----------
@@ -192,143 +383,146 @@ class FileBasedCircuit(Circuit):
         routing_type: str | None
             The routing type (MOORE or NEWSE). If no value provided, uses the current configuration value.
         """
+        index = self._get_modifiable_index(hardware_file, accessible_columns, routing_type)
 
         if hardware_file is None:
             hardware_file = self._hardware_file
 
-        if accessible_columns is None:
-            accessible_columns = self._config.get_accessed_columns()
-
-        if routing_type is None:
-            routing_type = self._config.get_routing_type()
+        values = index.gather(hardware_file)
+        changed = False
+        for i, (bit_value, row, col) in enumerate(zip(values.tolist(), index.bit_rows.tolist(), index.bit_columns.tolist())):
+            lambda_return = lambda_func(bit_value, row, col)
+            if lambda_return is not None:
+                # need to re-assign the bit
+                values[i] = lambda_return
+                changed = True
 
-        # Set tile to the first location of the substring ".logic_tile"
-        # The b prefix makes the string an instance of the "bytes" type
-        # The .logic_tile header indicates that there is a tile, so the "tile" variable stores the starting point of the current tile
-        tile = hardware_file.find(b".logic_tile")
-
-        while tile > 0:
-            # Set pos to the position of this tile, but with the length of ".logic_tile" added so it is in front of where we have the x/y coords
-            pos = tile + len(".logic_tile")
-
-            # Check if the position is legal to modify
-            if self.__tile_is_included(hardware_file, pos):
-                # Find the start and end of the line; the positions of the \n newline just before and at the end of this line
-                # The start is the newline position + 1, so the first valid bit character
-                # line_size is self-explanatory
-                # This finds the length of a standard line of bits (so the width of each data-containing line in this tile)
-                line_start = hardware_file.find(b"\n", tile) + 1
-                line_end = hardware_file.find(b"\n", line_start + 1)
-                line_size = line_end - line_start + 1
-
-                # Determine which rows we can modify
-                # TODO ALIFE2021 The routing protocol here is dated and needs to mimic that of the Tone Discriminator
-                if routing_type == "MOORE":
-                    rows = [1, 2, 13]
-                elif routing_type == "NEWSE":
-                    rows = [1, 2]
-                elif routing_type == "ALL":
-                    rows = list(range(1, 17))
-                # Iterate over each row and the columns that we can access within each row
-                for row in rows:
-                    for col in accessible_columns:
-                        # This will get us to individual bits. If the mutation probability passes
-                        # Our position is now going to be the start of the first line, plus the line size multiplied to get to our desired row,
-                        # and finally added to the column (with the int cast to sanitize user input)
-                        pos = line_start + line_size * (row - 1) + int(col)
-                        bit_value = hardware_file[pos]
-                        lambda_return = lambda_func(bit_value, row, col)
-                        if lambda_return is not None:
-                            # need to re-assign the bit
-                            hardware_file[pos] = lambda_return
-
-            # Find the next logic tile, and start again
-            # Will return -1 if .logic_tile isn't found, and the while loop will exit
-            tile = hardware_file.find(b".logic_tile", tile + 1)
+        if changed:
+            index.scatter(hardware_file, values)
+            if hardware_file is self._hardware_file:
+                self._bitstream_stale = True
 
     def _compile(self):
 
         """
         Compile circuit ASC file to a BIN file for hardware upload.
+        The bitstream is taken from the compile cache (if set) when this hardware has been compiled before.
         """
-        self._logger.event(2, "Compiling", self, "with icepack...")
-
         # Ensure the file backing the mmap is up to date with the latest
-        # changes to the mmap.
+        # changes to the genome and the mmap.
+        self._render()
         self._hardware_file.flush()
 
+        key = None
+        if self._compile_cache is not None:
+            key = self._compile_cache.key(self._hardware_file)
+            if self._compile_cache.fetch(key, self._bitstream_filepath):
+                self._bitstream_stale = False
+                self._logger.event(2, "Found bitstream for", self, "in compile cache")
+                return
+
+        built = self._build_bitstream()
+        self._bitstream_stale = False
+
+        # After a failed compile the BIN file on disk is still the previous genome's
+        if key is not None and built:
+            self._compile_cache.store(key, self._bitstream_filepath)
+
+    def _build_bitstream(self):
+        """
+        Writes the BIN file for the ASC file.
+        Depending on the compile method the BIN file is patched from a template instead of
+        running icepack, optionally checking the patched file against icepack's output.
+
+        Returns
+        -------
+        bool
+            False if icepack failed, in which case the BIN file was not written
+        """
+        method = self._config.get_compile_method()
+        patched = None
+        if method in ("PATCH", "PATCH_VERIFY"):
+            patched = self._patch_bitstream()
+
+        if patched is not None and method == "PATCH":
+            self._bitstream_filepath.write_bytes(patched)
+            self._logger.event(2, "Patched bitstream for", self)
+            return True
+
+        self._logger.event(2, "Compiling", self, "with icepack...")
         compile_command = [
             COMPILE_CMD,
             self._hardware_filepath,
             self._bitstream_filepath
         ]
-        run(compile_command)
+        if run(compile_command).returncode != 0:
+            self._logger.error(f"icepack failed to compile {self}")
+            return False
+
+        if patched is not None and patched != self._bitstream_filepath.read_bytes():
+            self._logger.error(f"Patched bitstream for {self} differs from icepack output")
 
         self._logger.event(2, "Finished compiling", self)
+        return True
 
-    def __tile_is_included(self, hardware_file, pos):
+    def set_attribute_store(self, attribute_store: "AttributeStore"):
         """
-        Determines whether a given tile is available for modificiation.
-        NOTE: Tile = the .logic_tile in the asc file.
+        Sets the table this circuit's attributes are kept in, or None to keep them in the hardware file
+        """
+        self._attribute_store = attribute_store
 
-        .. todo::
-            Preexisting todo: Replace magic values with a more generalized solution.
-            These magic values are indicative of the underlying hardware (ice40up5k)
+    def set_compile_cache(self, compile_cache: "CompileCache"):
+        """
+        Sets the cache of compiled bitstreams shared by the population, or None to always compile
+        """
+        self._compile_cache = compile_cache
 
-        Parameters
-        ----------
-        hardware_file : mmap
-            Memory Mapped hardware file
-        pos : int
-            Index of the first byte in the .asc file for the hardware
+    def is_bitstream_stale(self) -> bool:
+        """
+        Returns True if the hardware has changed since the bitstream was last compiled
+        """
+        return self._bitstream_stale
 
-        Returns
-        -------
-        bool
-            True if the tile at that position is valid (The Tiles we can modigy)
-        """
-        # Replace these magic values with a more generalized solution
-        # Magic values are indicative of the underlying hardware (ice40up5k)
-        # A different model will require different magic values (i.e. ice40hx8k)
-        VALID_TILE_X = range(1, 25)
-        VALID_TILE_Y = range(1, 31)
-
-        # NOTE x and y are stored as ints to aid the loops that search and identify
-        # tiles while scraping the asc files
-        # This is in the actual asc file; this is why we can simply pull from "pos"
-        # i.e. you'll see the header ".logic_file 1 1" - x=1, y=1
-
-        # This is where we had a fundamental issue before: The value in the hardware at this position is going to be an ASCII char value, not the actual
-        # number. Here, we parse the byte as an integer, then to a char, then back to an integer
-
-        # However, we have a great problem now: what about multi-digit numbers?
-        # Find the space that separates the x and y, and find the end of the line
-        # Then, grab the bytes for x, grab the bytes for y, convert to strings, and parse those strings
-        space_pos = hardware_file.find(b" ", pos + 1)
-        eol_pos = hardware_file.find(b"\n", pos)
-        x_bytes = hardware_file[pos:space_pos]
-        y_bytes = hardware_file[space_pos:eol_pos]
-        x_str = x_bytes.decode("utf-8").strip()
-        y_str = y_bytes.decode("utf-8").strip()
-        x = int(x_str)
-        y = int(y_str)
-        is_x_valid = x in VALID_TILE_X
-        is_y_valid = y in VALID_TILE_Y
-
-        return is_x_valid and is_y_valid
+    def compile_if_stale(self):
+        """
+        Compiles the circuit unless its bitstream is already up to date, i.e. it was compiled
+        by the population's compile stage or the hardware is unchanged since the last compile.
+        """
+        if self._bitstream_stale:
+            self._compile()
+
+    def _patch_bitstream(self):
+        """
+        Returns this circuit's bitstream produced from the template bitstream,
+        or None if the circuit cannot be patched and has to be compiled with icepack.
+        """
+        index = self.get_genome_index()
+        try:
+            patcher = get_bin_patcher(self._hardware_file, index, self._bitstream_filepath.parent, COMPILE_CMD)
+        except BinPatchException as e:
+            self._logger.error(f"Unable to build template bitstream, compiling with icepack: {e}")
+            return None
+
+        if patcher is None:
+            return None
+        if not patcher.matches(self._hardware_file):
+            self._logger.event(3, self, "differs from the template outside of its modifiable bits, compiling with icepack")
+            return None
+
+        return patcher.patch(self.get_bitstream())
 
     def get_hardware_file(self):
+        self._render()
         return self._hardware_file
 
     def get_bitstream(self):
-        bitstream = []
-        def add_bit(bit, *rest):
-            # convert from ascii
-            bitstream.append(bit - 48)
-        self._run_at_each_modifiable(add_bit)
-        return bitstream
+        if self._genome is not None:
+            return self._genome.bits[self._genome_row].copy()
+        return self.get_genome_index().read_bits(self._hardware_file)
 
     def get_hardware_file_path(self):
+        self._render()
+        self._hardware_file.flush()
         return self._hardware_filepath
 
     def update_hardware_file(self, pos, length, data):
@@ -350,6 +544,7 @@ class FileBasedCircuit(Circuit):
             The data to write into the hardware file
         """
         self._hardware_file[pos:pos + length] = data
+        self._bitstream_stale = True
 
     @staticmethod
     def get_file_attribute_st(mmapped_file, attribute):
@@ -455,6 +650,11 @@ class FileBasedCircuit(Circuit):
         str
             The value of the attribute
         '''
+        if self._attribute_store is not None:
+            value = self._attribute_store.get(self._filename, attribute)
+            if value is not None:
+                return value
+        # Attributes not set since the store was attached may still be in the file, i.e. for imported circuits
         return FileBasedCircuit.get_file_attribute_st(self._hardware_file, attribute)
 
     def set_file_attribute(self, attribute, value):
@@ -470,6 +670,10 @@ class FileBasedCircuit(Circuit):
         value : str
             The value to assign to the attribute
         '''
+        if self._attribute_store is not None:
+            self._attribute_store.set(self._filename, attribute, value)
+            return
+
         hardware_file = open(self._hardware_filepath, "r+")
         FileBasedCircuit.set_file_attribute_st(hardware_file, attribute, value)
         # Re-map our hardware file
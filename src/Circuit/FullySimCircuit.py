@@ -14,12 +14,14 @@ class FullySimCircuit(Circuit):
         self._rand = rand
         self.randomize_bitstream()
 
-    def mutate(self):
+    def mutate(self, chance=None):
         """
         Mutate the simulation mode circuit
         """
+        if chance is None:
+            chance = self._config.get_mutation_probability()
         for i in range(0, len(self.__simulation_bitstream)):
-            if self._config.get_mutation_probability() >= self._rand.uniform(0,1):
+            if chance >= self._rand.uniform(0,1):
                 # Mutate this bit
                 self.__simulation_bitstream[i] = 1 - self.__simulation_bitstream[i]
 
@@ -0,0 +1,133 @@
+"""
+Health
+------
+
+Scores every reserved device after each generation, so that boards that are slow, time out now
+and then, or measure differently from their peers can be taken out of the rotation instead of
+dragging down throughput and poisoning fitness. Three signals are tracked per device, each
+smoothed over generations:
+
+- failure rate: the fraction of its evaluations that failed
+- latency ratio: its mean time per evaluation over the median of every device
+- residual: in the ALL mode, how far its results are from those of the other devices on the same
+  bitstreams, in median absolute deviations of the devices' results
+
+Each signal is divided by its limit and the largest quotient is the device's score, so a score
+above 1 means the device is degraded.
+"""
+from typing import Dict, List
+
+import numpy as np
+
+from icefarm.client.lib.BatchClient import EvaluationFailed
+
+from Config import Config
+
+# Weight of the newest generation in each smoothed signal
+SMOOTHING = 0.5
+# Evaluations a device must return in a generation for its latency to count
+MIN_EVALUATIONS = 3
+# Devices a bitstream must have results from for residuals to be computed
+MIN_PEERS = 3
+
+class DeviceHealth:
+    """
+    The smoothed health signals of every device
+    """
+    def __init__(self, max_failure_rate: float, max_latency_ratio: float, max_residual: float):
+        """
+        Parameters
+        ----------
+        max_failure_rate : float
+            The failure rate above which a device is degraded
+        max_latency_ratio : float
+            The latency ratio above which a device is degraded
+        max_residual : float
+            The residual above which a device is degraded
+        """
+        self._limits = {
+            "failure_rate": max_failure_rate,
+            "latency_ratio": max_latency_ratio,
+            "residual": max_residual,
+        }
+        self._signals: Dict[str, Dict[str, float]] = {}
+
+    def _update(self, serial: str, signal: str, value: float):
+        signals = self._signals.setdefault(serial, {})
+        previous = signals.get(signal)
+        signals[signal] = value if previous is None else SMOOTHING * value + (1 - SMOOTHING) * previous
+
+    def observe_telemetry(self, summary: dict):
+        """
+        Updates the failure rates and latency ratios from a generation's telemetry summary
+        (see Telemetry.summary())
+        """
+        devices = summary["devices"]
+        means = {
+            serial: device["evaluation_time"]["mean"]
+            for serial, device in devices.items()
+            if device["evaluations"] >= MIN_EVALUATIONS
+        }
+        median = float(np.median(list(means.values()))) if means else 0.0
+        for serial, device in devices.items():
+            attempts = device["evaluations"] + device["failures"]
+            if attempts:
+                self._update(serial, "failure_rate", device["failures"] / attempts)
+            if serial in means and median > 0:
+                self._update(serial, "latency_ratio", means[serial] / median)
+
+    def observe_results(self, results: Dict[object, Dict[str, list]]):
+        """
+        Updates the residuals from the results of bitstreams evaluated on several devices
+
+        Parameters
+        ----------
+        results : dict[Path, dict[str, list]]
+            The results of each device for each bitstream
+        """
+        residuals: Dict[str, List[float]] = {}
+        for by_serial in results.values():
+            means = {
+                serial: float(np.mean([v for v in values if v is not EvaluationFailed]))
+                for serial, values in by_serial.items()
+                if any(v is not EvaluationFailed for v in values)
+            }
+            if len(means) < MIN_PEERS:
+                continue
+            values = np.array(list(means.values()))
+            median = float(np.median(values))
+            # Devices that agree exactly would otherwise make any difference infinitely large
+            scale = max(1.4826 * float(np.median(np.abs(values - median))), 0.01 * abs(median), 1e-9)
+            for serial, mean in means.items():
+                peers = [m for s, m in means.items() if s != serial]
+                residuals.setdefault(serial, []).append(abs(mean - float(np.median(peers))) / scale)
+        for serial, values in residuals.items():
+            self._update(serial, "residual", float(np.median(values)))
+
+    def scores(self) -> Dict[str, Dict[str, float]]:
+        """
+        Returns the smoothed signals of every device observed so far, and its score: the largest
+        signal divided by its limit
+        """
+        scores = {}
+        for serial, signals in self._signals.items():
+            score = max((signals[name] / limit for name, limit in self._limits.items() if name in signals and limit > 0), default=0.0)
+            scores[serial] = {**signals, "score": score}
+        return scores
+
+    def degraded(self, serials: List[str]) -> List[str]:
+        """
+        Returns the given devices whose score is above 1, worst first. The healthiest device is never
+        returned, so there is always one left to evaluate on.
+        """
+        scores = self.scores()
+        ranked = sorted(serials, key=lambda serial: scores.get(serial, {}).get("score", 0.0), reverse=True)
+        return [serial for serial in ranked[:-1] if scores.get(serial, {}).get("score", 0.0) > 1]
+
+def device_health_fac(config: Config) -> DeviceHealth:
+    """Builds the health tracker with the limits set in the config"""
+    return DeviceHealth(
+        config.get_icefarm_max_failure_rate(),
+        config.get_icefarm_max_latency_ratio(),
+        config.get_icefarm_max_residual()
+    )
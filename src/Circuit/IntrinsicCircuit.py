@@ -36,6 +36,10 @@ class IntrinsicCircuit(FileBasedCircuit):
     def upload(self):
         self.__run()
 
+    def restore_fitness(self, fitness, data):
+        self._extra_data["pulses"] = list(data)
+        super().restore_fitness(fitness, data)
+
     def get_waveform(self):
         return self._fitness_func.get_waveform()
 
@@ -46,7 +50,7 @@ class IntrinsicCircuit(FileBasedCircuit):
         """
         Compiles and uploads the compiled circuit and runs it on the FPGA
         """
-        self._compile()
+        self.compile_if_stale()
 
         cmd_str = [
             RUN_CMD,
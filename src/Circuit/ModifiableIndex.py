@@ -0,0 +1,228 @@
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+# Replace these magic values with a more generalized solution
+# Magic values are indicative of the underlying hardware (ice40up5k)
+# A different model will require different magic values (i.e. ice40hx8k)
+VALID_TILE_X = range(1, 25)
+VALID_TILE_Y = range(1, 31)
+
+# Rows of each logic tile that may be modified for each routing type (1 indexed)
+# TODO ALIFE2021 The routing protocol here is dated and needs to mimic that of the Tone Discriminator
+ROUTING_ROWS = {
+    "MOORE": [1, 2, 13],
+    "NEWSE": [1, 2],
+    "ALL": list(range(1, 17)),
+}
+
+LOGIC_TILE = b".logic_tile"
+ATTRIBUTES_COMMENT = b".comment FILE_ATTRIBUTES"
+
+# The characters marking the layout of a hardware file: the start of each header (".logic_tile", ...)
+# and the end of each line. Files in which they are at the same positions only differ in their bits
+_LAYOUT_MARKS = np.frombuffer(b".\n", dtype=np.uint8)
+
+def tile_is_included(x: int, y: int) -> bool:
+    """
+    Determines whether the logic tile at (x, y) is available for modification.
+
+    Parameters
+    ----------
+    x : int
+        The x coordinate from the .logic_tile header
+    y : int
+        The y coordinate from the .logic_tile header
+
+    Returns
+    -------
+    bool
+        True if the tile at that position is valid (The Tiles we can modify)
+    """
+    return x in VALID_TILE_X and y in VALID_TILE_Y
+
+def body_start(hardware_file) -> int:
+    """
+    Returns the position of the first byte after the FILE_ATTRIBUTES comment.
+    The comment is always written as the first line of the file and changes length
+    whenever an attribute is set, so every offset in a ModifiableIndex is relative
+    to this position.
+
+    Parameters
+    ----------
+    hardware_file : mmap | bytes
+        The hardware file contents
+
+    Returns
+    -------
+    int
+        Position of the start of the hardware description
+    """
+    if hardware_file[:len(ATTRIBUTES_COMMENT)] == ATTRIBUTES_COMMENT:
+        return hardware_file.find(b"\n") + 1
+    return 0
+
+class ModifiableIndex:
+    """
+    Byte offsets of every modifiable bit in an .asc hardware file.
+    Every file copied from the same template shares the same layout, so an index is built
+    once per template, routing type and set of accessed columns and then reused to read
+    (gather) and write (scatter) the modifiable bits of any circuit with that layout.
+
+    The order of the bits matches the order in which the tiles, rows and columns were
+    historically visited: tiles in file order, then rows, then columns.
+    """
+
+    def __init__(self, body: bytes, rows: List[int], columns: List[int]):
+        """
+        Scans a hardware description once and records the position of each modifiable bit.
+
+        Parameters
+        ----------
+        body : bytes
+            The hardware file contents following the FILE_ATTRIBUTES comment (if any)
+        rows : list[int]
+            The modifiable rows of each logic tile (1 indexed)
+        columns : list[int]
+            The character position of each modifiable column within a row
+        """
+        self.rows = tuple(rows)
+        self.columns = tuple(columns)
+
+        tile_starts = []
+        line_starts = []
+        line_sizes = []
+        included = []
+
+        tile = body.find(LOGIC_TILE)
+        while tile >= 0:
+            # The x/y coordinates follow the header, i.e. ".logic_tile 1 1"
+            pos = tile + len(LOGIC_TILE)
+            eol_pos = body.find(b"\n", pos)
+            x_str, y_str = body[pos:eol_pos].split()
+            line_start = eol_pos + 1
+            line_end = body.find(b"\n", line_start + 1)
+
+            tile_starts.append(tile)
+            line_starts.append(line_start)
+            line_sizes.append(line_end - line_start + 1)
+            included.append(tile_is_included(int(x_str), int(y_str)))
+
+            tile = body.find(LOGIC_TILE, tile + 1)
+
+        self.tile_starts = np.array(tile_starts, dtype=np.int64)
+        self.line_starts = np.array(line_starts, dtype=np.int64)
+        self.line_sizes = np.array(line_sizes, dtype=np.int64)
+        self.tile_included = np.array(included, dtype=bool)
+        self.num_tiles = int(self.tile_included.sum())
+
+        row_offsets = np.array(self.rows, dtype=np.int64) - 1
+        column_offsets = np.array(self.columns, dtype=np.int64)
+        starts = self.line_starts[self.tile_included]
+        sizes = self.line_sizes[self.tile_included]
+        # offsets[tile, row, column] = line_start + line_size * (row - 1) + column
+        offsets = (starts[:, None, None]
+            + sizes[:, None, None] * row_offsets[None, :, None]
+            + column_offsets[None, None, :])
+        self.offsets = offsets.reshape(-1)
+
+        # Row and column of each modifiable bit, used by callers that need to know which bit they are looking at
+        self.bit_rows = np.tile(np.repeat(row_offsets + 1, len(self.columns)), len(starts))
+        self.bit_columns = np.tile(column_offsets, len(starts) * len(self.rows))
+
+    def __len__(self):
+        return self.offsets.size
+
+    def point_mask(self, points: np.ndarray) -> np.ndarray:
+        """
+        Converts crossover points into a tile table mask.
+
+        Parameters
+        ----------
+        points : np.ndarray
+            The (1 indexed) row to select in each modifiable tile, shape (..., tiles)
+
+        Returns
+        -------
+        np.ndarray
+            bool array of shape (..., tiles, rows), True where a tile's modifiable row is its point.
+            Points that are not modifiable rows select nothing in that tile, as copying them would
+            only copy template bits.
+        """
+        rows = np.array(self.rows, dtype=np.int64)
+        return np.asarray(points)[..., None] == rows
+
+    def gather(self, hardware_file) -> np.ndarray:
+        """
+        Returns the raw (ASCII) value of every modifiable bit
+
+        Parameters
+        ----------
+        hardware_file : mmap
+            Memory mapped hardware file
+
+        Returns
+        -------
+        np.ndarray
+            uint8 array of ASCII codes (48 = 0, 49 = 1)
+        """
+        buffer = np.frombuffer(hardware_file, dtype=np.uint8)
+        return buffer[self.offsets + body_start(hardware_file)]
+
+    def scatter(self, hardware_file, values: np.ndarray):
+        """
+        Writes the raw (ASCII) value of every modifiable bit
+
+        Parameters
+        ----------
+        hardware_file : mmap
+            Memory mapped hardware file, opened for writing
+        values : np.ndarray
+            uint8 array of ASCII codes, one per modifiable bit
+        """
+        buffer = np.frombuffer(hardware_file, dtype=np.uint8)
+        buffer[self.offsets + body_start(hardware_file)] = values
+
+    def read_bits(self, hardware_file) -> np.ndarray:
+        """
+        Returns every modifiable bit as a 0/1 uint8 array
+        """
+        return self.gather(hardware_file) - ord("0")
+
+    def write_bits(self, hardware_file, bits: np.ndarray):
+        """
+        Writes every modifiable bit from a 0/1 array
+        """
+        self.scatter(hardware_file, np.asarray(bits, dtype=np.uint8) + ord("0"))
+
+_index_cache: Dict[Tuple, ModifiableIndex] = {}
+
+def get_modifiable_index(hardware_file, rows: List[int], columns: List[int]) -> ModifiableIndex:
+    """
+    Returns the ModifiableIndex for the layout of this hardware file, building it only
+    the first time a layout, set of rows and set of columns is seen.
+
+    Parameters
+    ----------
+    hardware_file : mmap | bytes
+        The hardware file contents
+    rows : list[int]
+        The modifiable rows of each logic tile (1 indexed)
+    columns : list[int]
+        The character position of each modifiable column within a row
+
+    Returns
+    -------
+    ModifiableIndex
+        The (possibly shared) index for this layout
+    """
+    start = body_start(hardware_file)
+    # The layout is found in place, the body is only copied to build a new index
+    body = np.frombuffer(hardware_file, dtype=np.uint8)[start:]
+    layout = np.flatnonzero((body == _LAYOUT_MARKS[0]) | (body == _LAYOUT_MARKS[1]))
+    key = (len(body), layout.tobytes(), tuple(rows), tuple(columns))
+    index = _index_cache.get(key)
+    if index is None:
+        index = ModifiableIndex(body.tobytes(), rows, columns)
+        _index_cache[key] = index
+    return index
@@ -1,13 +1,21 @@
 import itertools
+import time
 from logging import Logger
-from typing import List, Dict, Any
+from queue import Queue
+from threading import Lock, Thread
+from typing import Callable, Iterator, List, Dict, Any, Tuple
+import numpy as np
 from icefarm.client.drivers import PulseCountClient, VarMaxClient
 from icefarm.client.lib.pulsecount import PulseCountEvaluation
 from icefarm.client.lib.varmax import VarMaxEvaluation
 from icefarm.client.lib.BatchClient import EvaluationFailed
 from Circuit.FileBasedCircuit import FileBasedCircuit
+from Circuit.Health import device_health_fac
+from Circuit.Scheduler import Throughput, WorkQueue
+from Circuit.Telemetry import Telemetry
 from Circuit import FitnessFunction
 from Config import Config
+from WaveformStore import as_samples
 
 class DeviceTimeoutException(Exception): ...
 
@@ -44,7 +52,7 @@ class RemoteCircuit(FileBasedCircuit):
         self._waveform_samples = None
 
     def upload(self):
-        self._compile()
+        self.compile_if_stale()
 
     # called by randomize until
     def evaluate_once(self):
@@ -74,19 +82,27 @@ class RemoteCircuit(FileBasedCircuit):
 
             self._extra_data["pulses"] = self._data
 
-            if waveform:
+            if waveform is not None:
                 self._waveform_samples = waveform
 
         return self._fitnessfunc.calculate_fitness(self._data)
 
+    def restore_fitness(self, fitness, data):
+        self._extra_data["pulses"] = list(data)
+        super().restore_fitness(fitness, data)
+
     def get_extra_data(self, key):
         return self._extra_data[key]
 
     def get_waveform(self):
-        if self._waveform_samples:
-            return [str(x) for x in self._waveform_samples]
+        if self._waveform_samples is not None:
+            return [str(x) for x in self._waveform_samples.tolist()]
         return [str(x) for x in self._data] if self._data else []
 
+    def get_waveform_samples(self) -> np.ndarray | None:
+        """Returns the raw ADC samples of the circuit's last evaluation, or None if none were sent"""
+        return self._waveform_samples
+
     def get_waveform_td(self):
         return [str(x) for x in self._data] if self._data else []
 
@@ -102,11 +118,34 @@ class EvolutionClient:
         self._command_queue = []
         self._result_map = {}
         self._waveform_map = {}
+        self._result_lock = Lock()
+        # Circuits sent by dispatch() whose evaluations have finished
+        self._completed: Queue = Queue()
         self._logger = logger
         self.batch_size = config.get_icefarm_client_batch_amount_circuits()
         self.buffer_batches = config.get_icefarm_buffer_batch_amount()
         self.evaluation_mode_all = config.get_icefarm_mode().lower() == "all"
         self.result_timeout = config.get_icefarm_results_flush_interval_seconds() * 4
+        self.evaluation_retries = config.get_icefarm_evaluation_retries()
+        self.work_stealing = not self.evaluation_mode_all and config.get_icefarm_scheduler() == "WORK_STEALING"
+        self.scheduler_chunk = config.get_icefarm_scheduler_chunk()
+        self.speculative_evaluations = config.get_icefarm_speculative_evaluations()
+        # Measured speed of each device, kept across generations
+        self.throughput = Throughput()
+        # Timing of the evaluations of the current generation
+        self.telemetry = Telemetry()
+        self.health = device_health_fac(config)
+        # Degraded devices that are no longer sent evaluations
+        self.quarantined = set()
+
+    def serials(self) -> List[str]:
+        """Returns the reserved devices that are not quarantined"""
+        serials = self._client.getSerials()
+        return [serial for serial in serials if serial not in self.quarantined] or serials
+
+    def quarantine(self, serial: str):
+        """Stops sending evaluations to a device"""
+        self.quarantined.add(serial)
 
     def evaluate(self, circuit: FileBasedCircuit):
         """
@@ -116,9 +155,9 @@ class EvolutionClient:
         self._result_map = {}
         self._waveform_map = {}
         if self.evaluation_mode_all:
-            self._command_queue.append((self._client.getSerials(), circuit._bitstream_filepath))
+            self._command_queue.append((self.serials(), circuit._bitstream_filepath))
             # this is horrible, awful
-            circuit._serials = self._client.getSerials()
+            circuit._serials = self.serials()
         else:
             self._command_queue.append((None, circuit._bitstream_filepath))
 
@@ -128,51 +167,415 @@ class EvolutionClient:
         The first time this is called, evaluations are sent to iCEFARM.
         """
         if not self._result_map:
-            EvalClass = VarMaxEvaluation if isinstance(self._client, VarMaxClient) else PulseCountEvaluation
+            self._logger.info("Sending circuits for remote evaluation...")
+            self._evaluate_queued(progress=True)
+            self._logger.info("Remote evaluation complete.")
 
-            assigned_evaluations = [EvalClass(serials, filepath) for serials, filepath in self._command_queue if serials]
-            unassigned_evaluations = (filepath for serials, filepath in self._command_queue if not serials)
+        return self._result_map[circuit._bitstream_filepath]
 
-            # TODO
-            # Divides evaluations that don't care where they end up
-            # among devices. This is not optimal if using a mix of assigned and
-            # unassigned evaluations, but doing so is complicated and I
-            # am going to add to icefarm instead of here
-            batches = _batched(unassigned_evaluations, len(self._client.getSerials()))
+    def stream(self, circuits: List[FileBasedCircuit]) -> Iterator[FileBasedCircuit]:
+        """
+        Sends the queued evaluations (see evaluate()) and yields each circuit as soon as its last result
+        arrives, so its fitness can be calculated while the others are still being evaluated. Circuits
+        whose evaluations failed are yielded last; calculate_fitness() raises a DeviceTimeoutException
+        for them as usual.
+
+        Parameters
+        ----------
+        circuits : list[FileBasedCircuit]
+            The circuits whose evaluations were queued
+
+        Returns
+        -------
+        Iterator[FileBasedCircuit]
+            The circuits, in the order their evaluations finished
+        """
+        by_fpath = {circuit._bitstream_filepath: circuit for circuit in circuits}
+        completed = Queue()
+        queued = self._command_queue
+        self._command_queue = []
 
-            for batch in batches:
-                for serial, fpath in zip(self._client.getSerials(), batch):
-                    assigned_evaluations.append(EvalClass([serial], fpath))
+        def run():
+            try:
+                self._evaluate_queued(lambda fpath, _: completed.put(fpath), progress=True, queued=queued)
+            except Exception as e:
+                self._logger.error(f"Remote evaluation failed: {e}")
+            finally:
+                completed.put(None)
+
+        self._logger.info("Sending circuits for remote evaluation...")
+        worker = Thread(target=run, name="stream", daemon=True)
+        worker.start()
+        yielded = set()
+        try:
+            while (fpath := completed.get()) is not None:
+                if fpath in by_fpath and fpath not in yielded:
+                    yielded.add(fpath)
+                    yield by_fpath[fpath]
+            self._logger.info("Remote evaluation complete.")
+            for fpath, circuit in by_fpath.items():
+                if fpath not in yielded:
+                    yield circuit
+        finally:
+            # Results must not arrive after the next evaluations are queued
+            worker.join()
+
+    def _evaluate_queued(self, on_complete: Callable[[Any, str], None] = None, progress: bool = False, queued: List[Tuple[List[str], Any]] = None):
+        """
+        Runs the queued evaluations (see evaluate()), with work stealing if it is enabled
+
+        Parameters
+        ----------
+        on_complete : callable | None
+            See _evaluate()
+        progress : bool
+            See _evaluate()
+        queued : list[tuple[list[str] | None, Path]] | None
+            The evaluations to run, defaults to taking the command queue
+        """
+        if queued is None:
+            queued = self._command_queue
+            self._command_queue = []
+        assigned_evaluations = [(serials, filepath) for serials, filepath in queued if serials]
+        unassigned_evaluations = [filepath for serials, filepath in queued if not serials]
 
-            self._logger.info("Sending circuits for remote evaluation...")
+        if self.work_stealing and not assigned_evaluations:
+            self._evaluate_stealing(unassigned_evaluations, self.serials(), on_complete, progress)
+            return
+
+        # TODO
+        # Divides evaluations that don't care where they end up
+        # among devices. This is not optimal if using a mix of assigned and
+        # unassigned evaluations, but doing so is complicated and I
+        # am going to add to icefarm instead of here
+        batches = _batched(unassigned_evaluations, len(self.serials()))
+
+        for batch in batches:
+            for serial, fpath in zip(self.serials(), batch):
+                assigned_evaluations.append(([serial], fpath))
+
+        self._evaluate(assigned_evaluations, on_complete, progress)
+        if self.evaluation_mode_all:
+            self.health.observe_results(self._result_map)
+
+    def _evaluate(self, entries: List[Tuple[List[str], Any]], on_complete: Callable[[Any, str], None] = None, progress: bool = False):
+        """
+        Runs evaluations on iCEFARM and stores their results. Evaluations that fail (or never return) are
+        sent again, up to evaluation_retries times, while every result that did arrive is kept. In the quick
+        mode they are sent to devices that have not failed, in the all mode to the same device if it is still
+        reserved. Evaluations that still fail after that, or that have no device left to be retried on, are
+        stored as EvaluationFailed, which makes calculate_fitness() raise a DeviceTimeoutException.
+
+        Parameters
+        ----------
+        entries : list[tuple[list[str], Path]]
+            The devices each evaluation runs on, and the bitstream it evaluates
+        on_complete : callable | None
+            Called with the bitstream and the device that returned its last result, once every evaluation
+            of a bitstream has succeeded
+        progress : bool
+            Whether to log the percentage of results received every 10%
+        """
+        EvalClass = VarMaxEvaluation if isinstance(self._client, VarMaxClient) else PulseCountEvaluation
+        # Results still expected for each bitstream
+        remaining = {}
+        for serials, fpath in entries:
+            remaining[fpath] = remaining.get(fpath, 0) + len(serials)
+        received = self._progress(sum(remaining.values())) if progress else None
+
+        failed_serials = set()
+        pending = list(entries)
+        for attempt in range(self.evaluation_retries + 1):
+            if attempt > 0:
+                pending, abandoned = self._reassign(pending, failed_serials)
+                self._store_failed(abandoned)
+                if not pending:
+                    return
+                self._logger.warning(f"Retrying {len(pending)} failed evaluations (attempt {attempt} of {self.evaluation_retries})")
+
+            evaluations = [EvalClass(serials, fpath) for serials, fpath in pending]
+            # Devices each evaluation has not returned a result from yet
+            missing = {id(evaluation): set(evaluation.serials) for evaluation in evaluations}
+            try:
+                for serial, evaluation, result in self._run_evaluations(evaluations):
+                    if result is EvaluationFailed:
+                        failed_serials.add(serial)
+                        continue
+                    fpath = evaluation.filepath
+                    self._store_result(serial, fpath, result)
+                    missing[id(evaluation)].discard(serial)
+                    remaining[fpath] -= 1
+                    if remaining[fpath] == 0 and on_complete is not None:
+                        on_complete(fpath, serial)
+                    if received is not None:
+                        received()
+            except Exception as e:
+                self._logger.error(f"Remote evaluation failed: {e}")
+
+            pending = [(list(missing[id(e)]), e.filepath) for e in evaluations if missing[id(e)]]
+            for serials, _ in pending:
+                failed_serials.update(serials)
+            if not pending:
+                return
+
+        self._store_failed(pending)
+
+    def _evaluate_stealing(self, fpaths: List[Any], serials: List[str], on_complete: Callable[[Any, str], None] = None, progress: bool = False):
+        """
+        Runs evaluations with work stealing: every device takes chunks of evaluations from a shared
+        queue whenever it is free (see Scheduler). Returns once every evaluation has a result or ran
+        out of retries, which are stored as EvaluationFailed like _evaluate() does. Devices still
+        running copies of finished evaluations keep running in the background and their results
+        are discarded.
+
+        Parameters
+        ----------
+        fpaths : list[Path]
+            The bitstream of each evaluation
+        serials : list[str]
+            The devices to evaluate them on
+        on_complete : callable | None
+            See _evaluate()
+        progress : bool
+            See _evaluate()
+        """
+        EvalClass = VarMaxEvaluation if isinstance(self._client, VarMaxClient) else PulseCountEvaluation
+        remaining = {}
+        for fpath in fpaths:
+            remaining[fpath] = remaining.get(fpath, 0) + 1
+        received = self._progress(len(fpaths)) if progress else None
+        queue = WorkQueue(len(fpaths), serials, self.scheduler_chunk, self.throughput, self.speculative_evaluations, self.evaluation_retries)
+        remaining_lock = Lock()
+
+        def work(serial):
+            while (indices := queue.take(serial)) is not None:
+                evaluations = [EvalClass([serial], fpaths[index]) for index in indices]
+                index_of = {id(evaluation): index for evaluation, index in zip(evaluations, indices)}
+                returned = 0
+                start = time.perf_counter()
+                try:
+                    for result_serial, evaluation, result in self._run_evaluations(evaluations):
+                        if result is EvaluationFailed:
+                            continue
+                        returned += 1
+                        index = index_of[id(evaluation)]
+                        if not queue.claim(index):
+                            continue
+                        self._store_result(result_serial, evaluation.filepath, result)
+                        with remaining_lock:
+                            remaining[evaluation.filepath] -= 1
+                            last = remaining[evaluation.filepath] == 0
+                            if received is not None:
+                                received()
+                        if last and on_complete is not None:
+                            on_complete(evaluation.filepath, result_serial)
+                        queue.finish(index)
+                except Exception as e:
+                    self._logger.error(f"Remote evaluation on {serial} failed: {e}")
+                self.throughput.record(serial, returned, time.perf_counter() - start)
+                queue.release(serial, indices)
+
+        for serial in serials:
+            Thread(target=work, args=(serial,), name=f"steal-{serial}", daemon=True).start()
+        queue.wait()
+
+        if queue.failed:
+            self._logger.warning(f"{len(queue.failed)} evaluations failed on every retry")
+        for index, serial in queue.failed.items():
+            self._store_result(serial, fpaths[index], EvaluationFailed)
+
+    def _run_evaluations(self, evaluations: list):
+        """
+        Sends evaluations to iCEFARM, recording their timing in telemetry, and yields
+        (serial, evaluation, result) as results arrive
+        """
+        batch = self.telemetry.dispatch(evaluations)
+        try:
+            for serial, evaluation, result in self._client.evaluateEvaluations(evaluations, batch_size=self.batch_size, target_batches=self.buffer_batches, result_timeout=self.result_timeout):
+                batch.result(serial, result is EvaluationFailed)
+                yield serial, evaluation, result
+        finally:
+            batch.finish()
+
+    def _progress(self, total: int) -> Callable[[], None]:
+        """
+        Returns a function to call for every result received, which logs the percentage of
+        results received every 10%
+        """
+        received = 0
+        logged_percent = 0
+
+        def tick():
+            nonlocal received, logged_percent
+            received += 1
+            if (percent := received * 100 // total // 10 * 10) > logged_percent:
+                logged_percent = percent
+                self._logger.info(f"Remote evaluation {percent}% complete ({received}/{total} results)")
+
+        return tick
+
+    def _reassign(self, entries: List[Tuple[List[str], Any]], failed_serials: set) -> Tuple[List[Tuple[List[str], Any]], List[Tuple[List[str], Any]]]:
+        """
+        Picks the devices failed evaluations are retried on
+
+        Returns
+        -------
+        tuple[list[tuple[list[str], Path]], list[tuple[list[str], Path]]]
+            The evaluations to retry, and the failed evaluations that have no device left to be retried on
+        """
+        serials = self.serials()
+        if self.evaluation_mode_all:
+            # Every circuit must be measured on each device, so only the same device will do
+            retried = [entry for entry in entries if all(s in serials for s in entry[0])]
+            abandoned = [entry for entry in entries if not all(s in serials for s in entry[0])]
+            return retried, abandoned
+
+        healthy = [s for s in serials if s not in failed_serials] or list(serials)
+        if not healthy:
+            return [], entries
+        return [([healthy[i % len(healthy)]], fpath) for i, (_, fpath) in enumerate(entries)], []
+
+    def _store_failed(self, entries: List[Tuple[List[str], Any]]):
+        """Stores EvaluationFailed for each device of evaluations that ran out of retries"""
+        for serials, fpath in entries:
+            for serial in serials:
+                self._store_result(serial, fpath, EvaluationFailed)
+
+    def _store_result(self, serial: str, fpath, result):
+        with self._result_lock:
+            if fpath not in self._result_map:
+                self._result_map[fpath] = {}
+
+            if serial not in self._result_map[fpath]:
+                self._result_map[fpath][serial] = []
+
+            if isinstance(result, list) or isinstance(result, tuple):
+                fitness, samples = result
+                if isinstance(fitness, str):
+                    fitness = float(fitness)
+                self._result_map[fpath][serial].append(fitness)
+                if samples is not None and len(samples):
+                    self._waveform_map[fpath] = as_samples(samples)
+            else:
+                if isinstance(result, str):
+                    result = float(result)
+                self._result_map[fpath][serial].append(result)
+
+        self._logger.debug(f"Received value for file {fpath}: {result}")
 
-            for serial, evaluation, result in self._client.evaluateEvaluations(assigned_evaluations, batch_size=self.batch_size, target_batches=self.buffer_batches, result_timeout=self.result_timeout):
-                fpath = evaluation.filepath
-                if fpath not in self._result_map:
-                    self._result_map[fpath] = {}
-
-                if serial not in self._result_map[fpath]:
-                    self._result_map[fpath][serial] = []
-
-                if isinstance(result, list) or isinstance(result, tuple):
-                    fitness, samples = result
-                    if isinstance(fitness, str):
-                        fitness = float(fitness)
-                    self._result_map[fpath][serial].append(fitness)
-                    if samples:
-                        self._waveform_map[fpath] = samples
+    def dispatch(self, circuit: FileBasedCircuit, serial: str, evaluations: int):
+        """
+        Sends a circuit to be evaluated on one device without waiting for the results.
+        The circuit is returned by next_completed() once every evaluation has finished
+        (or failed), after which calculate_fitness() reads its results as usual.
+
+        Parameters
+        ----------
+        circuit : FileBasedCircuit
+            The circuit to evaluate, already compiled
+        serial : str
+            The device to evaluate it on
+        evaluations : int
+            How many times the circuit is evaluated
+        """
+        EvalClass = VarMaxEvaluation if isinstance(self._client, VarMaxClient) else PulseCountEvaluation
+        fpath = circuit._bitstream_filepath
+        with self._result_lock:
+            self._result_map.pop(fpath, None)
+            self._waveform_map.pop(fpath, None)
+
+        def run():
+            try:
+                assigned_evaluations = [EvalClass([serial], fpath) for _ in range(evaluations)]
+                for result_serial, evaluation, result in self._run_evaluations(assigned_evaluations):
+                    self._store_result(result_serial, evaluation.filepath, result)
+            except Exception as e:
+                self._logger.error(f"Evaluation of {circuit} on {serial} failed: {e}")
+            finally:
+                with self._result_lock:
+                    received = fpath in self._result_map
+                if not received:
+                    # The device was lost before it returned anything
+                    self._store_result(serial, fpath, EvaluationFailed)
+                self._completed.put((circuit, serial))
+
+        Thread(target=run, name=f"dispatch-{serial}", daemon=True).start()
+
+    def submit(self, circuits: List[FileBasedCircuit], evaluations: int, serials: List[str] = None):
+        """
+        Sends a chunk of circuits to be evaluated without waiting for the results, dividing
+        them among the devices like get_result() does. Each circuit is returned by
+        next_completed() as soon as all of its evaluations have finished (or failed), after
+        which calculate_fitness() reads its results as usual. Chunks may be submitted while
+        earlier chunks are still being evaluated.
+
+        Parameters
+        ----------
+        circuits : list[FileBasedCircuit]
+            The circuits to evaluate, already compiled
+        evaluations : int
+            How many times each circuit is evaluated (on every device in the ALL mode)
+        serials : list[str] | None
+            The devices to evaluate the circuits on, defaults to every reserved device
+        """
+        if serials is None:
+            serials = self.serials()
+        serials = list(serials)
+        by_fpath = {}
+        for circuit in circuits:
+            by_fpath[circuit._bitstream_filepath] = circuit
+            if self.evaluation_mode_all:
+                circuit._serials = serials
+        with self._result_lock:
+            for fpath in by_fpath:
+                self._result_map.pop(fpath, None)
+                self._waveform_map.pop(fpath, None)
+
+        assigned_evaluations = []
+        i = 0
+        for _ in range(evaluations):
+            for circuit in circuits:
+                if self.evaluation_mode_all:
+                    targets = serials
                 else:
-                    if isinstance(result, str):
-                        result = float(result)
-                    self._result_map[fpath][serial].append(result)
+                    targets = [serials[i % len(serials)]]
+                    i += 1
+                assigned_evaluations.append((targets, circuit._bitstream_filepath))
 
-                self._logger.debug(f"Received value for file {fpath}: {result}")
+        def run():
+            completed = set()
 
-            self._logger.info("Remote evaluation complete.")
-            self._command_queue = []
+            def on_complete(fpath, serial):
+                completed.add(fpath)
+                self._completed.put((by_fpath[fpath], serial))
 
-        return self._result_map[circuit._bitstream_filepath]
+            try:
+                if self.work_stealing:
+                    self._evaluate_stealing([fpath for _, fpath in assigned_evaluations], serials, on_complete)
+                else:
+                    self._evaluate(assigned_evaluations, on_complete)
+            except Exception as e:
+                self._logger.error(f"Evaluation of {len(circuits)} circuits failed: {e}")
+            finally:
+                for fpath, circuit in by_fpath.items():
+                    if fpath not in completed:
+                        # The evaluations failed even after being retried
+                        self._completed.put((circuit, None))
+
+        Thread(target=run, name="submit", daemon=True).start()
+
+    def next_completed(self) -> Tuple[FileBasedCircuit, str]:
+        """
+        Waits for a dispatched or submitted circuit to finish evaluating
+
+        Returns
+        -------
+        tuple[FileBasedCircuit, str | None]
+            The circuit and the device it was evaluated on (for submitted circuits, the device
+            that returned its last result, or None if the circuit failed)
+        """
+        return self._completed.get()
 
-    def get_waveform(self, circuit: FileBasedCircuit) -> list | None:
+    def get_waveform(self, circuit: FileBasedCircuit) -> np.ndarray | None:
         """Returns raw ADC waveform samples for a circuit, or None if not available."""
         return self._waveform_map.get(circuit._bitstream_filepath)
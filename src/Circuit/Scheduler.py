@@ -0,0 +1,192 @@
+"""
+Scheduler
+---------
+
+Work stealing for the QUICK iCEFARM mode. Instead of pinning every bitstream to a device up front,
+evaluations wait in one shared queue and each device takes a small chunk whenever it runs out of
+work. Chunks are sized by how fast each device has been so far, so fast devices take more, and
+once the queue is empty idle devices can speculatively evaluate copies of the evaluations still
+running on the slowest devices; whichever result arrives first is kept. A slow or stalled device
+then delays a generation by at most one chunk instead of its whole share.
+"""
+import math
+from threading import Condition
+from typing import Dict, List, Optional, Set
+
+class Throughput:
+    """
+    Seconds each device takes per evaluation, smoothed over the chunks it returned
+    """
+    def __init__(self, smoothing: float = 0.5):
+        """
+        Parameters
+        ----------
+        smoothing : float
+            The weight of the newest chunk in the running estimate
+        """
+        self._smoothing = smoothing
+        self._seconds: Dict[str, float] = {}
+
+    def record(self, serial: str, evaluations: int, seconds: float):
+        """Adds a chunk of evaluations that the device returned in the given time"""
+        if evaluations < 1:
+            return
+        per_evaluation = seconds / evaluations
+        previous = self._seconds.get(serial)
+        if previous is None:
+            self._seconds[serial] = per_evaluation
+        else:
+            self._seconds[serial] = self._smoothing * per_evaluation + (1 - self._smoothing) * previous
+
+    def seconds_per_evaluation(self, serial: str) -> Optional[float]:
+        """Returns the device's seconds per evaluation, None if it has not returned any"""
+        return self._seconds.get(serial)
+
+    def relative_speed(self, serial: str, serials: List[str]) -> float:
+        """
+        Returns how many times faster than the average of the given devices this one is,
+        1 if either is unknown
+        """
+        own = self._seconds.get(serial)
+        known = [self._seconds[s] for s in serials if s in self._seconds]
+        if own is None or not known or own <= 0:
+            return 1.0
+        return (sum(known) / len(known)) / own
+
+class WorkQueue:
+    """
+    The evaluations of one call, shared by the devices evaluating them. Every device runs a loop of
+    take(), then claim() and finish() for each result, then release() once its chunk returns.
+    """
+    def __init__(self, count: int, serials: List[str], chunk: int, throughput: Throughput, speculate: bool, retries: int):
+        """
+        Parameters
+        ----------
+        count : int
+            The number of evaluations, which are referred to by their index
+        serials : list[str]
+            The devices evaluating them
+        chunk : int
+            The number of evaluations an average device takes at a time
+        throughput : Throughput
+            The measured speed of the devices
+        speculate : bool
+            Whether idle devices evaluate copies of evaluations still running elsewhere once the queue is empty
+        retries : int
+            How many times evaluations that failed are queued again
+        """
+        self._serials = list(serials)
+        self._chunk = chunk
+        self._throughput = throughput
+        self._speculate = speculate
+        self._retries = retries
+        self._condition = Condition()
+
+        self._total = count
+        self._queue: List[int] = list(range(count))
+        # The devices each evaluation is running on
+        self._running: Dict[int, Set[str]] = {}
+        self._attempts: Dict[int, int] = {}
+        self._claimed: Set[int] = set()
+        self._finished = 0
+        # The evaluations that ran out of retries, and the device they last failed on
+        self.failed: Dict[int, str] = {}
+        # Devices that lost evaluations, which take no more work while others are left
+        self._retired: Set[str] = set()
+
+    def take(self, serial: str) -> Optional[List[int]]:
+        """
+        Waits for work for a device
+
+        Returns
+        -------
+        list[int] | None
+            The evaluations the device should run, None once there are none left for it
+        """
+        with self._condition:
+            while True:
+                if self.done() or serial in self._retired:
+                    return None
+                if self._queue:
+                    return self._hand_out(serial, self._chunk_size(serial))
+                straggler = self._straggler(serial) if self._speculate else None
+                if straggler is not None:
+                    self._running[straggler].add(serial)
+                    return [straggler]
+                self._condition.wait()
+
+    def _chunk_size(self, serial: str) -> int:
+        active = [s for s in self._serials if s not in self._retired] or self._serials
+        size = max(1, round(self._chunk * self._throughput.relative_speed(serial, active)))
+        # Near the end, leave some of the queue for the other devices
+        return min(size, max(1, math.ceil(len(self._queue) / len(active))))
+
+    def _hand_out(self, serial: str, size: int) -> List[int]:
+        chunk, self._queue = self._queue[:size], self._queue[size:]
+        for index in chunk:
+            self._running.setdefault(index, set()).add(serial)
+        return chunk
+
+    def _straggler(self, serial: str) -> Optional[int]:
+        """Returns the unclaimed evaluation running only on the slowest other device, if any"""
+        slowest, slowest_seconds = None, -1.0
+        for index, serials in self._running.items():
+            if index in self._claimed or len(serials) != 1 or serial in serials:
+                continue
+            seconds = self._throughput.seconds_per_evaluation(next(iter(serials)))
+            seconds = math.inf if seconds is None else seconds
+            if seconds > slowest_seconds:
+                slowest, slowest_seconds = index, seconds
+        return slowest
+
+    def claim(self, index: int) -> bool:
+        """
+        Claims the result of an evaluation. Returns False if another device already returned it,
+        in which case the result is discarded. Claimed results must be followed by finish().
+        """
+        with self._condition:
+            if index in self._claimed:
+                return False
+            self._claimed.add(index)
+            return True
+
+    def finish(self, index: int):
+        """Marks a claimed evaluation as finished, once its result is stored"""
+        with self._condition:
+            self._finished += 1
+            self._condition.notify_all()
+
+    def release(self, serial: str, indices: List[int]):
+        """
+        Returns a chunk once the device is done with it. Evaluations that the device did not
+        return a result for are queued again, unless a copy is still running elsewhere, and the
+        device is retired if any other device is still healthy.
+        """
+        with self._condition:
+            lost = False
+            for index in indices:
+                self._running[index].discard(serial)
+                if index in self._claimed:
+                    continue
+                lost = True
+                if self._running[index]:
+                    continue
+                self._attempts[index] = self._attempts.get(index, 0) + 1
+                if self._attempts[index] > self._retries:
+                    self.failed[index] = serial
+                else:
+                    self._queue.insert(0, index)
+            if lost and any(s != serial and s not in self._retired for s in self._serials):
+                self._retired.add(serial)
+            self._condition.notify_all()
+
+    def done(self) -> bool:
+        """Returns whether every evaluation finished or ran out of retries"""
+        with self._condition:
+            return self._finished + len(self.failed) >= self._total
+
+    def wait(self):
+        """Waits until every evaluation finished or ran out of retries"""
+        with self._condition:
+            while not self.done():
+                self._condition.wait()
@@ -13,7 +13,7 @@ class SimHardwareCircuit(FileBasedCircuit):
 
     def upload(self):
         # Need to compile, but not actually upload to the FPGA
-        FileBasedCircuit._compile(self)
+        self.compile_if_stale()
 
     def _get_measurement(self) -> list[float]:
         """
@@ -25,12 +25,7 @@ class SimHardwareCircuit(FileBasedCircuit):
         float
             The fitness of the sim hardware. (sum of all modifiable bits in compiled binary file)
         """
-        fitness = 0
-        def evaluate_bit(bit, *rest):
-            nonlocal fitness
-            fitness = fitness + (bit - 48)
-
-        self._run_at_each_modifiable(evaluate_bit)
+        fitness = int(self.get_bitstream().sum())
 
         self._logger.event(3, f"Fitness {self._index}: ", fitness)
 
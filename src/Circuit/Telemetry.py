@@ -0,0 +1,190 @@
+"""
+Telemetry
+---------
+
+Timing of every evaluation sent to iCEFARM, summarized per generation so that a slow run can be
+traced to the host, the network, iCEFARM batching or specific boards. For every batch (one call
+to evaluateEvaluations) it records the time from dispatch to the first result and to the last,
+and for every device the time between its results, its failures and how long it sat idle while
+the generation was running. Results that arrive in bursts show up as a spread between the p50
+and p99 evaluation times of a device, which points to flush_interval_seconds and
+buffer_batch_amount rather than to the board.
+"""
+import time
+from threading import Lock
+from typing import Dict, List, Optional
+
+import numpy as np
+
+# Percentiles every distribution is summarized by
+PERCENTILES = (50, 95, 99)
+
+def distribution(values: List[float]) -> dict:
+    """Summarizes values by their count, mean, largest value and PERCENTILES"""
+    summary = {"count": len(values)}
+    if not values:
+        return summary
+    summary["mean"] = float(np.mean(values))
+    for percentile, value in zip(PERCENTILES, np.percentile(values, PERCENTILES)):
+        summary[f"p{percentile}"] = float(value)
+    summary["max"] = float(np.max(values))
+    return summary
+
+def _covered(intervals: List[List[float]]) -> float:
+    """Returns the total length covered by possibly overlapping intervals"""
+    total = 0.0
+    end = -np.inf
+    for start, stop in sorted(intervals):
+        start = max(start, end)
+        if stop > start:
+            total += stop - start
+            end = stop
+    return total
+
+class Batch:
+    """
+    One call to evaluateEvaluations
+    """
+    def __init__(self, telemetry: "Telemetry", evaluations: int, serials: List[str]):
+        self._telemetry = telemetry
+        self.evaluations = evaluations
+        self.serials = serials
+        self.received = 0
+        self.dispatched = time.perf_counter()
+        self.first_result: Optional[float] = None
+        # When each device last returned a result for this batch
+        self.last_by_serial: Dict[str, float] = {}
+
+    def result(self, serial: str, failed: bool):
+        """Records a result of the batch as it arrives"""
+        now = time.perf_counter()
+        self._telemetry._result(serial, failed, now - self.last_by_serial.get(serial, self.dispatched))
+        self.received += 1
+        self.last_by_serial[serial] = now
+        if self.first_result is None:
+            self.first_result = now
+
+    def finish(self):
+        """Records the end of the batch, once every result arrived or the call failed"""
+        self._telemetry._finish(self)
+
+class Telemetry:
+    """
+    The evaluations of the current generation
+    """
+    def __init__(self):
+        self._lock = Lock()
+        self._outstanding = 0
+        # Batches that have not finished yet
+        self._running = set()
+        self.reset()
+
+    def reset(self):
+        """Starts a new generation. Evaluations still outstanding stay counted in the queue depth."""
+        with self._lock:
+            self._started = time.perf_counter()
+            self._first_result_latency: List[float] = []
+            self._batches: List[dict] = []
+            self._queue_depth: List[int] = []
+            self._evaluation_seconds: Dict[str, List[float]] = {}
+            self._failures: Dict[str, int] = {}
+            # When each device had evaluations outstanding
+            self._busy: Dict[str, List[List[float]]] = {}
+
+    def dispatch(self, evaluations: list) -> Batch:
+        """
+        Records evaluations being sent
+
+        Parameters
+        ----------
+        evaluations : list[Evaluation]
+            The evaluations of one call to evaluateEvaluations
+
+        Returns
+        -------
+        Batch
+            The batch, whose results must be passed to Batch.result() as they arrive
+        """
+        serials = sorted(set(serial for evaluation in evaluations for serial in evaluation.serials))
+        expected = sum(len(evaluation.serials) for evaluation in evaluations)
+        with self._lock:
+            self._outstanding += expected
+            self._queue_depth.append(self._outstanding)
+            batch = Batch(self, expected, serials)
+            self._running.add(batch)
+        return batch
+
+    def _result(self, serial: str, failed: bool, seconds: float):
+        with self._lock:
+            self._outstanding -= 1
+            self._queue_depth.append(self._outstanding)
+            if failed:
+                self._failures[serial] = self._failures.get(serial, 0) + 1
+            else:
+                self._evaluation_seconds.setdefault(serial, []).append(seconds)
+
+    def _finish(self, batch: Batch):
+        now = time.perf_counter()
+        with self._lock:
+            self._running.discard(batch)
+            # Results that never arrived are no longer outstanding
+            self._outstanding -= batch.evaluations - batch.received
+            first_result_seconds = None
+            if batch.first_result is not None:
+                first_result_seconds = batch.first_result - batch.dispatched
+                self._first_result_latency.append(first_result_seconds)
+            for serial in batch.serials:
+                self._busy.setdefault(serial, []).append([batch.dispatched, batch.last_by_serial.get(serial, now)])
+            self._batches.append({
+                "evaluations": batch.evaluations,
+                "devices": len(batch.serials),
+                "first_result_seconds": first_result_seconds,
+                "seconds": now - batch.dispatched,
+            })
+
+    def summary(self, serials: List[str] = ()) -> dict:
+        """
+        Summarizes the generation so far
+
+        Parameters
+        ----------
+        serials : list[str]
+            Devices to include even if they were not sent anything
+
+        Returns
+        -------
+        dict
+            seconds: time since reset(),
+            first_result_latency: distribution of the seconds from dispatch to the first result of each batch,
+            evaluation_time: distribution of the seconds between consecutive results of a device, over every device,
+            queue_depth: distribution of the results outstanding, sampled whenever a batch was sent or a result arrived,
+            batches: evaluations, devices, first_result_seconds and seconds of each batch,
+            devices: evaluations, failures, evaluation_time and idle_seconds (time without outstanding
+            evaluations) of each device
+        """
+        with self._lock:
+            now = time.perf_counter()
+            elapsed = now - self._started
+            busy_by_serial = {serial: list(busy) for serial, busy in self._busy.items()}
+            for batch in self._running:
+                for serial in batch.serials:
+                    busy_by_serial.setdefault(serial, []).append([batch.dispatched, now])
+
+            devices = {}
+            for serial in sorted(set(serials) | set(self._evaluation_seconds) | set(self._failures) | set(busy_by_serial)):
+                seconds = self._evaluation_seconds.get(serial, [])
+                busy = [[max(start, self._started), stop] for start, stop in busy_by_serial.get(serial, [])]
+                devices[serial] = {
+                    "evaluations": len(seconds),
+                    "failures": self._failures.get(serial, 0),
+                    "evaluation_time": distribution(seconds),
+                    "idle_seconds": max(0.0, elapsed - _covered(busy)),
+                }
+            return {
+                "seconds": elapsed,
+                "first_result_latency": distribution(self._first_result_latency),
+                "evaluation_time": distribution([s for seconds in self._evaluation_seconds.values() for s in seconds]),
+                "queue_depth": distribution(self._queue_depth),
+                "batches": list(self._batches),
+                "devices": devices,
+            }
@@ -5,6 +5,7 @@ Circuit Population
 This class was reviewed, and should be fully documented at a basic level.
 
 """
+import json
 import os
 import numpy as np
 from shutil import copyfile
@@ -12,11 +13,14 @@ from sortedcontainers import SortedKeyList
 from numpy.random import default_rng
 from pathlib import Path
 from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
 from time import time
 import atexit
 import random
 import math
 from mmap import mmap
+from Circuit.AttributeStore import ATTRIBUTES_FILENAME, AttributeStore
+from Circuit.CompileCache import CompileCache
 from Circuit.FileBasedCircuit import FileBasedCircuit
 from Circuit.FullySimCircuit import FullySimCircuit
 from Circuit.IntrinsicCircuit import IntrinsicCircuit
@@ -25,15 +29,24 @@ from Circuit.SimHardwareCircuit import SimHardwareCircuit
 from Circuit.ToneDiscriminatorFitnessFunction import ToneDiscriminatorFitnessFunction
 from Circuit.VarMaxFitnessFunction import VarMaxFitnessFunction
 from Circuit.RemoteCircuit import RemoteCircuit, EvolutionClient, DeviceTimeoutException
+from ga.crossover import crossover_fac
 from ga.selection.utils import selection_fac
-from ga.diversity import diversity_fac
+from ga.diversity import diversity_fac, bitstream_matrix, genome_hashes
+from ga.genome import PopulationGenome
+from ga.islands import Island, migration_destinations
+from ga.surrogate import is_dead, surrogate_fac
+from FitnessMemo import FitnessMemo, reevaluation_policy_fac
+from Racing import Race
+from Prescreen import Prescreen, prescreen_model_fac
+from Checkpoint import Checkpoint
+from WaveformStore import waveform_store_fac
+from DevicePool import reserve_icefarm_client
 from Config import Config
 from ascTemplateBuilder import ascTemplateBuilder
 from utilities import wipe_folder
 from datetime import datetime
 import random
 
-from icefarm.client.drivers import PulseCountClient, VarMaxClient
 
 RANDOMIZE_UNTIL_NOT_SET_ERR_MSG = '''\
 RANDOMIZE_UNTIL not set in config.ini, continuing without randomization'''
@@ -58,6 +71,13 @@ CircuitInfo = namedtuple("CircuitInfo", ["name", "fitness"])
 # Named tuple for circuit's path and fitness; currently only used for combining populations
 CircuitPathInfo = namedtuple("CircuitPathInfo", ["path", "fitness"])
 
+# Everything a speculative selection of pipelined evolution changed, so that it can be undone
+Speculation = namedtuple("Speculation", ["bitstreams", "src_populations", "rand_state", "selection_state", "elites"])
+
+# Selections and mutations whose speculative results only depend on the elites and the order of the circuits
+SPECULATIVE_SELECTIONS = ["SINGLE_ELITE", "FRAC_ELITE", "FIT_PROP_SEL", "RANK_PROP_SEL"]
+SPECULATIVE_MUTATIONS = ["SIMPLE", "RANK"]
+
 
 def is_pulse_func(config):
     """
@@ -106,34 +126,12 @@ class CircuitPopulation:
         self.__speedtest = speedtest
 
         if config.get_simulation_mode() == "REMOTE":
-            url = config.get_icefarm_url()
-            # TODO generate unique client name / stop procrastinating on auth
-            name = f"bitstream-evolution-{random.random()}"
-            if config.get_fitness_func() == "VARIANCE":
-                if config.get_icefarm_send_waveform():
-                    logger.info("Waveform data transfer enabled")
-                self._client = VarMaxClient(url, name, logger, send_waveform=config.get_icefarm_send_waveform())
-            else:
-                self._client = PulseCountClient(url, name, logger)
-            if clear_workers:
-                logger.info("Clearing stale workers...")
-                self._client.clearWorkers()
-                logger.info("Cleared. Waiting for workers to re-register...")
-            logger.info(f"Reserving devices...")
-
-            # TODO might want to unify reserve and reservespecific to one method in icefarm
-            serials = config.get_icefarm_devices()
-            if isinstance(serials, int):
-                self._client.reserve(serials, wait_for_available=clear_workers, flush_interval_seconds=config.get_icefarm_results_flush_interval_seconds(), flush_at_bitstreams_remaining=config.get_icefarm_buffer_batch_amount() * config.get_icefarm_client_batch_amount_circuits() - 1)
-            else:
-                self._client.reserveSpecific(serials, flush_interval_seconds=config.get_icefarm_results_flush_interval_seconds(), flush_at_bitstreams_remaining=config.get_icefarm_buffer_batch_amount() * config.get_icefarm_client_batch_amount_circuits() - 1)
-
-
-            logger.info(f"Reserved devices: {self._client.getSerials()}")
+            self._client = reserve_icefarm_client(config, logger, clear_workers)
             self._evo_client = EvolutionClient(self._client, config, logger)
             atexit.register(self._client.endAll)
         else:
             self._client = None
+            self._evo_client = None
 
 
         # A list of Circuits that's sorted by fitness decreasing order
@@ -143,16 +141,73 @@ class CircuitPopulation:
         self._circuits = SortedKeyList(key=lambda ckt: -1 * ckt.get_fitness())
         self.__logger = logger
         self.__overall_best_circuit_info = CircuitInfo("", 0)
-        self.__rand = default_rng()
+        seed = config.get_random_seed()
+        self.__rand = default_rng(seed)
+        if seed is not None:
+            # Also used for the fitness sensitivity sine functions
+            random.seed(seed)
         self.__current_epoch = 0
         self.__best_epoch = 0
+        self.__extra_devices_reserved = 0
+        # Subpopulations of island evolution, created when evolution starts
+        self.__islands = []
+        # Set when the population was restored from a checkpoint
+        self.__resumed = False
+        self.__island_state = None
 
         num_rows = len(config.get_routing_rows())
         num_cols = len(config.get_accessed_columns())
         # 660 logic tiles - no tiles for x=6 or x=19
         self.__population_bistream_sum = np.zeros(660*num_rows*num_cols)
 
-        self.__run_selection = selection_fac(self, config, logger, self.__rand)
+        # Modifiable bits of every file based circuit, created when the population is populated
+        self._genome = None
+
+        # Remembers the fitness of past genomes, unless every circuit is measured every generation
+        self.__fitness_memo = None
+        if config.get_simulation_mode() != "FULLY_SIM" and config.get_reevaluation_policy() != "ALWAYS":
+            self.__fitness_memo = FitnessMemo(reevaluation_policy_fac(config), config.get_fitness_memo_entries())
+
+        # Fitness model learned from every measured circuit
+        self.__surrogate = None
+        if config.get_simulation_mode() != "FULLY_SIM":
+            self.__surrogate = surrogate_fac(config)
+
+        # Estimates the fitness of the least promising offspring instead of measuring them
+        self.__prescreen = None
+        if config.get_simulation_mode() != "FULLY_SIM" and config.get_prescreen_model() != "NONE":
+            self.__prescreen = Prescreen(
+                prescreen_model_fac(config, self.__surrogate),
+                config.get_prescreen_fraction(),
+                config.get_prescreen_threshold(),
+                config.get_surrogate_dead_probability() if self.__surrogate is not None else 1.0
+            )
+
+        # Waveforms returned by VARIANCE evaluations, stored in binary instead of the text log.
+        # The store is opened when the population is populated, once it is known whether the run is resumed
+        self.__waveform_store = None
+        self.__stores_waveforms = config.get_simulation_mode() == "REMOTE" and config.get_fitness_func() == "VARIANCE" and config.get_icefarm_send_waveform()
+        # The last waveform stored for each circuit index
+        self.__stored_waveforms = {}
+
+        # The passes measured for each circuit in the last generation, when circuits are raced
+        self.__race = None
+        # Circuits measured in the last generation, None if every circuit was
+        self.__measured_count = None
+
+        self.__compile_cache = None
+        if config.get_simulation_mode() != "FULLY_SIM" and config.get_compile_cache_entries() > 0:
+            self.__compile_cache = CompileCache(
+                config.get_bin_cache_directory(),
+                config.get_compile_cache_entries(),
+                int(config.get_compile_cache_size_mb() * 1024 * 1024)
+            )
+
+        self.__run_selection = selection_fac(self, config, logger, self.__rand, surrogate=self.__surrogate)
+        # Steady state evolution breeds one offspring at a time instead of running selection
+        self.__steady_crossover = None
+        if config.get_evolution_mode() == "STEADY_STATE":
+            self.__steady_crossover = crossover_fac(self, config, logger, self.__rand)()
         self.__run_diversity = diversity_fac(config, logger)
 
     def run_fitness_sensitity(self):
@@ -256,7 +311,7 @@ class CircuitPopulation:
 
             if self.__config.get_simulation_mode() == 'REMOTE':
                 if self.__config.get_icefarm_mode().upper() == "ALL":
-                    serials = self._client.getSerials()
+                    serials = self._evo_client.serials()
                 else:
                     serials = None
 
@@ -264,12 +319,18 @@ class CircuitPopulation:
 
             return IntrinsicCircuit(index, file_name, self.__config, seed_arg, self.__rand, self.__logger, self.__microcontroller, fit_func)
 
-    def populate(self):
+    def populate(self, checkpoint: Checkpoint = None):
         """
         Creates initial population based on the config.
         1. Clears the files used to keep track of circuit
         2. Uses appropriate initialization method specified by config.
         3. Handles randomization until condition in config is met.
+
+        Parameters
+        ----------
+        checkpoint : Checkpoint | None
+            If given, the population is restored from this checkpoint instead of being initialized,
+            and evolve() continues the run it was saved from
         """
         # Always creates a circuit with the seed file, but if we have certain randomization
         # modes then perform necessary operations
@@ -282,8 +343,16 @@ class CircuitPopulation:
         wipe_folder(self.__config.get_data_directory())
         wipe_folder(self.__config.get_generations_directory())
 
+        # Circuit attributes are kept in memory and written next to the hardware files once per generation
+        self.__attribute_store = AttributeStore(self.__config.get_asc_directory().joinpath(ATTRIBUTES_FILENAME))
+        if self.__stores_waveforms:
+            # A resumed run appends to the waveforms of the run it continues
+            self.__waveform_store = waveform_store_fac(self.__config, None if checkpoint is None else checkpoint.state["epoch"])
+
+        # Circuits restored from a checkpoint start as copies of the seed
+        init_mode = self.__config.get_init_mode() if checkpoint is None else "CLONE_SEED"
         self.__multiple_populations = False
-        if self.__config.get_init_mode() == "EXISTING_POPULATION":
+        if init_mode == "EXISTING_POPULATION":
             # Need to assign where each circuit gets its source from
             # Get number of subpopulations, then grab random circuits from each
             subdirectories = next(os.walk(self.__config.get_src_pops_dir()))[1]
@@ -299,12 +368,23 @@ class CircuitPopulation:
                 subdir_circuits = SortedKeyList(
                     key=lambda ckt: -ckt.fitness
                 )
+                # Populations saved from an asc directory carry their attributes in a sidecar,
+                # older ones in a comment in each file
+                subdir = self.__config.get_src_pops_dir().joinpath(subdirectories[i])
+                sidecar = {}
+                if ATTRIBUTES_FILENAME in subdirectory_files[i]:
+                    sidecar = AttributeStore.load(subdir.joinpath(ATTRIBUTES_FILENAME))
                 for file in subdirectory_files[i]:
-                    path = self.__config.get_src_pops_dir().joinpath(subdirectories[i]).joinpath(file)
+                    if file == ATTRIBUTES_FILENAME:
+                        continue
+                    path = subdir.joinpath(file)
                     hw_file = open(path, "r+")
                     mmapped_file = mmap(hw_file.fileno(), 0)
                     hw_file.close()
-                    fitness = float(FileBasedCircuit.get_file_attribute_st(mmapped_file, "fitness"))
+                    fitness = sidecar.get(Path(file).stem, {}).get("fitness")
+                    if fitness is None:
+                        fitness = FileBasedCircuit.get_file_attribute_st(mmapped_file, "fitness")
+                    fitness = float(fitness)
                     if fitness == None:
                         fitness = 0
                     subdir_circuits.add(CircuitPathInfo(path, fitness))
@@ -322,7 +402,7 @@ class CircuitPopulation:
 
         for index in range(1, self.__config.get_population_size() + 1):
             file_name = "hardware" + str(index)
-            if self.__config.get_init_mode() == "EXISTING_POPULATION":
+            if init_mode == "EXISTING_POPULATION":
                 # Grab the top circuit from the current population, unless it is empty, then we'll jump to the next one
                 while len(all_subdir_circuits[subdirectory_index]) <= 0:
                     subdirectory_index = (subdirectory_index + 1) % len(all_subdir_circuits)
@@ -332,18 +412,32 @@ class CircuitPopulation:
                 seedArg = template
 
             ckt = self.__construct_circuit(index, file_name, seedArg, sine_funcs)
-            if self.__config.get_init_mode() == "RANDOM":
+            if isinstance(ckt, FileBasedCircuit):
+                self.__bind_genome(ckt, index - 1)
+                ckt.set_compile_cache(self.__compile_cache)
+                ckt.set_attribute_store(self.__attribute_store)
+            if init_mode == "RANDOM":
                 ckt.randomize_bitstream()
-            elif self.__config.get_init_mode() == "CLONE_SEED_MUTATE":
+            elif init_mode == "CLONE_SEED_MUTATE":
                 # Call mutate once on this circuit
                 ckt.mutate()
-            elif self.__config.get_init_mode() == "EXISTING_POPULATION":
+            elif init_mode == "EXISTING_POPULATION":
                 # Make sure the circuit puts a line at the top of its .asc file denoting the source population
                 ckt.set_file_attribute('src_population', str(subdirectory_index))
 
             self._circuits.add(ckt)
             self.__logger.event(3, "Created circuit: {0}".format(ckt))
 
+        # Steady state offspring are bred into these circuits, one per device,
+        # and only join the population once they have been evaluated
+        self.__nursery = []
+        for index in range(self.__config.get_population_size() + 1, self.__genome_size() + 1):
+            ckt = self.__construct_circuit(index, "offspring" + str(index - self.__config.get_population_size()), template, sine_funcs)
+            self.__bind_genome(ckt, index - 1)
+            ckt.set_compile_cache(self.__compile_cache)
+            ckt.set_attribute_store(self.__attribute_store)
+            self.__nursery.append(ckt)
+
         # If map-elites selection method selected, then randomly generate until we fill up 25% of the map
 
         # if self.__config.get_selection_type() == 'MAP_ELITES':
@@ -367,7 +461,11 @@ class CircuitPopulation:
 
         # Randomize initial circuits until waveform variance or
         # pulses are found
-        if self.__config.get_simulation_mode() not in ["FULLY_INTRINSIC", "REMOTE"]:
+        if checkpoint is not None:
+            self.__restore_checkpoint(checkpoint)
+            self.__attribute_store.flush(self.get_current_epoch())
+            return
+        elif self.__config.get_simulation_mode() not in ["FULLY_INTRINSIC", "REMOTE"]:
             pass # No randomization implemented for simulation mode
         elif self.__config.get_randomization_type() == "PULSE":
             self.__logger.info("PULSE randomization mode selected.")
@@ -385,9 +483,68 @@ class CircuitPopulation:
         else:
             self.__logger.error(RANDOMIZE_UNTIL_NOT_SET_ERR_MSG)
 
+        self.__attribute_store.flush(self.get_current_epoch())
+
         # Output the first data point to live data files
         self.__write_to_livedata()
 
+    def __compile_circuits(self, circuits=None):
+        """
+        Compiles every file based circuit whose hardware has changed since it was last compiled,
+        compile_workers at a time. Uploading then reuses the compiled bitstreams.
+
+        Parameters
+        ----------
+        circuits : list[Circuit] | None
+            The circuits to compile, defaults to the whole population
+        """
+        if circuits is None:
+            circuits = self._circuits
+        stale = [c for c in circuits if isinstance(c, FileBasedCircuit) and c.is_bitstream_stale()]
+        if not stale:
+            return
+
+        workers = min(self.__config.get_compile_workers(), len(stale))
+        self.__logger.event(2, f"Compiling {len(stale)} circuits with {workers} workers")
+        if workers <= 1:
+            for circuit in stale:
+                circuit.compile_if_stale()
+            return
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            # list() re-raises any exception from the workers
+            list(pool.map(FileBasedCircuit.compile_if_stale, stale))
+
+    def __genome_size(self) -> int:
+        """
+        Returns the number of circuits held in the genome: the population, plus one
+        nursery circuit per device in steady state evolution
+        """
+        if self.__config.get_evolution_mode() == "STEADY_STATE":
+            return self.__config.get_population_size() + len(self._client.getSerials())
+        return self.__config.get_population_size()
+
+    def __bind_genome(self, circuit: FileBasedCircuit, row: int):
+        """
+        Moves the modifiable bits of a newly constructed circuit into the population genome,
+        creating the genome from the first circuit's layout.
+
+        Parameters
+        ----------
+        circuit : FileBasedCircuit
+            The circuit to bind
+        row : int
+            The genome row for this circuit
+        """
+        index = circuit.get_genome_index()
+        if self._genome is None:
+            self._genome = PopulationGenome.for_index(self.__genome_size(), index)
+        if len(index) != self._genome.length:
+            # Circuits loaded from a different template keep working directly on their hardware file
+            self.__logger.event(2, f"{circuit} does not match the population layout, not binding it to the genome")
+            return
+        circuit.bind_genome(self._genome, row)
+
     def __randomize_until_pulses(self):
         """
         Randomizes population until minimum number of pulses is found.
@@ -405,6 +562,7 @@ class CircuitPopulation:
                 else:
                     circuit.mutate()
 
+            self.__compile_circuits()
             for circuit in self._circuits:
                 circuit.evaluate_once()
 
@@ -461,6 +619,8 @@ class CircuitPopulation:
                 circuit.clear_data()
                 circuit.randomize_bitstream()
 
+            self.__compile_circuits()
+
             # Phase 2: Queue all evaluations (batched across devices)
             for circuit in self._circuits:
                 circuit.evaluate_once()
@@ -530,22 +690,42 @@ class CircuitPopulation:
                 1, "Attempting to evolve with empty population. Exiting...")
             exit()
 
-        # Set initial values for 'best' data
-        self.__overall_best_circuit_info = CircuitInfo(
-            str(self._circuits[0]),
-            self._circuits[0].get_fitness()
-        )
-        self.__best_epoch = 0
-        self.__next_epoch()
+        # Set initial values for 'best' data, unless they were restored from a checkpoint
+        if not self.__resumed:
+            self.__overall_best_circuit_info = CircuitInfo(
+                str(self._circuits[0]),
+                self._circuits[0].get_fitness()
+            )
+            self.__best_epoch = 0
+            self.__next_epoch()
 
-        if self.__speedtest:
+        if self.__speedtest and not self.__resumed:
             send_wf = self.__config.get_icefarm_send_waveform() if self.__config.get_simulation_mode() == "REMOTE" else False
             with open("workspace/speedtest.csv", "w") as f:
                 f.write(f"# send_waveform={send_wf}, population={self.__config.get_population_size()}, devices={self.__config.get_icefarm_device_count() if self.__config.get_simulation_mode() == 'REMOTE' else 'local'}\n")
-                f.write("generation,epoch_time_s,best_fitness,avg_fitness\n")
+                f.write("generation,epoch_time_s,best_fitness,avg_fitness,cache_hits,cache_misses,measured,reused\n")
+
+        match self.__config.get_evolution_mode():
+            case "STEADY_STATE":
+                self.__evolve_steady_state()
+            case "PIPELINED":
+                self.__evolve_pipelined()
+            case "ISLAND":
+                self.__evolve_islands()
+            case _:
+                self.__evolve_generational()
 
-        extra_devices_reserved = 0
+        # We have finished evolution! Lets quickly re-evaluate the top circuit, since it
+        # will then output its waveform
+        if not is_pulse_func(self.__config):
+            self.__eval_circuit_once(self._circuits[0])
+        # Also, log the name of the top circuit
+        self.__logger.event(1, "Top Circuit in Final Generation:", self._circuits[0])
 
+    def __evolve_generational(self):
+        """
+        Evaluates the whole population each generation, then runs selection on it.
+        """
         while(self.__should_continue_evo()): #self.get_current_epoch() < self.__config.get_n_generations()):
 
             #self.__logger.event(3, "Starting evo cycle", self.get_current_epoch(
@@ -556,21 +736,7 @@ class CircuitPopulation:
             # Circuits to a new list after we evaluate them and then
             # make the new list the working Circuit list.
 
-            diff = self.__config.get_icefarm_device_count() - len(self._client.getSerials())
-            if diff:
-                self.__logger.warning(f"Operating on low devices, devices remaining: {self._client.getSerials()}")
-                if self.__config.get_icefarm_reserve_on_device_failure() is True or self.__config.get_icefarm_reserve_on_device_failure() > extra_devices_reserved:
-                    available_devices = self._client.available()
-                    if available_devices:
-                        additional_devices = self._client.reserve(min(available_devices, diff), flush_interval_seconds=self.__config.get_icefarm_results_flush_interval_seconds(), flush_at_bitstreams_remaining=self.__config.get_icefarm_buffer_batch_amount() * self.__config.get_icefarm_client_batch_amount_circuits() - 1)
-                        extra_devices_reserved += len(additional_devices)
-                        self.__logger.info(f"Reserved additional devices: {additional_devices}")
-
-            if len(self._client.getSerials()) <= self.__config.get_icefarm_exit_at_devices_remaining():
-                self.__logger.critical("Reached critical level of devices, ending experiment.")
-                self._client.endAll()
-                raise Exception("Reached exit_at_devices_remaining")
-
+            self.__maintain_devices()
 
             reevaulated_circuits = SortedKeyList(
                 key=lambda ckt: -ckt.get_fitness()
@@ -582,24 +748,64 @@ class CircuitPopulation:
             for circuit in self._circuits:
                 circuit.clear_data()
 
-            for _ in range(self.__config.get_num_passes()):
-                for circuit in self._circuits:
-                    if isinstance(circuit, FileBasedCircuit):
-                        circuit.upload()
-
-                    # TODO imo we can remove this now that we're using picos since the
-                    # upload happens essentially instantly compared to the evaluation time
-                    for i in range(self.__config.get_num_samples()):
-                        circuit.collect_data_once()
+            # Offspring predicted to be unfit are estimated, and circuits whose remembered fitness
+            # is reused are not measured
+            to_measure = list(self._circuits)
+            estimated = set()
+            if self.__prescreen is not None:
+                offspring = [
+                    c for c in to_measure
+                    if c not in self.__run_selection.protected
+                    and (self.__fitness_memo is None or not self.__fitness_memo.remembers(c))
+                ]
+                estimated = self.__prescreen.screen(offspring)
+                to_measure = [c for c in to_measure if c not in estimated]
+                self.__logger.event(2, f"Estimated the fitness of {len(estimated)} of {len(offspring)} offspring")
+            # The circuits whose fitness is measured or remembered
+            evaluated = list(to_measure)
+            if self.__fitness_memo is not None:
+                to_measure = self.__fitness_memo.plan(evaluated, self.get_current_epoch())
+                self.__logger.event(2, f"Measuring {len(to_measure)} of {len(self._circuits)} circuits")
+
+            # Identical genomes are compiled and measured once, then share the result
+            copies = {}
+            if self.__config.get_deduplicate_genomes() and self.__config.get_simulation_mode() != "FULLY_SIM":
+                to_measure, copies = self.__group_duplicates(to_measure)
+            self.__measured_count = len(to_measure)
+
+            self.__compile_circuits(to_measure)
 
             try:
-                for circuit in self._circuits:
-                    circuit.calculate_fitness()
+                if self.__config.get_racing():
+                    shared = set(c for group in copies.values() for c in group)
+                    self.__race_circuits(to_measure, [c for c in self._circuits if c not in shared])
+                else:
+                    for _ in range(self.__config.get_num_passes()):
+                        self.__measure_pass(to_measure)
+                    for _ in self.__stream_fitness(to_measure):
+                        pass
+                for circuit in to_measure:
                     self.__logger.info(f"{circuit} pulses: {circuit._data}")
+                for representative, group in copies.items():
+                    for circuit in group:
+                        circuit.restore_fitness(representative.get_fitness(), representative._data)
             except DeviceTimeoutException:
                 self.__logger.error("Device failed during evaluation stage. Restarting epoch.")
                 continue
 
+            if self.__fitness_memo is not None:
+                self.__fitness_memo.record(evaluated, to_measure, self.get_current_epoch())
+            if self.__prescreen is not None:
+                self.__prescreen.observe(to_measure)
+            if self.__surrogate is not None and to_measure:
+                self.__surrogate.observe(
+                    bitstream_matrix(to_measure),
+                    np.array([c.get_fitness() for c in to_measure], dtype=np.float64),
+                    np.array([is_dead(c) for c in to_measure])
+                )
+                if self.__surrogate.metrics:
+                    self.__logger.event(2, "Surrogate prediction quality:", self.__surrogate.metrics)
+
             self.__population_bistream_sum = np.zeros(self.__population_bistream_sum.size)
             for circuit in self._circuits:
                 # If evaluate returns true, then a circuit has surpassed
@@ -620,61 +826,19 @@ class CircuitPopulation:
                     return'''
                 reevaulated_circuits.add(circuit)
 
-                #add the circuit's bistream to our population sum - for diversity calculation and visualization
-                if self.__config.get_simulation_mode() != 'FULLY_SIM':
-                    self.__population_bistream_sum += circuit.get_bitstream()
+            #add the circuits' bistreams to our population sum - for diversity calculation and visualization
+            if self.__config.get_simulation_mode() != 'FULLY_SIM':
+                self.__population_bistream_sum += bitstream_matrix(list(self._circuits)).sum(axis=0)
+
+            self.__attribute_store.flush(self.get_current_epoch())
 
             epoch_time = time() - start
             self._circuits = reevaulated_circuits
 
-            if self.__speedtest:
-                fitness_sum = sum(c.get_fitness() for c in self._circuits)
-                avg_fitness = fitness_sum / len(self._circuits)
-                with open("workspace/speedtest.csv", "a") as f:
-                    f.write(f"{self.get_current_epoch()},{epoch_time:.4f},{self._circuits[0].get_fitness():.6f},{avg_fitness:.6f}\n")
-
-            # If one of the new Circuits has a higher fitness than our
-            # recorded best, make it the recorded best.
-            best_circuit_info = self.get_overall_best_circuit_info()
-            self.__logger.event(2, "Best circuit info", best_circuit_info.fitness)
-            self.__logger.event(2, "Circuit 0 info",
-                             self._circuits[0].get_fitness())
-
-            if self._circuits[0].get_fitness() > best_circuit_info.fitness:
-                self.__overall_best_circuit_info = CircuitInfo(
-                    str(self._circuits[0]),
-                    self._circuits[0].get_fitness()
-                )
-                self.__best_epoch = self.get_current_epoch()
-                # Copy this circuit to the best file
-                if isinstance(self._circuits[0], FileBasedCircuit):
-                    copyfile(self._circuits[0].get_hardware_file_path(), self.__config.get_best_file())
+            self.__write_speedtest(epoch_time)
+            self.__write_telemetry()
 
-                # For tone discriminator experiments, update the best waveform and best state data
-                # Each file will contain all sampled data points from the new best circuit
-                if (self.__config.get_fitness_func() == "TONE_DISCRIMINATOR"):
-                    with open("workspace/bestwaveformlivedata.log", "w+") as waveLive:
-                        waveLive.write("NEW BEST BELOW: " + str(self._circuits[0]) + " in gen " + str(self.get_current_epoch()) + "\n")
-                        i = 1
-                        for points in self._circuits[0].get_waveform_td():
-                            waveLive.write(str(i) + ", " + str(points) + "\n")
-                            i += 1
-                    with open("workspace/beststatelivedata.log", "w+") as stateLive:
-                        stateLive.write("NEW BEST BELOW: " + str(self._circuits[0]) + " in gen " + str(self.get_current_epoch()) + "\n")
-                        i = 1
-                        for points in self._circuits[0].get_state_td():
-                            stateLive.write(str(i) + ", " + str(points) + "\n")
-                            i += 1
-
-                self.__logger.event(2, "New best found")
-
-            # Write waveform data for variance experiments (used by live waveform plot)
-            # Written every generation so the plot always shows the current best's waveform
-            waveform = self._circuits[0].get_waveform()
-            if waveform and self.__config.get_fitness_func() == "VARIANCE":
-                with open("workspace/waveformlivedata.log", "w+") as waveLive:
-                    for i, point in enumerate(waveform, 1):
-                        waveLive.write(f"{i}, {point}\n")
+            self.__record_best()
 
             self.__logger.log_generation(self, epoch_time)
             # The circuits that are protected from randomization
@@ -684,6 +848,7 @@ class CircuitPopulation:
 
             self.__write_to_livedata()
             self.__next_epoch()
+            self.__save_checkpoint()
 
             if self.__config.using_transfer_interval():
                 if self.__current_epoch % self.__config.get_transfer_interval() == 0:
@@ -691,13 +856,789 @@ class CircuitPopulation:
                     # self.__microcontroller.switch_fpga()
                     # TODO
 
+    def __measure_pass(self, circuits):
+        """
+        Queues one pass of measurements (num_samples samples) of each circuit
+        """
+        for circuit in circuits:
+            if isinstance(circuit, FileBasedCircuit):
+                circuit.upload()
 
-        # We have finished evolution! Lets quickly re-evaluate the top circuit, since it
-        # will then output its waveform
-        if not is_pulse_func(self.__config):
-            self.__eval_circuit_once(self._circuits[0])
-        # Also, log the name of the top circuit
-        self.__logger.event(1, "Top Circuit in Final Generation:", self._circuits[0])
+            # TODO imo we can remove this now that we're using picos since the
+            # upload happens essentially instantly compared to the evaluation time
+            for i in range(self.__config.get_num_samples()):
+                circuit.collect_data_once()
+
+    def __stream_fitness(self, circuits):
+        """
+        Calculates the fitness of circuits whose measurements were queued by __measure_pass(),
+        yielding each one as soon as its fitness is known. In REMOTE mode the circuits come in the
+        order their results arrive from iCEFARM, so fitness is calculated while the rest are still
+        being evaluated.
+        """
+        if self._evo_client is not None:
+            circuits = self._evo_client.stream(circuits)
+        for circuit in circuits:
+            circuit.calculate_fitness()
+            yield circuit
+
+    def __group_duplicates(self, circuits):
+        """
+        Groups circuits with identical genomes by their Zobrist hash
+
+        Returns
+        -------
+        tuple[list[Circuit], dict[Circuit, list[Circuit]]]
+            The first circuit of each genome, and the other circuits with the same genome by that circuit
+        """
+        representatives = {}
+        copies = {}
+        for circuit, genome_hash in zip(circuits, genome_hashes(circuits)):
+            representative = representatives.setdefault(genome_hash, circuit)
+            if representative is not circuit:
+                copies.setdefault(representative, []).append(circuit)
+        if copies:
+            self.__logger.event(2, f"Measuring {len(representatives)} distinct genomes of {len(circuits)} circuits")
+        return list(representatives.values()), copies
+
+    def __race_circuits(self, to_measure, population):
+        """
+        Measures every circuit for racing_initial_passes passes, then keeps measuring the circuits whose
+        confidence interval contains the elite cutoff, one pass at a time, until none do or they reach
+        num_passes passes. The fitness of each circuit is its mean over its passes. The elite cutoff is
+        taken over population, the circuits with a fitness of their own.
+        """
+        n_elites = int(math.ceil(self.__config.get_elitism_fraction() * len(self._circuits)))
+        self.__race = Race(n_elites, self.__config.get_num_passes())
+        initial_passes = self.__config.get_racing_initial_passes()
+
+        contenders = list(to_measure)
+        while contenders:
+            for circuit in contenders:
+                circuit.clear_data()
+            self.__measure_pass(contenders)
+            for circuit in self.__stream_fitness(contenders):
+                self.__race.add(circuit)
+
+            if self.__race.passes(contenders[0]) < initial_passes:
+                contenders = list(to_measure)
+            else:
+                contenders = self.__race.contenders(population)
+                if contenders:
+                    self.__logger.event(3, f"Racing {len(contenders)} circuits near the elite cutoff")
+        self.__race.finish()
+
+        passes = [self.__race.passes(c) for c in to_measure]
+        self.__logger.event(2, f"Raced {len(to_measure)} circuits for {sum(passes)} passes (at most {self.__config.get_num_passes() * len(to_measure)})")
+
+    def __evolve_pipelined(self):
+        """
+        Generational evolution that overlaps the host's work with remote evaluation. Circuits are
+        compiled and sent to the devices one chunk at a time, so the first chunk is evaluated while
+        the rest compile, and each circuit's fitness is calculated as soon as it returns.
+        Once speculation_fraction of the circuits have returned, selection runs speculatively with
+        the late circuits assumed to be the least fit, and the returned offspring are compiled while
+        the devices finish. If the late circuits change the elites, the speculative selection is
+        undone and selection runs again on the real fitness values.
+        """
+        evaluations = self.__config.get_num_passes() * self.__config.get_num_samples()
+        speculation_fraction = self.__config.get_speculation_fraction()
+        can_speculate = (
+            speculation_fraction < 1
+            and self.__config.get_selection_type() in SPECULATIVE_SELECTIONS
+            and self.__config.get_mutation_type() in SPECULATIVE_MUTATIONS
+        )
+
+        while self.__should_continue_evo():
+            self.__maintain_devices()
+            start = time()
+
+            for circuit in self._circuits:
+                circuit.clear_data()
+
+            # Circuits whose remembered fitness is reused are not measured
+            to_measure = list(self._circuits)
+            if self.__fitness_memo is not None:
+                to_measure = self.__fitness_memo.plan(to_measure, self.get_current_epoch())
+                self.__logger.event(2, f"Measuring {len(to_measure)} of {len(self._circuits)} circuits")
+
+            # One batch per device, so the devices start on the first chunk while the rest compile
+            chunk_size = len(self._evo_client.serials()) * self.__config.get_icefarm_client_batch_amount_circuits()
+            for i in range(0, len(to_measure), chunk_size):
+                chunk = to_measure[i:i + chunk_size]
+                self.__compile_circuits(chunk)
+                self._evo_client.submit(chunk, evaluations)
+
+            late = set(to_measure)
+            speculation = None
+            failed = False
+            while late:
+                circuit, _ = self._evo_client.next_completed()
+                late.discard(circuit)
+                try:
+                    circuit.calculate_fitness()
+                except DeviceTimeoutException:
+                    failed = True
+                    continue
+                self.__logger.info(f"{circuit} pulses: {circuit._data}")
+
+                if speculation is not None:
+                    # Its offspring could not be compiled while it was still being evaluated
+                    circuit.compile_if_stale()
+                elif can_speculate and not failed and late and len(late) <= (1 - speculation_fraction) * len(to_measure):
+                    speculation = self.__speculate(late)
+
+            if failed:
+                if speculation is not None:
+                    self.__undo_speculation(speculation)
+                self.__logger.error("Device failed during evaluation stage. Restarting epoch.")
+                continue
+
+            if self.__fitness_memo is not None:
+                self.__fitness_memo.record(list(self._circuits), to_measure, self.get_current_epoch())
+
+            if speculation is not None and not self.__speculation_holds(speculation):
+                self.__logger.info("Late circuits changed the elites, undoing speculative selection")
+                self.__undo_speculation(speculation)
+                speculation = None
+
+            for circuit in self._circuits:
+                circuit.set_file_attribute("fitness", str(circuit.get_fitness()))
+                if self.__config.is_pulse_count():
+                    circuit.set_file_attribute("pulse_count", str(circuit.get_extra_data('pulses')))
+
+            # The bitstream sum is taken over the population before selection
+            self.__population_bistream_sum = np.zeros(self.__population_bistream_sum.size)
+            if speculation is not None:
+                self.__population_bistream_sum += np.sum(list(speculation.bitstreams.values()), axis=0)
+            else:
+                self.__population_bistream_sum += bitstream_matrix(list(self._circuits)).sum(axis=0)
+
+            self.__attribute_store.flush(self.get_current_epoch())
+
+            epoch_time = time() - start
+            self._circuits = SortedKeyList(self._circuits, key=lambda ckt: -1 * ckt.get_fitness())
+
+            self.__write_speedtest(epoch_time)
+            self.__write_telemetry()
+            self.__record_best()
+            self.__logger.log_generation(self, epoch_time)
+
+            if speculation is None:
+                new_circuits = self.__run_selection(self._circuits)
+                self._circuits = SortedKeyList(new_circuits, key=lambda ckt: -1 * ckt.get_fitness())
+            else:
+                self.__logger.event(2, "Keeping speculative selection")
+
+            self.__write_to_livedata()
+            self.__next_epoch()
+            self.__save_checkpoint()
+
+    def __speculate(self, late) -> Speculation:
+        """
+        Runs selection before every circuit has returned, with the late circuits ranked below every
+        returned circuit, then compiles the returned offspring.
+
+        Parameters
+        ----------
+        late : set[Circuit]
+            The circuits that are still being evaluated. Their hardware files stay untouched until they return.
+
+        Returns
+        -------
+        Speculation
+            What is needed to check and undo the selection once the late circuits return
+        """
+        self.__logger.event(2, f"Running selection speculatively, {len(late)} circuits have not returned")
+        speculation = Speculation(
+            bitstreams={c: c.get_bitstream() for c in self._circuits},
+            src_populations={c: c.get_file_attribute("src_population") for c in self._circuits},
+            rand_state=self.__rand.bit_generator.state,
+            selection_state=self.__run_selection.get_state(),
+            elites={}
+        )
+        for circuit in late:
+            circuit.restore_fitness(-math.inf, [])
+
+        self.__run_selection(list(self._circuits))
+        speculation.elites.update((c, c.get_fitness()) for c in self.__run_selection.protected)
+        self.__compile_circuits([c for c in self._circuits if c not in late])
+        return speculation
+
+    def __speculation_holds(self, speculation: Speculation) -> bool:
+        """
+        Returns whether a speculative selection picked the same elites that selection would pick now that
+        every circuit has returned. Fitness proportional selection also needs their fitness to be unchanged.
+        """
+        ranked = sorted(self._circuits, key=lambda c: c.get_fitness(), reverse=True)
+        if set(ranked[:len(speculation.elites)]) != set(speculation.elites):
+            return False
+        if self.__config.get_selection_type() == "FIT_PROP_SEL":
+            return all(c.get_fitness() == fitness for c, fitness in speculation.elites.items())
+        return True
+
+    def __undo_speculation(self, speculation: Speculation):
+        """
+        Restores the population, random number generator and selection state from before a speculative selection
+        """
+        for circuit, bits in speculation.bitstreams.items():
+            if not np.array_equal(circuit.get_bitstream(), bits):
+                circuit.set_bitstream(bits)
+            src_pop = speculation.src_populations[circuit]
+            if src_pop is not None:
+                circuit.set_file_attribute("src_population", src_pop)
+        self.__rand.bit_generator.state = speculation.rand_state
+        self.__run_selection.set_state(speculation.selection_state)
+
+    def __evolve_islands(self):
+        """
+        Splits the population into islands, each evaluated on its own subset of the devices. Whenever every
+        circuit of an island has returned, that island runs its own selection and is sent off again, without
+        waiting for the other islands. Every migration_interval generations, an island sends copies of its best
+        circuits to its neighbors, which take them in before their next selection. A generation of the whole
+        population is logged each time the slowest island finishes a generation.
+        """
+        evaluations = self.__config.get_num_passes() * self.__config.get_num_samples()
+        count = self.__config.get_island_count()
+        migration_interval = self.__config.get_migration_interval()
+        migration_size = self.__config.get_migration_size()
+        destinations = migration_destinations(self.__config.get_migration_topology(), count)
+
+        circuits = list(self._circuits)
+        by_name = {str(c): c for c in circuits}
+        if self.__island_state is not None and len(self.__island_state) != count:
+            self.__logger.warning("The checkpoint was saved with a different island count, starting new islands")
+            self.__island_state = None
+        for i in range(count):
+            if self.__island_state is not None:
+                island_state = self.__island_state[i]
+                island_circuits = [by_name[name] for name in island_state["circuits"]]
+            else:
+                island_circuits = circuits[i * len(circuits) // count:(i + 1) * len(circuits) // count]
+                # The src_population attribute tracks which island each circuit's lineage started on
+                for circuit in island_circuits:
+                    circuit.set_file_attribute("src_population", str(i))
+            memo = None
+            if self.__fitness_memo is not None:
+                memo = FitnessMemo(reevaluation_policy_fac(self.__config), self.__config.get_fitness_memo_entries())
+            selection = selection_fac(self, self.__config, self.__logger, self.__rand, len(island_circuits))
+            island = Island(i, island_circuits, selection, memo)
+            if self.__island_state is not None:
+                island.generation = island_state["generation"]
+                selection.set_state(island_state["selection_state"])
+                if memo is not None:
+                    memo.set_state(island_state["memo"])
+            self.__islands.append(island)
+        self.__multiple_populations = True
+        self.__num_subpops = count
+
+        island_of = {c: island for island in self.__islands for c in island.circuits}
+        # Islands whose circuits have all returned (or that had nothing to measure)
+        ready = []
+        start = time()
+
+        def start_island(island):
+            if not self.__start_island(island, evaluations):
+                ready.append(island)
+
+        for island in self.__islands:
+            start_island(island)
+
+        while ready or any(island.late for island in self.__islands):
+            if ready:
+                island = ready.pop(0)
+            else:
+                circuit, _ = self._evo_client.next_completed()
+                island = island_of[circuit]
+                island.late.discard(circuit)
+                # Circuits keep their last data while they are evaluated, since the other islands may log a generation meanwhile
+                previous = circuit.get_fitness(), list(circuit._data)
+                circuit.clear_data()
+                try:
+                    circuit.calculate_fitness()
+                    self.__logger.info(f"{circuit} pulses: {circuit._data}")
+                except DeviceTimeoutException:
+                    island.failed = True
+                    circuit.restore_fitness(*previous)
+                if island.late:
+                    continue
+
+            if island.failed:
+                self.__logger.error(f"Device failed while evaluating {island}. Restarting its generation.")
+                self.__maintain_devices()
+                start_island(island)
+                continue
+
+            if island.memo is not None:
+                island.memo.record(island.circuits, island.to_measure, island.generation)
+            for c in island.circuits:
+                c.set_file_attribute("fitness", str(c.get_fitness()))
+                if self.__config.is_pulse_count():
+                    c.set_file_attribute("pulse_count", str(c.get_extra_data('pulses')))
+
+            slowest = min(i.generation for i in self.__islands)
+            island.generation += 1
+            self.__logger.event(2, f"{island} finished generation {island.generation}")
+
+            if island.generation % migration_interval == 0 and migration_size > 0:
+                emigrants = island.emigrants(migration_size)
+                for destination in destinations[island.index]:
+                    self.__logger.event(3, f"Migrating {len(emigrants)} circuits from {island} to {self.__islands[destination]}")
+                    self.__islands[destination].inbox.extend(emigrants)
+            for c in island.immigrate():
+                self.__logger.event(3, f"{c} of {island} replaced by a migrant")
+
+            generation_ended = min(i.generation for i in self.__islands) > slowest
+            if generation_ended:
+                # Every island is past this generation, log it like a generation of the whole population
+                self._circuits = SortedKeyList(island_of.keys(), key=lambda ckt: -1 * ckt.get_fitness())
+                if self.__config.get_simulation_mode() != 'FULLY_SIM':
+                    self.__population_bistream_sum = np.zeros(self.__population_bistream_sum.size)
+                    self.__population_bistream_sum += bitstream_matrix(list(self._circuits)).sum(axis=0)
+                self.__attribute_store.flush(self.get_current_epoch())
+                epoch_time = time() - start
+                self.__write_speedtest(epoch_time)
+                self.__write_telemetry()
+                self.__record_best()
+                self.__logger.log_generation(self, epoch_time)
+                self.__write_to_livedata()
+                self.__next_epoch()
+                self.__maintain_devices()
+                start = time()
+
+            island.circuits = island.selection(island.circuits)
+            if generation_ended:
+                self.__save_checkpoint()
+
+            # Islands ahead of the others stop at the last generation instead of running on
+            last_generation = self.__config.using_n_generations() and island.generation + 1 >= self.__config.get_n_generations()
+            if self.__should_continue_evo() and not last_generation:
+                start_island(island)
+
+        self._circuits = SortedKeyList(island_of.keys(), key=lambda ckt: -1 * ckt.get_fitness())
+
+    def __start_island(self, island: Island, evaluations: int) -> bool:
+        """
+        Compiles an island's circuits and sends the ones it needs measured to its devices
+
+        Returns
+        -------
+        bool
+            False if the island had nothing to measure
+        """
+        self.__assign_island_serials()
+        island.to_measure = list(island.circuits)
+        if island.memo is not None:
+            island.to_measure = island.memo.plan(island.to_measure, island.generation)
+            self.__logger.event(2, f"Measuring {len(island.to_measure)} of {len(island.circuits)} circuits of {island}")
+        island.late = set(island.to_measure)
+        island.failed = False
+        if not island.to_measure:
+            return False
+        self.__compile_circuits(island.to_measure)
+        self._evo_client.submit(island.to_measure, evaluations, island.serials)
+        return True
+
+    def __assign_island_serials(self):
+        """
+        Divides the reserved devices among the islands: failed devices are dropped, replacements go to
+        the islands with the fewest devices, and an island left without devices borrows one.
+        """
+        serials = self._evo_client.serials()
+        for island in self.__islands:
+            island.serials = [s for s in island.serials if s in serials]
+        assigned = {s for island in self.__islands for s in island.serials}
+        for serial in serials:
+            if serial not in assigned:
+                min(self.__islands, key=lambda i: len(i.serials)).serials.append(serial)
+        for island in self.__islands:
+            if not island.serials:
+                donor = max(self.__islands, key=lambda i: len(i.serials))
+                if len(donor.serials) > 1:
+                    island.serials.append(donor.serials.pop())
+                else:
+                    # Fewer devices than islands, share one
+                    island.serials.append(donor.serials[0])
+
+    def __evolve_steady_state(self):
+        """
+        Evolves without a generational barrier: every reserved device is kept busy evaluating one circuit.
+        The initial population is evaluated first; afterwards, whenever a device returns a result, a new
+        offspring is bred from tournament winners into a free nursery circuit and sent to that device.
+        A returned offspring replaces the loser of a tournament among the population if it is at least as fit.
+        Every population_size returned offspring make up one "virtual generation", which is logged like
+        a generation of generational evolution.
+        """
+        evaluations = self.__config.get_num_passes() * self.__config.get_num_samples()
+        # Population circuits that still need their first evaluation (restored circuits already have a fitness)
+        pending = [] if self.__resumed else list(self._circuits)
+        unevaluated = set(pending)
+        free = list(self.__nursery)
+        in_flight = {}
+        idle_serials = []
+        births = 0
+        start = time()
+
+        def next_circuit():
+            if pending:
+                return pending.pop(0)
+            if unevaluated or not free:
+                # Offspring can only be bred once every parent candidate has a fitness
+                return None
+            child = free.pop()
+            self.__breed(child)
+            return child
+
+        def fill_idle_serials():
+            # Devices reserved to replace failed ones join in as they appear
+            idle_serials.extend(s for s in self._evo_client.serials() if s not in in_flight and s not in idle_serials)
+            while idle_serials and self.__should_continue_evo():
+                serial = idle_serials[0]
+                if serial not in self._evo_client.serials():
+                    idle_serials.pop(0)
+                    continue
+                circuit = next_circuit()
+                if circuit is None:
+                    return
+                idle_serials.pop(0)
+                circuit.clear_data()
+                circuit.compile_if_stale()
+                self._evo_client.dispatch(circuit, serial, evaluations)
+                in_flight[serial] = circuit
+
+        fill_idle_serials()
+        while in_flight:
+            circuit, serial = self._evo_client.next_completed()
+            del in_flight[serial]
+            idle_serials.append(serial)
+
+            try:
+                circuit.calculate_fitness()
+            except DeviceTimeoutException:
+                self.__logger.error(f"Device {serial} failed while evaluating {circuit}")
+                if circuit in unevaluated:
+                    pending.append(circuit)
+                else:
+                    free.append(circuit)
+                self.__maintain_devices()
+                fill_idle_serials()
+                continue
+
+            self.__logger.info(f"{circuit} pulses: {circuit._data}")
+            circuit.set_file_attribute("fitness", str(circuit.get_fitness()))
+            if self.__config.is_pulse_count():
+                circuit.set_file_attribute("pulse_count", str(circuit.get_extra_data('pulses')))
+
+            if circuit in unevaluated:
+                unevaluated.discard(circuit)
+                # The population is re-sorted once every circuit has a fitness
+                if not unevaluated:
+                    self._circuits = SortedKeyList(self._circuits, key=lambda ckt: -1 * ckt.get_fitness())
+                    self.__end_virtual_generation(time() - start)
+                    start = time()
+            else:
+                free.append(self.__replace(circuit))
+                births += 1
+                if births >= self.__config.get_population_size():
+                    births = 0
+                    self.__end_virtual_generation(time() - start)
+                    start = time()
+
+            fill_idle_serials()
+
+    def __breed(self, child: FileBasedCircuit):
+        """
+        Breeds a steady state offspring into a nursery circuit: copies a tournament winner,
+        crosses it with a second winner and mutates it.
+        """
+        parent = self.__tournament(max)
+        child.copy_from(parent)
+        mate = self.__tournament(max)
+        if mate is not parent:
+            self.__steady_crossover(mate, child)
+        child.mutate()
+
+    def __replace(self, child: FileBasedCircuit) -> FileBasedCircuit:
+        """
+        Puts an evaluated offspring into the population in place of the loser of a tournament,
+        if the offspring is at least as fit. The best circuit never loses.
+
+        Returns
+        -------
+        FileBasedCircuit
+            The circuit that is no longer part of the population, free to hold the next offspring
+        """
+        if len(self._circuits) == 1:
+            loser = self._circuits[0]
+        else:
+            loser = self.__tournament(min, exclude=self._circuits[0])
+        if child.get_fitness() < loser.get_fitness():
+            return child
+        self.__logger.event(3, "Replacing:", loser, " ---> ", child)
+        self._circuits.remove(loser)
+        self._circuits.add(child)
+        return loser
+
+    def __tournament(self, pick, exclude=None):
+        """
+        Runs a tournament of tournament_size circuits drawn from the population
+
+        Parameters
+        ----------
+        pick : callable
+            max for the fittest competitor, min for the least fit
+        exclude : Circuit | None
+            A circuit that may not compete
+        """
+        candidates = [c for c in self._circuits if c is not exclude]
+        size = min(self.__config.get_tournament_size(), len(candidates))
+        competitors = self.__rand.choice(len(candidates), size, replace=False)
+        return pick((candidates[i] for i in competitors), key=lambda c: c.get_fitness())
+
+    def __end_virtual_generation(self, epoch_time: float):
+        """
+        Logs a virtual generation of steady state evolution the same way generational evolution logs a generation
+        """
+        if self.__config.get_simulation_mode() != 'FULLY_SIM':
+            self.__population_bistream_sum = np.zeros(self.__population_bistream_sum.size)
+            self.__population_bistream_sum += bitstream_matrix(list(self._circuits)).sum(axis=0)
+        self.__attribute_store.flush(self.get_current_epoch())
+        self.__write_speedtest(epoch_time)
+        self.__write_telemetry()
+        self.__record_best()
+        self.__logger.log_generation(self, epoch_time)
+        self.__write_to_livedata()
+        self.__next_epoch()
+        self.__save_checkpoint()
+        self.__maintain_devices()
+
+    def __save_checkpoint(self):
+        """
+        Saves the state of the run every checkpoint_interval generations, so that it can be resumed
+        from the start of the current generation.
+        """
+        interval = self.__config.get_checkpoint_interval()
+        if interval == 0 or self.get_current_epoch() % interval != 0 or self.__config.get_simulation_mode() == "FULLY_SIM":
+            return
+
+        circuits = list(self._circuits)
+        state = {
+            "epoch": self.__current_epoch,
+            "best_epoch": self.__best_epoch,
+            "overall_best": list(self.__overall_best_circuit_info),
+            "rand_state": self.__rand.bit_generator.state,
+            "python_rand_state": random.getstate(),
+            "selection_state": self.__run_selection.get_state(),
+            "src_populations": {str(c): c.get_file_attribute("src_population") for c in circuits},
+            "num_subpops": self.__num_subpops if self.__multiple_populations else None,
+            "memo": self.__fitness_memo.get_state() if self.__fitness_memo is not None else None,
+            "islands": [
+                {
+                    "circuits": [str(c) for c in island.circuits],
+                    "generation": island.generation,
+                    "selection_state": island.selection.get_state(),
+                    "memo": island.memo.get_state() if island.memo is not None else None
+                }
+                for island in self.__islands
+            ] or None
+        }
+        checkpoint = Checkpoint(
+            [str(c) for c in circuits],
+            bitstream_matrix(circuits),
+            np.array([c.get_fitness() for c in circuits]),
+            [list(c._data) for c in circuits],
+            state
+        )
+        checkpoint.save(self.__config.get_checkpoint_file())
+        self.__logger.event(2, f"Saved checkpoint for generation {self.get_current_epoch()}")
+
+    def __restore_checkpoint(self, checkpoint: Checkpoint):
+        """
+        Restores the genomes, fitness, generation counters, random number generators, selection state
+        and fitness memo saved by __save_checkpoint()
+        """
+        # Steady state checkpoints may name nursery circuits that were swapped into the population,
+        # so they are restored into nursery circuits too, and the circuits left over form the nursery
+        available = list(self._circuits) + self.__nursery
+        circuits = checkpoint.match(available)
+        if circuits is None or len(checkpoint.names) != len(self._circuits):
+            self.__logger.error("The checkpoint does not match the population, check the population size. Exiting...")
+            exit()
+        self.__nursery = [c for c in available if c not in circuits.values()]
+
+        state = checkpoint.state
+        for name, bits, fitness, data in zip(checkpoint.names, checkpoint.bits, checkpoint.fitness, checkpoint.data):
+            circuit = circuits[name]
+            circuit.set_bitstream(bits)
+            circuit.restore_fitness(float(fitness), data)
+            src_pop = state["src_populations"].get(name)
+            if src_pop is not None:
+                circuit.set_file_attribute("src_population", src_pop)
+        self._circuits = SortedKeyList(circuits.values(), key=lambda ckt: -1 * ckt.get_fitness())
+
+        self.__current_epoch = state["epoch"]
+        self.__best_epoch = state["best_epoch"]
+        self.__overall_best_circuit_info = CircuitInfo(*state["overall_best"])
+        self.__rand.bit_generator.state = state["rand_state"]
+        version, internal_state, gauss = state["python_rand_state"]
+        random.setstate((version, tuple(internal_state), gauss))
+        self.__run_selection.set_state(state["selection_state"])
+        if state["num_subpops"] is not None:
+            self.__multiple_populations = True
+            self.__num_subpops = state["num_subpops"]
+        if self.__fitness_memo is not None and state["memo"] is not None:
+            self.__fitness_memo.set_state(state["memo"])
+        self.__island_state = state["islands"]
+        self.__resumed = True
+        self.__logger.info(f"Resumed from checkpoint at generation {self.get_current_epoch()}")
+
+    def __maintain_devices(self):
+        """
+        Reserves replacements for failed devices (if enabled) and ends the experiment
+        once too few devices remain.
+        """
+        diff = self.__config.get_icefarm_device_count() - len(self._client.getSerials())
+        if diff:
+            self.__logger.warning(f"Operating on low devices, devices remaining: {self._client.getSerials()}")
+            if self.__config.get_icefarm_reserve_on_device_failure() is True or self.__config.get_icefarm_reserve_on_device_failure() > self.__extra_devices_reserved:
+                available_devices = self._client.available()
+                if available_devices:
+                    additional_devices = self._client.reserve(min(available_devices, diff), flush_interval_seconds=self.__config.get_icefarm_results_flush_interval_seconds(), flush_at_bitstreams_remaining=self.__config.get_icefarm_buffer_batch_amount() * self.__config.get_icefarm_client_batch_amount_circuits() - 1)
+                    self.__extra_devices_reserved += len(additional_devices)
+                    self.__logger.info(f"Reserved additional devices: {additional_devices}")
+
+        if len(self._client.getSerials()) <= self.__config.get_icefarm_exit_at_devices_remaining():
+            self.__logger.critical("Reached critical level of devices, ending experiment.")
+            self._client.endAll()
+            raise Exception("Reached exit_at_devices_remaining")
+
+    def __write_speedtest(self, epoch_time: float):
+        """
+        Appends this generation's timing, fitness and cache statistics to workspace/speedtest.csv
+        """
+        if not self.__speedtest:
+            return
+        fitness_sum = sum(c.get_fitness() for c in self._circuits)
+        avg_fitness = fitness_sum / len(self._circuits)
+        cache_hits, cache_misses = 0, 0
+        if self.__compile_cache is not None:
+            cache_hits, cache_misses = self.__compile_cache.hits, self.__compile_cache.misses
+            self.__compile_cache.reset_counts()
+        measured, reused = len(self._circuits), 0
+        if self.__measured_count is not None:
+            measured, reused = self.__measured_count, len(self._circuits) - self.__measured_count
+        if self.__fitness_memo is not None:
+            # Islands remember the fitness of their own genomes
+            memos = [island.memo for island in self.__islands] or [self.__fitness_memo]
+            measured, reused = sum(memo.measured for memo in memos), sum(memo.reused for memo in memos)
+            for memo in memos:
+                memo.reset_counts()
+        with open("workspace/speedtest.csv", "a") as f:
+            f.write(f"{self.get_current_epoch()},{epoch_time:.4f},{self._circuits[0].get_fitness():.6f},{avg_fitness:.6f},{cache_hits},{cache_misses},{measured},{reused}\n")
+
+    def __write_telemetry(self):
+        """
+        Appends the timing of this generation's remote evaluations to workspace/telemetry.jsonl,
+        one JSON object per generation, and starts timing the next generation
+        """
+        if self._evo_client is None:
+            return
+        summary = self._evo_client.telemetry.summary(self._client.getSerials())
+        self._evo_client.telemetry.reset()
+        self.__check_device_health(summary)
+        summary["health"] = self._evo_client.health.scores()
+        with open("workspace/telemetry.jsonl", "a") as f:
+            f.write(json.dumps({"generation": self.get_current_epoch(), **summary}) + "\n")
+
+    def __check_device_health(self, summary: dict):
+        """
+        Scores the devices from this generation's telemetry and quarantines the degraded ones, if enabled
+        """
+        health = self._evo_client.health
+        health.observe_telemetry(summary)
+        quarantine = self.__config.get_icefarm_quarantine()
+        if quarantine == "NO":
+            return
+        scores = health.scores()
+        for serial in health.degraded(self._evo_client.serials()):
+            signals = ", ".join(f"{name} {value:.3g}" for name, value in scores[serial].items())
+            self.__logger.warning(f"Quarantining degraded device {serial} ({signals})")
+            self._evo_client.quarantine(serial)
+            if quarantine == "RELEASE":
+                self._client.end([serial])
+                self.__logger.info(f"Released device {serial}")
+
+    def __record_best(self):
+        """
+        Records the current best circuit if it beats the overall best, and writes the live waveform data
+        """
+        # If one of the new Circuits has a higher fitness than our
+        # recorded best, make it the recorded best.
+        best_circuit_info = self.get_overall_best_circuit_info()
+        self.__logger.event(2, "Best circuit info", best_circuit_info.fitness)
+        self.__logger.event(2, "Circuit 0 info",
+                         self._circuits[0].get_fitness())
+
+        if self._circuits[0].get_fitness() > best_circuit_info.fitness:
+            self.__overall_best_circuit_info = CircuitInfo(
+                str(self._circuits[0]),
+                self._circuits[0].get_fitness()
+            )
+            self.__best_epoch = self.get_current_epoch()
+            # Copy this circuit to the best file
+            if isinstance(self._circuits[0], FileBasedCircuit):
+                copyfile(self._circuits[0].get_hardware_file_path(), self.__config.get_best_file())
+
+            # For tone discriminator experiments, update the best waveform and best state data
+            # Each file will contain all sampled data points from the new best circuit
+            if (self.__config.get_fitness_func() == "TONE_DISCRIMINATOR"):
+                with open("workspace/bestwaveformlivedata.log", "w+") as waveLive:
+                    waveLive.write("NEW BEST BELOW: " + str(self._circuits[0]) + " in gen " + str(self.get_current_epoch()) + "\n")
+                    i = 1
+                    for points in self._circuits[0].get_waveform_td():
+                        waveLive.write(str(i) + ", " + str(points) + "\n")
+                        i += 1
+                with open("workspace/beststatelivedata.log", "w+") as stateLive:
+                    stateLive.write("NEW BEST BELOW: " + str(self._circuits[0]) + " in gen " + str(self.get_current_epoch()) + "\n")
+                    i = 1
+                    for points in self._circuits[0].get_state_td():
+                        stateLive.write(str(i) + ", " + str(points) + "\n")
+                        i += 1
+
+            self.__logger.event(2, "New best found")
+
+        if self.__waveform_store is not None:
+            self.__store_waveforms()
+            return
+        # Write waveform data for variance experiments (used by live waveform plot)
+        # Written every generation so the plot always shows the current best's waveform
+        waveform = self._circuits[0].get_waveform()
+        if waveform and self.__config.get_fitness_func() == "VARIANCE":
+            with open("workspace/waveformlivedata.log", "w+") as waveLive:
+                for i, point in enumerate(waveform, 1):
+                    waveLive.write(f"{i}, {point}\n")
+
+    def __store_waveforms(self):
+        """
+        Appends the waveforms measured this generation to the waveform store, and the current
+        best's last so that it is the newest waveform (read by the live waveform plot)
+        """
+        best = self._circuits[0]
+        for circuit in self._circuits:
+            samples = circuit.get_waveform_samples()
+            # Circuits whose fitness was reused keep the waveform stored when they were measured
+            if circuit is best or samples is None or self.__stored_waveforms.get(circuit.get_index()) is samples:
+                continue
+            self.__append_waveform(circuit, samples)
+        samples = best.get_waveform_samples()
+        if samples is not None:
+            self.__append_waveform(best, samples)
+        self.__waveform_store.flush()
+
+    def __append_waveform(self, circuit, samples):
+        self.__stored_waveforms[circuit.get_index()] = samples
+        if not self.__waveform_store.append(self.__current_epoch, circuit.get_index(), samples):
+            self.__logger.warning(f"Waveform of {circuit} is longer than the first one stored, only its start was stored")
 
     def __write_to_livedata(self):
         """
@@ -756,6 +1697,18 @@ class CircuitPopulation:
                             data.append(str(ckt.get_extra_data('pulses')))
                         live_file3.write(("{}:{}\n").format(self.__current_epoch, ",".join(data)))
 
+            if self.__surrogate is not None and self.__surrogate.metrics:
+                # How well the surrogate predicted this generation's measurements
+                with open("workspace/surrogatelivedata.log", "a") as live_file:
+                    metrics = self.__surrogate.metrics
+                    live_file.write("{}:{},{},{}\n".format(self.__current_epoch, metrics["rmse"], metrics["rank_correlation"], metrics["dead_accuracy"]))
+
+            if self.__race is not None:
+                # The number of passes each circuit was measured for, 0 if its fitness was reused
+                with open("workspace/sampleslivedata.log", "a") as live_file:
+                    counts = [str(self.__race.passes(ckt)) for ckt in self._circuits]
+                    live_file.write(("{}:{}\n").format(self.__current_epoch, ",".join(counts)))
+
             if self.__config.saving_population_bistream():
                 if(self.__current_epoch %
                     self.__config.get_population_bistream_save_interval() == 0):
@@ -389,6 +389,235 @@ class Config:
 			exit()
 		return value
 
+	def get_reevaluation_policy(self):
+		"""
+		Returns when circuits whose genome was measured before are measured again.
+
+		**ALWAYS**
+			Measure every circuit every generation
+		**EVERY_K_GENERATIONS**
+			Reuse the remembered fitness for reevaluation_interval generations after each measurement
+		**UNTIL_N_SAMPLES**
+			Measure again every generation until the genome has been measured reevaluation_samples times
+		**CONFIDENCE_INTERVAL**
+			Measure again until the 95% confidence interval of the mean fitness is narrower than
+			reevaluation_ci_width times the mean, or reevaluation_samples measurements were made
+		"""
+		try:
+			input = self.get_fitness_parameters("reevaluation_policy")
+		except NoOptionError:
+			return "ALWAYS"
+		valid_vals = ["ALWAYS", "EVERY_K_GENERATIONS", "UNTIL_N_SAMPLES", "CONFIDENCE_INTERVAL"]
+		self.check_valid_value("re-evaluation policy", input, valid_vals)
+		return input
+
+	def get_reevaluation_interval(self) -> int:
+		try:
+			value = int(self.get_fitness_parameters("reevaluation_interval"))
+		except NoOptionError:
+			return 5
+		if value < 1:
+			self.__logger.error("Invalid re-evaluation interval " + str(value) + "'. Must be greater than zero.")
+			exit()
+		return value
+
+	def get_reevaluation_samples(self) -> int:
+		try:
+			value = int(self.get_fitness_parameters("reevaluation_samples"))
+		except NoOptionError:
+			return 5
+		if value < 1:
+			self.__logger.error("Invalid re-evaluation samples " + str(value) + "'. Must be greater than zero.")
+			exit()
+		return value
+
+	def get_reevaluation_ci_width(self) -> float:
+		try:
+			value = float(self.get_fitness_parameters("reevaluation_ci_width"))
+		except NoOptionError:
+			return 0.05
+		if value <= 0:
+			self.__logger.error("Invalid re-evaluation confidence interval width " + str(value) + "'. Must be greater than zero.")
+			exit()
+		return value
+
+	def get_fitness_memo_entries(self) -> int:
+		"""
+		Returns the maximum number of genomes whose fitness is remembered for re-evaluation
+		"""
+		try:
+			value = int(self.get_fitness_parameters("fitness_memo_entries"))
+		except NoOptionError:
+			return 10000
+		if value < 1:
+			self.__logger.error("Invalid fitness memo entries " + str(value) + "'. Must be greater than zero.")
+			exit()
+		return value
+
+	def get_deduplicate_genomes(self) -> bool:
+		"""
+		Returns whether circuits with identical genomes in a generation are compiled and measured once,
+		sharing the result, with the ALWAYS re-evaluation policy too. Genomes are compared by their Zobrist hash.
+		"""
+		try:
+			value = self.get_fitness_parameters("deduplicate_genomes")
+			return value == "true" or value == "True"
+		except NoOptionError:
+			return False
+
+	def get_racing(self) -> bool:
+		"""
+		Returns whether circuits are raced: measured one pass at a time, with only the circuits whose
+		confidence interval contains the elite cutoff measured again, up to NUM_PASSES passes
+		"""
+		try:
+			value = self.get_fitness_parameters("racing")
+			return value == "true" or value == "True"
+		except NoOptionError:
+			return False
+
+	def get_racing_initial_passes(self) -> int:
+		"""
+		Returns the number of passes every circuit is measured for before racing
+		"""
+		try:
+			value = int(self.get_fitness_parameters("racing_initial_passes"))
+		except NoOptionError:
+			return 1
+		if value < 1 or value > self.get_num_passes():
+			self.__logger.error("Invalid racing initial passes " + str(value) + "'. Must be between 1 and the number of passes.")
+			exit()
+		return value
+
+	def get_prescreen_model(self) -> str:
+		"""
+		Returns the model that predicts the fitness of offspring before they are measured.
+
+		**NONE**
+			Measure every offspring
+		**NEAREST_NEIGHBOURS**
+			Predict the mean fitness of the prescreen_neighbours closest measured genomes
+		**SURROGATE**
+			Predict with the surrogate model, and never measure offspring it predicts are dead
+		"""
+		try:
+			input = self.get_fitness_parameters("prescreen_model")
+		except NoOptionError:
+			return "NONE"
+		valid_vals = ["NONE", "NEAREST_NEIGHBOURS", "SURROGATE"]
+		self.check_valid_value("pre-screen model", input, valid_vals)
+		return input
+
+	def get_prescreen_fraction(self) -> float:
+		"""
+		Returns the fraction of offspring, best predicted first, that are measured
+		"""
+		try:
+			value = float(self.get_fitness_parameters("prescreen_fraction"))
+		except NoOptionError:
+			return 0.5
+		if value <= 0 or value > 1:
+			self.__logger.error("Invalid pre-screen fraction " + str(value) + "'. Must be greater than 0 and at most 1.")
+			exit()
+		return value
+
+	def get_prescreen_threshold(self) -> float | None:
+		"""
+		Returns the predicted fitness at or above which offspring are always measured, None if there is none
+		"""
+		try:
+			return float(self.get_fitness_parameters("prescreen_threshold"))
+		except NoOptionError:
+			return None
+
+	def get_prescreen_neighbours(self) -> int:
+		try:
+			value = int(self.get_fitness_parameters("prescreen_neighbours"))
+		except NoOptionError:
+			return 3
+		if value < 1:
+			self.__logger.error("Invalid pre-screen neighbours " + str(value) + "'. Must be greater than zero.")
+			exit()
+		return value
+
+	def get_prescreen_archive_entries(self) -> int:
+		"""
+		Returns the number of measured genomes the pre-screen model learns from, most recent first
+		"""
+		try:
+			value = int(self.get_fitness_parameters("prescreen_archive_entries"))
+		except NoOptionError:
+			return 1000
+		if value < 1:
+			self.__logger.error("Invalid pre-screen archive entries " + str(value) + "'. Must be greater than zero.")
+			exit()
+		return value
+
+	def get_surrogate_model(self) -> str:
+		"""
+		Returns the fitness model learned online from every measured circuit.
+
+		**NONE**
+			No model
+		**RIDGE**
+			Ridge regression of fitness, and logistic regression of whether a circuit is dead, over the genome bits
+		**RANDOM_FEATURES**
+			The same regressions over surrogate_features random cosine features of the genome bits
+
+		Genomes longer than surrogate_features bits are hashed into surrogate_features features first
+		"""
+		try:
+			input = self.get_fitness_parameters("surrogate_model")
+		except NoOptionError:
+			return "NONE"
+		valid_vals = ["NONE", "RIDGE", "RANDOM_FEATURES"]
+		self.check_valid_value("surrogate model", input, valid_vals)
+		return input
+
+	def get_surrogate_features(self) -> int:
+		try:
+			value = int(self.get_fitness_parameters("surrogate_features"))
+		except NoOptionError:
+			return 512
+		if value < 1:
+			self.__logger.error("Invalid surrogate features " + str(value) + "'. Must be greater than zero.")
+			exit()
+		return value
+
+	def get_surrogate_regularization(self) -> float:
+		try:
+			value = float(self.get_fitness_parameters("surrogate_regularization"))
+		except NoOptionError:
+			return 1.0
+		if value <= 0:
+			self.__logger.error("Invalid surrogate regularization " + str(value) + "'. Must be greater than zero.")
+			exit()
+		return value
+
+	def get_surrogate_dead_probability(self) -> float:
+		"""
+		Returns the predicted probability of being dead at or above which offspring are mutated again
+		(surrogate_bias) or never measured (the SURROGATE pre-screen model)
+		"""
+		try:
+			value = float(self.get_fitness_parameters("surrogate_dead_probability"))
+		except NoOptionError:
+			return 0.9
+		if value <= 0 or value > 1:
+			self.__logger.error("Invalid surrogate dead probability " + str(value) + "'. Must be greater than 0 and at most 1.")
+			exit()
+		return value
+
+	def get_surrogate_bias(self) -> bool:
+		"""
+		Returns whether selection mutates offspring again while the surrogate predicts they are dead
+		"""
+		try:
+			value = self.get_fitness_parameters("surrogate_bias")
+			return value == "true" or value == "True"
+		except NoOptionError:
+			return False
+
 	# SECTION Getters for GA Parameters.
 	def get_population_size(self):
 		popSize = int(self.get_ga_parameters("POPULATION_SIZE"))
@@ -426,6 +655,120 @@ class Config:
 			exit()
 		return prob
 
+	def get_random_seed(self):
+		"""
+		Returns the seed of the random number generator used for evolution, or None to seed it
+		from the operating system. Runs with the same seed and configuration make the same choices.
+		"""
+		try:
+			return int(self.get_ga_parameters("random_seed"))
+		except NoOptionError:
+			return None
+
+	def get_crossover_type(self) -> str:
+		try:
+			strategy = self.get_ga_parameters("CROSSOVER_TYPE")
+		except NoOptionError:
+			return "SINGLE_POINT"
+		valid_vals = ["SINGLE_POINT", "EACH", "UNIFORM", "TWO_POINT"]
+		self.check_valid_value("crossover type", strategy, valid_vals)
+		return strategy
+
+	def get_evolution_mode(self) -> str:
+		"""
+		Returns how the population is evolved: GENERATIONAL (the whole population is evaluated,
+		then selection runs), PIPELINED (generational, but compiling, fitness calculation and
+		selection overlap with remote evaluation), STEADY_STATE (offspring are bred and evaluated
+		one at a time as soon as a device is free) or ISLAND (subpopulations evolve on their own
+		devices and exchange their best circuits)
+		"""
+		try:
+			mode = self.get_ga_parameters("evolution_mode")
+		except NoOptionError:
+			return "GENERATIONAL"
+		valid_vals = ["GENERATIONAL", "PIPELINED", "STEADY_STATE", "ISLAND"]
+		self.check_valid_value("evolution mode", mode, valid_vals)
+		return mode
+
+	def get_speculation_fraction(self) -> float:
+		"""
+		Returns the fraction of a pipelined generation that must have returned before selection
+		is run speculatively on it. 1 disables speculative selection.
+		"""
+		try:
+			frac = float(self.get_ga_parameters("speculation_fraction"))
+		except NoOptionError:
+			return 0.75
+		if frac <= 0.0 or frac > 1.0:
+			self.__logger.error("Invalid speculation fraction " + str(frac) + "'. Must be greater than zero and at most one.")
+			exit()
+		return frac
+
+	def get_island_count(self) -> int:
+		"""
+		Returns the number of islands the population is split into in island evolution
+		"""
+		try:
+			count = int(self.get_ga_parameters("island_count"))
+		except NoOptionError:
+			return 2
+		if count < 1:
+			self.__logger.error("Invalid island count " + str(count) + "'. Must be greater than zero.")
+			exit()
+		return count
+
+	def get_migration_interval(self) -> int:
+		"""
+		Returns the number of generations an island evolves between sending migrants
+		"""
+		try:
+			interval = int(self.get_ga_parameters("migration_interval"))
+		except NoOptionError:
+			return 5
+		if interval < 1:
+			self.__logger.error("Invalid migration interval " + str(interval) + "'. Must be greater than zero.")
+			exit()
+		return interval
+
+	def get_migration_size(self) -> int:
+		"""
+		Returns the number of circuits an island sends to each of its neighbors when migrating
+		"""
+		try:
+			size = int(self.get_ga_parameters("migration_size"))
+		except NoOptionError:
+			return 1
+		if size < 0:
+			self.__logger.error("Invalid migration size " + str(size) + "'. Must be at least zero.")
+			exit()
+		return size
+
+	def get_migration_topology(self) -> str:
+		"""
+		Returns which islands send migrants to which: RING (each island to the next one) or
+		FULLY_CONNECTED (each island to every other island)
+		"""
+		try:
+			topology = self.get_ga_parameters("migration_topology")
+		except NoOptionError:
+			return "RING"
+		valid_vals = ["RING", "FULLY_CONNECTED"]
+		self.check_valid_value("migration topology", topology, valid_vals)
+		return topology
+
+	def get_tournament_size(self) -> int:
+		"""
+		Returns the number of circuits competing in each tournament of steady state evolution
+		"""
+		try:
+			size = int(self.get_ga_parameters("tournament_size"))
+		except NoOptionError:
+			return 2
+		if size < 1:
+			self.__logger.error("Invalid tournament size " + str(size) + "'. Must be greater than zero.")
+			exit()
+		return size
+
 	def get_elitism_fraction(self):
 		frac = float(self.get_ga_parameters("ELITISM_FRACTION"))
 		if frac < 0.0:
@@ -661,6 +1004,12 @@ class Config:
 		except NoOptionError:
 			return Path("./workspace/experiment_bin")
 
+	def get_bin_cache_directory(self):
+		try:
+			return Path(self.get_logging_parameters("BIN_CACHE_DIR"))
+		except NoOptionError:
+			return Path("./workspace/bin_cache")
+
 	def get_data_directory(self):
 		try:
 			return Path(self.get_logging_parameters("DATA_DIR"))
@@ -698,6 +1047,50 @@ class Config:
 		except NoOptionError:
 			return Path("%%m/%%d/%%Y - %%H:%%M:%%S")
 
+	def get_checkpoint_file(self) -> Path:
+		"""
+		Returns the file the evolution checkpoint is written to
+		"""
+		try:
+			return Path(self.get_logging_parameters("checkpoint_file"))
+		except NoOptionError:
+			return Path("./workspace/checkpoint.npz")
+
+	def get_checkpoint_interval(self) -> int:
+		"""
+		Returns the number of generations between checkpoints, 0 to disable them
+		"""
+		try:
+			interval = int(self.get_logging_parameters("checkpoint_interval"))
+		except NoOptionError:
+			return 0
+		if interval < 0:
+			self.__logger.error("Invalid checkpoint interval " + str(interval) + "'. Must be at least zero.")
+			exit()
+		return interval
+
+	def get_waveform_directory(self) -> Path:
+		"""
+		Returns the directory the binary waveform store of VARIANCE runs is kept in
+		"""
+		try:
+			return Path(self.get_logging_parameters("waveform_dir"))
+		except NoOptionError:
+			return Path("./workspace/waveforms")
+
+	def get_waveform_store_capacity(self) -> int:
+		"""
+		Returns the number of waveforms the waveform store keeps before overwriting the oldest
+		"""
+		try:
+			capacity = int(self.get_logging_parameters("waveform_store_capacity"))
+		except NoOptionError:
+			return 4096
+		if capacity < 1:
+			self.__logger.error("Invalid waveform store capacity " + str(capacity) + "'. Must be at least one.")
+			exit()
+		return capacity
+
 	def get_best_file(self):
 		try:
 			return self.get_logging_parameters("BEST_FILE")
@@ -738,6 +1131,60 @@ class Config:
 		value = self.get_system_parameters("auto_upload_to_arduino")
 		return value== "true" or value == "True"
 
+	def get_compile_method(self):
+		"""
+		Returns how circuit bitstreams are produced: ICEPACK runs icepack for every circuit,
+		PATCH patches a template bitstream compiled once, and PATCH_VERIFY patches
+		and checks the result against icepack.
+		"""
+		try:
+			input = self.get_system_parameters("compile_method")
+		except NoOptionError:
+			return "ICEPACK"
+		valid_vals = ["ICEPACK", "PATCH", "PATCH_VERIFY"]
+		self.check_valid_value("compile method", input, valid_vals)
+		return input
+
+	def get_compile_workers(self) -> int:
+		"""
+		Returns the number of circuits compiled concurrently before each evaluation, which
+		also bounds the number of hardware files mutated concurrently. Defaults to the number of CPUs.
+		"""
+		try:
+			input = int(self.get_system_parameters("compile_workers"))
+		except NoOptionError:
+			return os.cpu_count() or 1
+		if input < 1:
+			self.__logger.error("compile_workers must be at least 1")
+			exit()
+		return input
+
+	def get_compile_cache_entries(self) -> int:
+		"""
+		Returns the maximum number of bitstreams kept in the compile cache (0 disables the cache)
+		"""
+		try:
+			input = int(self.get_system_parameters("compile_cache_entries"))
+		except NoOptionError:
+			return 1000
+		if input < 0:
+			self.__logger.error("compile_cache_entries must be at least 0")
+			exit()
+		return input
+
+	def get_compile_cache_size_mb(self) -> float:
+		"""
+		Returns the maximum total size of the bitstreams kept in the compile cache, in megabytes
+		"""
+		try:
+			input = float(self.get_system_parameters("compile_cache_size_mb"))
+		except NoOptionError:
+			return 256
+		if input <= 0:
+			self.__logger.error("compile_cache_size_mb must be greater than 0")
+			exit()
+		return input
+
 	# SECTION Getters for hardware parameters
 	def get_routing_type(self):
 		input = self.get_hardware_parameters("ROUTING")
@@ -867,6 +1314,176 @@ class Config:
 	def get_icefarm_exit_at_devices_remaining(self):
 		return int(self.__config_parser.get("ICEFARM PARAMETERS", "EXIT_AT_DEVICES_REMAINING"))
 
+	def get_icefarm_evaluation_retries(self) -> int:
+		"""
+		Returns how many times failed evaluations are sent again to healthy devices
+		before the generation is restarted
+		"""
+		try:
+			retries = int(self.__config_parser.get("ICEFARM PARAMETERS", "EVALUATION_RETRIES"))
+		except NoOptionError:
+			return 2
+		if retries < 0:
+			self.__logger.error("Invalid evaluation retries " + str(retries) + "'. Must be at least zero.")
+			exit()
+		return retries
+
+	def get_icefarm_scheduler(self) -> str:
+		"""
+		Returns how QUICK mode evaluations are divided among the devices: ROUND_ROBIN pins them to
+		devices up front, WORK_STEALING hands them out in chunks to whichever device is free
+		"""
+		try:
+			scheduler = self.__config_parser.get("ICEFARM PARAMETERS", "SCHEDULER").upper()
+		except NoOptionError:
+			return "ROUND_ROBIN"
+		if scheduler not in ["ROUND_ROBIN", "WORK_STEALING"]:
+			self.__logger.error("Invalid scheduler '" + scheduler + "'. Valid values are ROUND_ROBIN, WORK_STEALING.")
+			exit()
+		return scheduler
+
+	def get_icefarm_scheduler_chunk(self) -> int:
+		"""
+		Returns how many evaluations an average device takes at a time with the WORK_STEALING scheduler
+		"""
+		try:
+			chunk = int(self.__config_parser.get("ICEFARM PARAMETERS", "SCHEDULER_CHUNK"))
+		except NoOptionError:
+			return 5
+		if chunk < 1:
+			self.__logger.error("Invalid scheduler chunk '" + str(chunk) + "'. Must be at least 1.")
+			exit()
+		return chunk
+
+	def get_icefarm_speculative_evaluations(self) -> bool:
+		"""
+		Returns whether idle devices evaluate copies of the evaluations still running on the slowest
+		devices once the WORK_STEALING queue is empty
+		"""
+		try:
+			value = self.__config_parser.get("ICEFARM PARAMETERS", "SPECULATIVE_EVALUATIONS")
+			return value == "true" or value == "True"
+		except NoOptionError:
+			return False
+
+	def get_icefarm_local(self) -> bool:
+		"""
+		Returns whether the url is set to local, which evaluates on simulated devices in this process
+		instead of an iCEFARM deployment
+		"""
+		return self.get_icefarm_url().strip().lower() == "local"
+
+	def get_icefarm_local_devices(self) -> int:
+		"""
+		Returns how many simulated devices the local farm has
+		"""
+		try:
+			devices = int(self.__config_parser.get("ICEFARM PARAMETERS", "LOCAL_DEVICES"))
+		except NoOptionError:
+			return 4
+		if devices < 1:
+			self.__logger.error("Invalid local devices '" + str(devices) + "'. Must be at least 1.")
+			exit()
+		return devices
+
+	def get_icefarm_local_latency_seconds(self) -> float | list:
+		"""
+		Returns the seconds each evaluation takes on the local farm's devices, or a list of them
+		that is assigned to the devices in turn
+		"""
+		try:
+			param = self.__config_parser.get("ICEFARM PARAMETERS", "LOCAL_LATENCY_SECONDS")
+		except NoOptionError:
+			return 0.01
+		latency = json.loads(param)
+		latencies = latency if isinstance(latency, list) else [latency]
+		if not latencies or not all(isinstance(x, (int, float)) and x >= 0 for x in latencies):
+			self.__logger.error("Invalid local latency '" + param + "'. Must be a non-negative number or a list of them.")
+			exit()
+		return [float(x) for x in latency] if isinstance(latency, list) else float(latency)
+
+	def get_icefarm_local_jitter_seconds(self) -> float:
+		"""
+		Returns the largest number of seconds added to or taken from each evaluation's latency on
+		the local farm
+		"""
+		try:
+			jitter = float(self.__config_parser.get("ICEFARM PARAMETERS", "LOCAL_JITTER_SECONDS"))
+		except NoOptionError:
+			return 0.0
+		if jitter < 0:
+			self.__logger.error("Invalid local jitter '" + str(jitter) + "'. Must not be negative.")
+			exit()
+		return jitter
+
+	def get_icefarm_local_failure_rate(self) -> float:
+		"""
+		Returns the chance that a local farm device fails for good during each evaluation
+		"""
+		try:
+			rate = float(self.__config_parser.get("ICEFARM PARAMETERS", "LOCAL_FAILURE_RATE"))
+		except NoOptionError:
+			return 0.0
+		if not 0 <= rate <= 1:
+			self.__logger.error("Invalid local failure rate '" + str(rate) + "'. Must be between 0 and 1.")
+			exit()
+		return rate
+
+	def get_icefarm_quarantine(self) -> str:
+		"""
+		Returns what happens to devices whose health score shows they are degraded: NO keeps using
+		them, KEEP stops sending them evaluations, RELEASE also ends their reservation so that a
+		replacement can be reserved (see RESERVE_ON_DEVICE_FAILURE_LIMIT)
+		"""
+		try:
+			quarantine = self.__config_parser.get("ICEFARM PARAMETERS", "QUARANTINE").upper()
+		except NoOptionError:
+			return "NO"
+		if quarantine not in ["NO", "KEEP", "RELEASE"]:
+			self.__logger.error("Invalid quarantine '" + quarantine + "'. Valid values are NO, KEEP, RELEASE.")
+			exit()
+		return quarantine
+
+	def get_icefarm_max_failure_rate(self) -> float:
+		"""
+		Returns the fraction of failed evaluations above which a device is degraded
+		"""
+		try:
+			rate = float(self.__config_parser.get("ICEFARM PARAMETERS", "MAX_FAILURE_RATE"))
+		except NoOptionError:
+			return 0.2
+		if not 0 <= rate <= 1:
+			self.__logger.error("Invalid max failure rate '" + str(rate) + "'. Must be between 0 and 1.")
+			exit()
+		return rate
+
+	def get_icefarm_max_latency_ratio(self) -> float:
+		"""
+		Returns how many times slower than the median device a device may be before it is degraded
+		"""
+		try:
+			ratio = float(self.__config_parser.get("ICEFARM PARAMETERS", "MAX_LATENCY_RATIO"))
+		except NoOptionError:
+			return 3.0
+		if ratio <= 1:
+			self.__logger.error("Invalid max latency ratio '" + str(ratio) + "'. Must be greater than 1.")
+			exit()
+		return ratio
+
+	def get_icefarm_max_residual(self) -> float:
+		"""
+		Returns how many median absolute deviations a device's results may be from its peers' on the
+		same bitstreams, in the ALL mode, before it is degraded
+		"""
+		try:
+			residual = float(self.__config_parser.get("ICEFARM PARAMETERS", "MAX_RESIDUAL"))
+		except NoOptionError:
+			return 5.0
+		if residual <= 0:
+			self.__logger.error("Invalid max residual '" + str(residual) + "'. Must be greater than 0.")
+			exit()
+		return residual
+
 	def get_icefarm_reserve_on_device_failure(self) -> bool | int:
 		value = self.__config_parser.get("ICEFARM PARAMETERS", "RESERVE_ON_DEVICE_FAILURE_LIMIT")
 		if value.upper() == "NO":
@@ -893,7 +1510,21 @@ class Config:
 		self.get_icefarm_devices()
 		self.get_icefarm_exit_at_devices_remaining()
 		self.get_icefarm_reserve_on_device_failure()
+		self.get_icefarm_evaluation_retries()
 		self.get_icefarm_results_flush_interval_seconds()
+		if self.get_icefarm_scheduler() == "WORK_STEALING" and self.get_icefarm_mode().upper() != "QUICK":
+			raise Exception("ICEFARM.SCHEDULER WORK_STEALING requires the QUICK mode.")
+		self.get_icefarm_scheduler_chunk()
+		self.get_icefarm_speculative_evaluations()
+		self.get_icefarm_quarantine()
+		self.get_icefarm_max_failure_rate()
+		self.get_icefarm_max_latency_ratio()
+		self.get_icefarm_max_residual()
+		if self.get_icefarm_local():
+			self.get_icefarm_local_devices()
+			self.get_icefarm_local_latency_seconds()
+			self.get_icefarm_local_jitter_seconds()
+			self.get_icefarm_local_failure_rate()
 
 	def validate_all(self):
 		self.get_simulation_mode()
@@ -964,10 +1595,72 @@ class Config:
 			self.get_num_samples()
 			self.get_num_passes()
 
+		if self.get_reevaluation_policy() != "ALWAYS":
+			self.get_reevaluation_interval()
+			self.get_reevaluation_samples()
+			self.get_reevaluation_ci_width()
+			self.get_fitness_memo_entries()
+
+		self.get_deduplicate_genomes()
+
+		if self.get_racing():
+			self.get_racing_initial_passes()
+
+		if self.get_surrogate_model() != "NONE":
+			self.get_surrogate_features()
+			self.get_surrogate_regularization()
+			self.get_surrogate_dead_probability()
+			self.get_surrogate_bias()
+		elif self.get_prescreen_model() == "SURROGATE" or self.get_surrogate_bias():
+			self.__logger.error("The SURROGATE pre-screen model and surrogate_bias need a surrogate_model")
+			exit()
+
+		if self.get_prescreen_model() != "NONE":
+			self.get_prescreen_fraction()
+			self.get_prescreen_threshold()
+			self.get_prescreen_neighbours()
+			self.get_prescreen_archive_entries()
+
 	def validate_ga_params(self):
 		self.get_population_size()
 		self.get_mutation_probability()
 		self.get_crossover_probability()
+		self.get_crossover_type()
+		self.get_random_seed()
+		self.get_tournament_size()
+		if self.get_evolution_mode() == "STEADY_STATE":
+			if self.get_simulation_mode() != "REMOTE" or self.get_icefarm_mode().upper() != "QUICK":
+				self.__logger.error("STEADY_STATE evolution requires the REMOTE simulation mode and the QUICK iCEFARM mode")
+				exit()
+		if self.get_evolution_mode() == "PIPELINED":
+			if self.get_simulation_mode() != "REMOTE":
+				self.__logger.error("PIPELINED evolution requires the REMOTE simulation mode")
+				exit()
+			self.get_speculation_fraction()
+		if self.get_evolution_mode() == "ISLAND":
+			if self.get_simulation_mode() != "REMOTE":
+				self.__logger.error("ISLAND evolution requires the REMOTE simulation mode")
+				exit()
+			if self.get_island_count() > self.get_icefarm_device_count():
+				self.__logger.error("ISLAND evolution needs at least one device per island")
+				exit()
+			if self.get_island_count() > self.get_population_size():
+				self.__logger.error("ISLAND evolution needs at least one circuit per island")
+				exit()
+			self.get_migration_interval()
+			self.get_migration_size()
+			self.get_migration_topology()
+		if self.get_racing():
+			if self.get_evolution_mode() != "GENERATIONAL":
+				self.__logger.error("Racing can only be used with GENERATIONAL evolution")
+				exit()
+			if self.get_selection_type() not in ["FRAC_ELITE", "RANK_PROP_SEL", "FIT_PROP_SEL"]:
+				self.__logger.error("Racing can only be used with the following selection methods: FRAC_ELITE, RANK_PROP_SEL, FIT_PROP_SEL")
+				exit()
+		if self.get_prescreen_model() != "NONE" or self.get_surrogate_model() != "NONE":
+			if self.get_evolution_mode() != "GENERATIONAL" or self.get_simulation_mode() == "FULLY_SIM":
+				self.__logger.error("Pre-screening and surrogate models can only be used with GENERATIONAL evolution of hardware files")
+				exit()
 		self.get_elitism_fraction()
 		self.get_selection_type()
 		self.get_diversity_measure()
@@ -993,9 +1686,14 @@ class Config:
 		self.get_plots_directory()
 		self.get_asc_directory()
 		self.get_bin_directory()
+		self.get_bin_cache_directory()
 		self.get_data_directory()
 		self.get_analysis_directory()
 		self.get_best_file()
+		self.get_checkpoint_file()
+		self.get_checkpoint_interval()
+		self.get_waveform_directory()
+		self.get_waveform_store_capacity()
 		self.get_src_pops_dir()
 		self.get_datetime_format()
 		self.get_generations_directory()
@@ -1004,6 +1702,10 @@ class Config:
 	def validate_system_params(self):
 		self.get_fpga()
 		self.get_usb_path()
+		self.get_compile_method()
+		self.get_compile_workers()
+		self.get_compile_cache_entries()
+		self.get_compile_cache_size_mb()
 
 	def validate_hardware_params(self):
 		self.get_routing_type()
@@ -0,0 +1,352 @@
+"""
+DevicePool
+----------
+
+One iCEFARM reservation shared by several experiments running at the same time, so that they do
+not each reserve and release devices and small populations still keep the whole farm busy. The
+pool lives in the process that reserved the devices and is served to the experiments over a local
+multiprocessing manager. Each experiment evaluates through a PoolClient, which stands in for the
+PulseCountClient or VarMaxClient it would otherwise reserve itself. The pool interleaves the
+evaluations of every experiment with pending work one at a time (fair share), so a large
+generation of one experiment does not hold up the others.
+"""
+import os
+import random
+from logging import Logger
+from multiprocessing import current_process
+from multiprocessing.managers import BaseManager
+from pathlib import Path
+from queue import Empty, Queue
+from threading import BoundedSemaphore, Condition, Lock, Thread
+from typing import Dict, List, Optional, Tuple
+
+from icefarm.client.drivers import PulseCountClient, VarMaxClient
+from icefarm.client.lib.BatchClient import EvaluationFailed
+from icefarm.client.lib.pulsecount import PulseCountEvaluation
+from icefarm.client.lib.varmax import VarMaxEvaluation
+
+from Config import Config
+from LocalFarm import local_client_fac
+
+# Environment variable holding the host:port of the pool an experiment should evaluate on
+DEVICE_POOL_ENV = "BITSTREAM_EVOLUTION_DEVICE_POOL"
+
+def reserve_icefarm_client(config: Config, logger: Logger, clear_workers: bool = False):
+    """
+    Builds the client set in the config (or a PoolClient if this experiment runs on a shared pool)
+    and reserves its devices
+
+    Parameters
+    ----------
+    config : Config
+        The iCEFARM parameters
+    logger : Logger
+        Logs the reservation
+    clear_workers : bool
+        Whether to clear stale iCEFARM workers and wait for devices to become available
+    """
+    address = os.environ.get(DEVICE_POOL_ENV)
+    if address:
+        logger.info(f"Evaluating on the shared device pool at {address}")
+        client = PoolClient(connect_pool(address), logger)
+    elif config.get_icefarm_local():
+        logger.info("Evaluating on a local farm of simulated devices")
+        client = local_client_fac(config, logger)
+    else:
+        url = config.get_icefarm_url()
+        # TODO generate unique client name / stop procrastinating on auth
+        name = f"bitstream-evolution-{random.random()}"
+        if config.get_fitness_func() == "VARIANCE":
+            if config.get_icefarm_send_waveform():
+                logger.info("Waveform data transfer enabled")
+            client = VarMaxClient(url, name, logger, send_waveform=config.get_icefarm_send_waveform())
+        else:
+            client = PulseCountClient(url, name, logger)
+    if clear_workers:
+        logger.info("Clearing stale workers...")
+        client.clearWorkers()
+        logger.info("Cleared. Waiting for workers to re-register...")
+    logger.info(f"Reserving devices...")
+
+    # TODO might want to unify reserve and reservespecific to one method in icefarm
+    serials = config.get_icefarm_devices()
+    flush_at_bitstreams_remaining = config.get_icefarm_buffer_batch_amount() * config.get_icefarm_client_batch_amount_circuits() - 1
+    if isinstance(serials, int):
+        client.reserve(serials, wait_for_available=clear_workers, flush_interval_seconds=config.get_icefarm_results_flush_interval_seconds(), flush_at_bitstreams_remaining=flush_at_bitstreams_remaining)
+    else:
+        client.reserveSpecific(serials, flush_interval_seconds=config.get_icefarm_results_flush_interval_seconds(), flush_at_bitstreams_remaining=flush_at_bitstreams_remaining)
+    logger.info(f"Reserved devices: {client.getSerials()}")
+    return client
+
+class FairShareQueue:
+    """
+    Evaluations waiting to be sent, by experiment. Taking evaluations cycles through the
+    experiments with pending work, one evaluation at a time.
+    """
+    def __init__(self):
+        self._pending: Dict[str, List[tuple]] = {}
+        # The order experiments are served in, the next one first
+        self._order: List[str] = []
+        self._condition = Condition()
+        self._closed = False
+
+    def put(self, experiment: str, items: List[tuple]):
+        """Queues an experiment's evaluations, in order"""
+        with self._condition:
+            if experiment not in self._pending:
+                self._pending[experiment] = []
+                self._order.append(experiment)
+            self._pending[experiment].extend(items)
+            self._condition.notify_all()
+
+    def take(self, amount: int, block: bool = True) -> List[tuple]:
+        """
+        Returns up to amount evaluations, interleaved across the experiments with pending work.
+        Waits for evaluations if block is set, returns an empty list once the queue is closed.
+        """
+        with self._condition:
+            while block and not self._closed and not any(self._pending.values()):
+                self._condition.wait()
+            taken = []
+            while len(taken) < amount and any(self._pending.values()):
+                experiment = self._order.pop(0)
+                self._order.append(experiment)
+                if self._pending[experiment]:
+                    taken.append(self._pending[experiment].pop(0))
+            return taken
+
+    def close(self):
+        """Wakes every waiting take()"""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+
+class SharedDevicePool:
+    """
+    Sends the evaluations of every experiment to one reserved client
+    """
+    def __init__(self, client, chunk: int, in_flight: int, logger: Logger, batch_size: int = 5, target_batches: int = 2, result_timeout: float = 30):
+        """
+        Parameters
+        ----------
+        client : PulseCountClient | VarMaxClient | LocalClient
+            The client holding the shared reservation
+        chunk : int
+            The most evaluations sent in one call to the client
+        in_flight : int
+            The most calls to the client running at once
+        logger : Logger
+            Logs failed calls
+        batch_size : int
+            Passed on to the client's evaluateEvaluations
+        target_batches : int
+            Passed on to the client's evaluateEvaluations
+        result_timeout : float
+            Passed on to the client's evaluateEvaluations
+        """
+        self._client = client
+        self._chunk = chunk
+        self._batch_size = batch_size
+        self._target_batches = target_batches
+        self._result_timeout = result_timeout
+        self._in_flight = BoundedSemaphore(in_flight)
+        self._logger = logger
+        self._EvalClass = VarMaxEvaluation if isinstance(client, VarMaxClient) else PulseCountEvaluation
+        self._queue = FairShareQueue()
+        self._results: Dict[int, Queue] = {}
+        self._lock = Lock()
+        self._tickets = 0
+        Thread(target=self._dispatch, name="device-pool", daemon=True).start()
+
+    def getSerials(self) -> List[str]:
+        return self._client.getSerials()
+
+    def submit(self, experiment: str, entries: List[Tuple[List[str], str]]) -> int:
+        """
+        Queues evaluations of an experiment
+
+        Parameters
+        ----------
+        experiment : str
+            The experiment's name
+        entries : list[tuple[list[str], str]]
+            The devices each evaluation runs on, and the absolute path of its bitstream
+
+        Returns
+        -------
+        int
+            The ticket that results() returns the results of the evaluations for
+        """
+        with self._lock:
+            ticket = self._tickets
+            self._tickets += 1
+            self._results[ticket] = Queue()
+        self._queue.put(experiment, [(ticket, index, serials, fpath) for index, (serials, fpath) in enumerate(entries)])
+        return ticket
+
+    def results(self, ticket: int, timeout: float) -> List[tuple]:
+        """
+        Waits up to timeout seconds for results of a ticket
+
+        Returns
+        -------
+        list[tuple[int, str, Any]]
+            The index of the evaluation, the device, and the result (EvaluationFailed if the device
+            did not return one), for every result that arrived
+        """
+        results = self._results[ticket]
+        try:
+            arrived = [results.get(timeout=timeout)]
+        except Empty:
+            return []
+        while not results.empty():
+            arrived.append(results.get())
+        return arrived
+
+    def release(self, ticket: int):
+        """Forgets a ticket once all of its results were read"""
+        with self._lock:
+            self._results.pop(ticket, None)
+
+    def close(self):
+        self._queue.close()
+
+    def _dispatch(self):
+        while True:
+            # Evaluations are only taken once a call can be made, so the share of each experiment
+            # is decided by what is pending then
+            self._in_flight.acquire()
+            items = self._queue.take(self._chunk)
+            if not items:
+                self._in_flight.release()
+                return
+            Thread(target=self._run, args=(items,), name="device-pool-call", daemon=True).start()
+
+    def _run(self, items: List[tuple]):
+        evaluations = [self._EvalClass(serials, fpath) for _, _, serials, fpath in items]
+        # The devices each evaluation has not returned a result from yet
+        missing = {id(evaluation): set(evaluation.serials) for evaluation in evaluations}
+        item_of = {id(evaluation): item for evaluation, item in zip(evaluations, items)}
+        try:
+            for serial, evaluation, result in self._client.evaluateEvaluations(evaluations, batch_size=self._batch_size, target_batches=self._target_batches, result_timeout=self._result_timeout):
+                ticket, index, _, _ = item_of[id(evaluation)]
+                missing[id(evaluation)].discard(serial)
+                self._put(ticket, (index, serial, result))
+        except Exception as e:
+            self._logger.error(f"Shared pool evaluation failed: {e}")
+        finally:
+            self._in_flight.release()
+            for evaluation in evaluations:
+                ticket, index, _, _ = item_of[id(evaluation)]
+                for serial in missing[id(evaluation)]:
+                    self._put(ticket, (index, serial, EvaluationFailed))
+
+    def _put(self, ticket: int, result: tuple):
+        with self._lock:
+            results = self._results.get(ticket)
+        if results is not None:
+            results.put(result)
+
+def shared_device_pool_fac(client, config: Config, experiments: int, logger: Logger) -> SharedDevicePool:
+    """
+    Builds a pool of the devices reserved by client, sending each device a batch per call and
+    running a call per experiment at once, with the batching set in the config
+    """
+    batch_size = config.get_icefarm_client_batch_amount_circuits()
+    return SharedDevicePool(
+        client,
+        batch_size * max(1, len(client.getSerials())),
+        max(1, experiments),
+        logger,
+        batch_size=batch_size,
+        target_batches=config.get_icefarm_buffer_batch_amount(),
+        result_timeout=config.get_icefarm_results_flush_interval_seconds() * 4
+    )
+
+class PoolClient:
+    """
+    Stands in for a PulseCountClient or VarMaxClient in an experiment running on a shared pool.
+    The pool's devices are already reserved, so reserving returns them and ending does nothing.
+    """
+    def __init__(self, pool, logger: Logger, poll_seconds: float = 1.0):
+        """
+        Parameters
+        ----------
+        pool : SharedDevicePool
+            The pool, usually a proxy of it (see connect_pool())
+        logger : Logger
+            Logs ignored reservation changes
+        poll_seconds : float
+            How long each wait for results lasts
+        """
+        self._pool = pool
+        self._logger = logger
+        self._poll_seconds = poll_seconds
+        self._name = f"{current_process().name}-{os.getpid()}"
+
+    def available(self) -> int:
+        return 0
+
+    def reserve(self, amount: int, **kwargs) -> List[str]:
+        return self.getSerials()
+
+    def reserveSpecific(self, serials: List[str], **kwargs) -> List[str]:
+        return self.getSerials()
+
+    def getSerials(self) -> List[str]:
+        return list(self._pool.getSerials())
+
+    def clearWorkers(self):
+        pass
+
+    def end(self, serials: List[str]):
+        self._logger.info(f"Devices {serials} stay reserved by the shared pool")
+
+    def endAll(self):
+        pass
+
+    def evaluateEvaluations(self, evaluations: list, result_timeout=30, batch_size=5, target_batches=2):
+        """
+        Sends evaluations through the pool, yielding (serial, evaluation, result) as results arrive
+        """
+        entries = [(sorted(evaluation.serials), str(Path(evaluation.filepath).resolve())) for evaluation in evaluations]
+        ticket = self._pool.submit(self._name, entries)
+        remaining = sum(len(serials) for serials, _ in entries)
+        try:
+            while remaining:
+                for index, serial, result in self._pool.results(ticket, self._poll_seconds):
+                    remaining -= 1
+                    yield serial, evaluations[index], result
+        finally:
+            self._pool.release(ticket)
+
+class DevicePoolServer(BaseManager):
+    """Serves the pool of this process"""
+
+class DevicePoolConnection(BaseManager):
+    """Connects to a pool served by another process"""
+
+DevicePoolConnection.register("pool")
+
+def serve_pool(pool: SharedDevicePool, authkey: Optional[bytes] = None) -> str:
+    """
+    Serves the pool on a free local port from a background thread
+
+    Returns
+    -------
+    str
+        The host:port experiments connect to, see DEVICE_POOL_ENV
+    """
+    DevicePoolServer.register("pool", callable=lambda: pool)
+    manager = DevicePoolServer(address=("127.0.0.1", 0), authkey=authkey or current_process().authkey)
+    server = manager.get_server()
+    Thread(target=server.serve_forever, name="device-pool-server", daemon=True).start()
+    host, port = server.address
+    return f"{host}:{port}"
+
+def connect_pool(address: str, authkey: Optional[bytes] = None):
+    """Returns a proxy of the pool served at host:port"""
+    host, port = address.rsplit(":", 1)
+    manager = DevicePoolConnection(address=(host, int(port)), authkey=authkey or current_process().authkey)
+    manager.connect()
+    return manager.pool()
@@ -5,6 +5,7 @@ from CircuitPopulation import CircuitPopulation
 from ConfigBuilder import ConfigBuilder
 from Config import Config
 from Logger import EvolutionLogger
+from Checkpoint import Checkpoint
 from subprocess import CalledProcessError, run
 import os
 
@@ -23,11 +24,12 @@ class Evolution:
             output_directory:str=None,
             print_action_only:bool=False,
             clear_workers:bool=False,
-            speedtest:bool=False) -> None:
+            speedtest:bool=False,
+            resume_checkpoint_path:str=None) -> None:
 
         if (print_action_only):
             print('Running evolve.py in print only mode:')
-            print(f"Config: {primary_config_path}, Base Config: {base_config_path}, Output Directory: {output_directory}, Experiment Description: {experiment_description}.")
+            print(f"Config: {primary_config_path}, Base Config: {base_config_path}, Output Directory: {output_directory}, Experiment Description: {experiment_description}, Resume: {resume_checkpoint_path}.")
             # TODO: If wish to validate operations would work properly, we should implement some validation of inputs
             # This would quickly add confidence that the arguments would work properly, perhaps like this.
             invalid_notifications = self.validate_arguments(output_directory)
@@ -61,7 +63,7 @@ class Evolution:
         logger = logging.getLogger(__name__)
         logger .setLevel(logging.DEBUG)
         logger .addHandler(logging.StreamHandler(sys.stdout))
-        logger = EvolutionLogger(logger, config, experiment_description)
+        logger = EvolutionLogger(logger, config, experiment_description, resume=resume_checkpoint_path is not None)
         # logger.log_info(1, args) - Not sure how to log arguments. This was my attempt to do so.
         config.add_logger(logger)
         config.validate_all()
@@ -75,7 +77,11 @@ class Evolution:
         self.population = population
 
         if config.get_simulation_mode() != "INTRINSIC_SENSITIVITY":
-            population.populate()
+            checkpoint = None
+            if resume_checkpoint_path is not None:
+                logger.info(f"Resuming from checkpoint {resume_checkpoint_path}")
+                checkpoint = Checkpoint.load(resume_checkpoint_path)
+            population.populate(checkpoint)
             population.evolve()
         else:
             population.run_fitness_sensitity()
@@ -0,0 +1,235 @@
+"""
+Fitness Memo
+------------
+
+Remembers the fitness of every genome evaluated so far, so that circuits whose genome
+was already measured (elites, clones, duplicates) do not need to be measured from
+scratch every generation. A re-evaluation policy decides for each circuit whether its
+remembered fitness is reused as is or topped up with a new evaluation. The ALWAYS
+policy (re-measure every circuit every generation) does not use the memo at all.
+"""
+from collections import OrderedDict
+from enum import Enum
+import math
+from typing import Dict, List, Protocol
+
+from Circuit.Circuit import Circuit
+from Config import Config
+
+# 95% two sided z score, used by the confidence interval policy
+CONFIDENCE_Z = 1.96
+
+class Decision(Enum):
+    REUSE = 0
+    TOP_UP = 1
+
+class FitnessRecord:
+    """
+    Running statistics (Welford) of the fitness values measured for one genome,
+    along with the raw measurements behind each of them.
+    """
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.measurements: List[list] = []
+        self.last_generation = -1
+
+    def add(self, fitness: float, data: list, generation: int):
+        """
+        Merges one evaluation into the running statistics
+
+        Parameters
+        ----------
+        fitness : float
+            Fitness calculated from the evaluation's data
+        data : list
+            The measurements of the evaluation
+        generation : int
+            The generation the evaluation was made in
+        """
+        self.count += 1
+        delta = fitness - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (fitness - self.mean)
+        self.measurements.append(list(data))
+        self.last_generation = generation
+
+    def variance(self) -> float:
+        """Sample variance of the fitness values, 0 with fewer than two"""
+        return self._m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    def confidence_half_width(self) -> float:
+        """Half width of the 95% confidence interval of the mean fitness"""
+        if self.count < 2:
+            return math.inf
+        return CONFIDENCE_Z * math.sqrt(self.variance() / self.count)
+
+class ReevaluationPolicy(Protocol):
+    def __call__(self, record: FitnessRecord, generation: int) -> Decision:
+        """Decides what to do with the remembered fitness of a genome in this generation."""
+
+class EveryKGenerations(ReevaluationPolicy):
+    """Reuses fitness for k generations after each evaluation, then tops it up"""
+    def __init__(self, k: int):
+        self._k = k
+
+    def __call__(self, record, generation):
+        if generation - record.last_generation < self._k:
+            return Decision.REUSE
+        return Decision.TOP_UP
+
+class UntilNSamples(ReevaluationPolicy):
+    """Tops up fitness every generation until a genome has been evaluated n times"""
+    def __init__(self, n: int):
+        self._n = n
+
+    def __call__(self, record, generation):
+        if record.count >= self._n:
+            return Decision.REUSE
+        return Decision.TOP_UP
+
+class ConfidenceInterval(ReevaluationPolicy):
+    """
+    Tops up fitness until the 95% confidence interval of the mean is narrower than
+    width times the mean (or n evaluations have been made)
+    """
+    def __init__(self, width: float, n: int):
+        self._width = width
+        self._n = n
+
+    def __call__(self, record, generation):
+        if record.count >= self._n:
+            return Decision.REUSE
+        if record.confidence_half_width() <= self._width * abs(record.mean):
+            return Decision.REUSE
+        return Decision.TOP_UP
+
+def reevaluation_policy_fac(config: Config) -> ReevaluationPolicy:
+    match config.get_reevaluation_policy():
+        case "EVERY_K_GENERATIONS":
+            return EveryKGenerations(config.get_reevaluation_interval())
+        case "UNTIL_N_SAMPLES":
+            return UntilNSamples(config.get_reevaluation_samples())
+        case "CONFIDENCE_INTERVAL":
+            return ConfidenceInterval(config.get_reevaluation_ci_width(), config.get_reevaluation_samples())
+        case _:
+            raise Exception("Invalid re-evaluation policy selected.")
+
+def genome_key(circuit: Circuit) -> int:
+    """Returns the memo key of a circuit: the Zobrist hash of its modifiable bits"""
+    return circuit.get_genome_hash()
+
+class FitnessMemo:
+    """
+    Fitness records of past genomes, the least recently used of which are dropped past max_entries.
+    """
+    def __init__(self, policy: ReevaluationPolicy, max_entries: int):
+        self._policy = policy
+        self._max_entries = max_entries
+        self._records: OrderedDict[int, FitnessRecord] = OrderedDict()
+        # Keys of the circuits planned in the current generation
+        self._keys: Dict[Circuit, int] = {}
+
+        self.reused = 0
+        self.measured = 0
+
+    def __len__(self):
+        return len(self._records)
+
+    def remembers(self, circuit: Circuit) -> bool:
+        """Returns whether the genome of a circuit was measured before"""
+        return genome_key(circuit) in self._records
+
+    def plan(self, circuits: List[Circuit], generation: int) -> List[Circuit]:
+        """
+        Decides which circuits need to be measured this generation. Only one circuit of each
+        group of identical genomes is measured; the others share its result in record().
+
+        Parameters
+        ----------
+        circuits : list[Circuit]
+            Every circuit in the population
+        generation : int
+            The current generation
+
+        Returns
+        -------
+        list[Circuit]
+            The circuits to measure
+        """
+        self._keys = {}
+        to_measure = []
+        planned = set()
+        for circuit in circuits:
+            key = genome_key(circuit)
+            self._keys[circuit] = key
+            if key in planned:
+                continue
+            planned.add(key)
+
+            record = self._records.get(key)
+            if record is None or self._policy(record, generation) == Decision.TOP_UP:
+                to_measure.append(circuit)
+        return to_measure
+
+    def record(self, circuits: List[Circuit], measured: List[Circuit], generation: int):
+        """
+        Merges the fitness of the measured circuits into their records, then sets the fitness of
+        every circuit to the mean fitness of its genome.
+
+        Parameters
+        ----------
+        circuits : list[Circuit]
+            Every circuit in the population
+        measured : list[Circuit]
+            The circuits returned by plan(), after their fitness was calculated
+        generation : int
+            The current generation
+        """
+        for circuit in measured:
+            key = self._keys[circuit]
+            record = self._records.get(key)
+            if record is None:
+                record = FitnessRecord()
+                self._records[key] = record
+            record.add(circuit.get_fitness(), circuit._data, generation)
+
+        measured = set(measured)
+        for circuit in circuits:
+            key = self._keys[circuit]
+            record = self._records[key]
+            self._records.move_to_end(key)
+            if circuit in measured:
+                self.measured += 1
+                if record.count == 1:
+                    continue
+            else:
+                self.reused += 1
+            circuit.restore_fitness(record.mean, record.measurements[-1])
+
+        while len(self._records) > self._max_entries:
+            self._records.popitem(last=False)
+
+    def reset_counts(self):
+        self.reused = 0
+        self.measured = 0
+
+    def get_state(self) -> list:
+        """Returns every fitness record as JSON serializable lists, least recently used first"""
+        return [
+            [format(key, "016x"), record.count, record.mean, record._m2, record.measurements, record.last_generation]
+            for key, record in self._records.items()
+        ]
+
+    def set_state(self, state: list):
+        """Replaces every fitness record with those returned by get_state()"""
+        self._records = OrderedDict()
+        for key, count, mean, m2, measurements, last_generation in state:
+            record = FitnessRecord()
+            record.count = count
+            record.mean = mean
+            record._m2 = m2
+            record.measurements = measurements
+            record.last_generation = last_generation
+            self._records[int(key, 16)] = record
@@ -0,0 +1,260 @@
+"""
+LocalFarm
+---------
+
+In-process stand-in for an iCEFARM deployment, so that the REMOTE evolution loop can be run,
+benchmarked and profiled on any machine, without boards or a control server. It implements the
+part of the PulseCountClient and VarMaxClient interface used by CircuitPopulation and
+EvolutionClient. Each simulated device evaluates one bitstream at a time after a configurable
+latency (plus jitter), returns its results in batches like an iCEFARM worker, and can be made to
+fail for good. Results are derived from the hash of the bitstream, so a circuit always gets the
+same pulse count or waveform, whichever device evaluates it.
+"""
+import hashlib
+import random
+import time
+from logging import Logger
+from queue import Queue
+from threading import Condition, Lock, Thread
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from icefarm.client.lib.BatchClient import EvaluationFailed
+
+from Config import Config
+
+# Pulse counts are spread evenly below this
+MAX_PULSES = 100_000
+# Samples in each waveform, and the largest value of a sample (10 bit ADC)
+WAVEFORM_SAMPLES = 500
+MAX_SAMPLE = 1023
+
+def bitstream_digest(filepath) -> bytes:
+    """Returns the hash results are derived from"""
+    with open(filepath, "rb") as bitstream:
+        return hashlib.blake2b(bitstream.read(), digest_size=8).digest()
+
+def pulse_count(digest: bytes) -> int:
+    """Returns the pulse count of the bitstream with the given hash"""
+    return int.from_bytes(digest, "little") % MAX_PULSES
+
+def waveform(digest: bytes) -> List[int]:
+    """Returns the waveform of the bitstream with the given hash"""
+    rand = np.random.default_rng(int.from_bytes(digest, "little"))
+    # Some circuits barely oscillate, others swing across the whole range
+    amplitude = rand.uniform(0, MAX_SAMPLE / 2)
+    samples = MAX_SAMPLE / 2 + amplitude * np.sin(np.linspace(0, rand.uniform(1, 50), WAVEFORM_SAMPLES)) + rand.normal(0, 5, WAVEFORM_SAMPLES)
+    return np.clip(np.round(samples), 0, MAX_SAMPLE).astype(int).tolist()
+
+class LocalDevice:
+    """
+    A simulated board
+    """
+    def __init__(self, serial: str, latency: float, jitter: float, failure_rate: float, seed: Optional[int]):
+        """
+        Parameters
+        ----------
+        serial : str
+            The device's serial
+        latency : float
+            Seconds the device takes per evaluation
+        jitter : float
+            Largest number of seconds added to or taken from each evaluation's latency
+        failure_rate : float
+            Chance that the device fails for good during each evaluation
+        seed : int | None
+            Seeds the jitter and failures
+        """
+        self.serial = serial
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.broken = False
+        # A device evaluates one bitstream at a time, whichever client sent it
+        self.lock = Lock()
+        self._rand = random.Random(seed)
+
+    def evaluate(self) -> bool:
+        """Spends the time of one evaluation, returns False if the device failed during it"""
+        time.sleep(max(0.0, self.latency + self._rand.uniform(-self.jitter, self.jitter)))
+        if self._rand.random() < self.failure_rate:
+            self.broken = True
+        return not self.broken
+
+class LocalFarm:
+    """
+    The simulated devices, which clients reserve like iCEFARM devices
+    """
+    def __init__(self, devices: int, latency: float | List[float], jitter: float, failure_rate: float, seed: Optional[int] = None):
+        """
+        Parameters
+        ----------
+        devices : int
+            The number of devices
+        latency : float | list[float]
+            Seconds each evaluation takes, on every device or on each device in turn
+        jitter : float
+            Largest number of seconds added to or taken from each evaluation's latency
+        failure_rate : float
+            Chance that a device fails for good during each evaluation
+        seed : int | None
+            Seeds the jitter and failures
+        """
+        latencies = latency if isinstance(latency, list) else [latency]
+        self.devices: Dict[str, LocalDevice] = {}
+        for i in range(devices):
+            serial = f"LOCAL{i:04d}"
+            device_seed = None if seed is None else seed + i
+            self.devices[serial] = LocalDevice(serial, latencies[i % len(latencies)], jitter, failure_rate, device_seed)
+        self._free = list(self.devices)
+        self._condition = Condition()
+
+    def available(self) -> int:
+        with self._condition:
+            return len(self._working_free())
+
+    def take(self, serials: List[str]):
+        with self._condition:
+            missing = [serial for serial in serials if serial not in self._free]
+            if missing:
+                raise Exception(f"Devices not available: {missing}")
+            for serial in serials:
+                self._free.remove(serial)
+
+    def take_any(self, amount: int, timeout: Optional[float]) -> List[str]:
+        """Reserves any amount devices that are working, waiting up to timeout seconds for them"""
+        with self._condition:
+            if not self._condition.wait_for(lambda: len(self._working_free()) >= amount, timeout):
+                raise Exception("Not enough devices available")
+            serials = self._working_free()[:amount]
+            for serial in serials:
+                self._free.remove(serial)
+            return serials
+
+    def _working_free(self) -> List[str]:
+        return [serial for serial in self._free if not self.devices[serial].broken]
+
+    def give_back(self, serials: List[str]):
+        with self._condition:
+            for serial in serials:
+                if serial not in self._free:
+                    self._free.append(serial)
+            self._condition.notify_all()
+
+class LocalClient:
+    """
+    Stands in for a PulseCountClient or VarMaxClient, evaluating on a LocalFarm
+    """
+    def __init__(self, farm: LocalFarm, kind: str, logger: Logger, send_waveform: bool = False):
+        """
+        Parameters
+        ----------
+        farm : LocalFarm
+            The devices to reserve
+        kind : str
+            pulsecount or variance, like the kind of iCEFARM reservations
+        logger : Logger
+            Logs failed devices
+        send_waveform : bool
+            Whether variance results include the waveform
+        """
+        self._farm = farm
+        self._kind = kind
+        self._logger = logger
+        self.send_waveform = send_waveform
+        self._serials: List[str] = []
+        self._lock = Lock()
+
+    def available(self) -> int:
+        return self._farm.available()
+
+    def reserve(self, amount: int, wait_for_available=False, available_timeout=60, **kwargs) -> List[str]:
+        serials = self._farm.take_any(amount, available_timeout if wait_for_available else 0)
+        with self._lock:
+            self._serials.extend(serials)
+        return serials
+
+    def reserveSpecific(self, serials: List[str], **kwargs) -> List[str]:
+        self._farm.take(serials)
+        with self._lock:
+            self._serials.extend(serials)
+        return list(serials)
+
+    def getSerials(self) -> List[str]:
+        with self._lock:
+            return list(self._serials)
+
+    def clearWorkers(self):
+        pass
+
+    def end(self, serials: List[str]):
+        with self._lock:
+            self._serials = [serial for serial in self._serials if serial not in serials]
+        self._farm.give_back(serials)
+
+    def endAll(self):
+        self.end(self.getSerials())
+
+    def _result(self, digest: bytes):
+        if self._kind == "pulsecount":
+            return pulse_count(digest)
+        samples = waveform(digest)
+        fitness = float(np.var(samples))
+        return (fitness, samples) if self.send_waveform else fitness
+
+    def _run(self, serial: str, evaluations: list, digests: Dict[int, bytes], batch_size: int, results: Queue):
+        device = self._farm.devices[serial]
+        for start in range(0, len(evaluations), batch_size):
+            batch = evaluations[start:start + batch_size]
+            returned = []
+            with device.lock:
+                for evaluation in batch:
+                    if serial not in self.getSerials() or device.broken or not device.evaluate():
+                        results.put((serial, evaluation, EvaluationFailed))
+                    else:
+                        returned.append((serial, evaluation, self._result(digests[id(evaluation)])))
+            # Like an iCEFARM worker, results are sent once the batch is done
+            for result in returned:
+                results.put(result)
+            if device.broken and serial in self.getSerials():
+                self._logger.error(f"device {serial} failed, ending reservation")
+                self.end([serial])
+
+    def evaluateEvaluations(self, evaluations: list, result_timeout=30, batch_size=5, target_batches=2):
+        """
+        Evaluates each evaluation on each of its serials, yielding (serial, evaluation, result) as
+        results arrive. Evaluations on devices that are not reserved or that failed return
+        EvaluationFailed.
+        """
+        work: Dict[str, list] = {}
+        # Bitstreams are read when they are sent, like iCEFARM does
+        digests = {id(evaluation): bitstream_digest(evaluation.filepath) for evaluation in evaluations}
+        for evaluation in evaluations:
+            for serial in evaluation.serials:
+                work.setdefault(serial, []).append(evaluation)
+
+        results = Queue()
+        for serial, queued in work.items():
+            if serial not in self._farm.devices:
+                for evaluation in queued:
+                    results.put((serial, evaluation, EvaluationFailed))
+                continue
+            Thread(target=self._run, args=(serial, queued, digests, batch_size, results), name=f"local-{serial}", daemon=True).start()
+
+        for _ in range(sum(len(queued) for queued in work.values())):
+            yield results.get()
+
+def local_client_fac(config: Config, logger: Logger) -> LocalClient:
+    """
+    Builds a client of a new LocalFarm with the devices set in the config
+    """
+    farm = LocalFarm(
+        config.get_icefarm_local_devices(),
+        config.get_icefarm_local_latency_seconds(),
+        config.get_icefarm_local_jitter_seconds(),
+        config.get_icefarm_local_failure_rate(),
+        config.get_random_seed()
+    )
+    kind = "variance" if config.get_fitness_func() == "VARIANCE" else "pulsecount"
+    return LocalClient(farm, kind, logger, send_waveform=config.get_icefarm_send_waveform())
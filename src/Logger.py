@@ -118,30 +118,39 @@ class EvolutionLogger(LoggerAdapter):
                 self.error("An error occured in PlotEvolutionLive.py")
                 self.error(e)
 
-    def __init__(self, logger, config, explanation):
+    def __init__(self, logger, config, explanation, resume=False):
         super().__init__(logger)
         self.__config = config
         self.__config.add_logger(self)
-        self.__monitor_file = open(config.get_log_file(), "w")
+        # A resumed run appends to the logs of the run it continues, so the live plots keep its history
+        mode = "a" if resume else "w"
+        self.__monitor_file = open(config.get_log_file(), mode)
         self.__log_file = stdout
         self.__experiment_explanation = explanation
 
-        # Ensure the logs exists and have been cleared. Not happy with
+        # Ensure the logs exists and have been cleared (unless resuming). Not happy with
         # this method, but couldn't find a better way to do it.
-        open("workspace/alllivedata.log", "w").close()
-        open("workspace/bestlivedata.log", "w").close()
-        open("workspace/waveformlivedata.log", "w").close()
-        open("workspace/maplivedata.log", "w").close()
-        open("workspace/heatmaplivedata.log", "w").close()
-        open("workspace/pulselivedata.log", "w").close()
-        open("workspace/violinlivedata.log", "w").close()
-        open("workspace/poplivedata.log", "w").close()
-        open("workspace/randomizationdata.log", "w").close()
-        open("workspace/fitnesssensitivity.log", "w").close()
-        open("workspace/bitstream_avg.log", "w").close()
+        open("workspace/alllivedata.log", mode).close()
+        open("workspace/bestlivedata.log", mode).close()
+        open("workspace/waveformlivedata.log", mode).close()
+        open("workspace/maplivedata.log", mode).close()
+        open("workspace/heatmaplivedata.log", mode).close()
+        open("workspace/pulselivedata.log", mode).close()
+        open("workspace/violinlivedata.log", mode).close()
+        open("workspace/poplivedata.log", mode).close()
+        open("workspace/sampleslivedata.log", mode).close()
+        open("workspace/surrogatelivedata.log", mode).close()
+        open("workspace/telemetry.jsonl", mode).close()
+        open("workspace/randomizationdata.log", mode).close()
+        open("workspace/fitnesssensitivity.log", mode).close()
+        open("workspace/bitstream_avg.log", mode).close()
         if not exists("workspace/template"):
             mkdir("workspace/template")
 
+        # Waveforms stored by an earlier run would otherwise be plotted
+        if not resume and exists(config.get_waveform_directory()):
+            rmtree(config.get_waveform_directory())
+
         if exists("workspace/plots"):
             rmtree("workspace/plots")
         if not exists("workspace/plots"):
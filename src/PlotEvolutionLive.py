@@ -17,6 +17,7 @@ import math
 import numpy as np
 import sys
 from utilities import determine_color
+from WaveformStore import WaveformStore
 from os.path import exists
 from os import mkdir
 import argparse
@@ -195,17 +196,24 @@ def run():
 
 
     def animate_waveform(i):
-        graph_data = open('workspace/waveformlivedata.log','r').read()
-        lines = graph_data.split('\n')
         # 12-bit ADC on pico2-ice RP2350 (0-4095 maps to 0-3.3V)
         ADC_MAX = 4095
         xs = []
         ys = []
-        for line in lines:
-            if len(line) > 1:
-                x, y = line.split(',')
-                xs.append(int(x))
-                ys.append(float(y) * 3.3 / ADC_MAX)
+        # VARIANCE runs that receive waveforms store them in binary, the newest being the current best's
+        store = WaveformStore.open(config.get_waveform_directory())
+        if store is not None:
+            _, _, samples = store.latest()
+            xs = list(range(1, len(samples) + 1))
+            ys = (samples * 3.3 / ADC_MAX).tolist()
+        else:
+            graph_data = open('workspace/waveformlivedata.log','r').read()
+            lines = graph_data.split('\n')
+            for line in lines:
+                if len(line) > 1:
+                    x, y = line.split(',')
+                    xs.append(int(x))
+                    ys.append(float(y) * 3.3 / ADC_MAX)
         ax4.clear()
         if config.get_fitness_func() == "TONE_DISCRIMINATOR":
             ax4.set_xlim([0, 1000])
@@ -0,0 +1,182 @@
+"""
+Prescreen
+---------
+
+Cheap local scoring of offspring before they are sent to the hardware. A model trained on
+every circuit measured so far predicts the fitness of each offspring, and only the most
+promising fraction (and any predicted at or above a threshold) is measured, unless the model
+predicts it is dead. The rest take the predicted fitness, flagged with the "estimated"
+attribute, so that hardware evaluations are not spent on offspring that are almost certainly dead.
+"""
+import math
+from typing import List, Optional, Protocol, Set
+
+import numpy as np
+
+from Circuit.Circuit import Circuit
+from Config import Config
+from ga.diversity import bitstream_matrix
+from ga.surrogate import Surrogate
+
+class PrescreenModel(Protocol):
+    def ready(self) -> bool:
+        """Returns whether the model has seen enough measurements to make predictions"""
+
+    def observe(self, bits: np.ndarray, fitness: np.ndarray):
+        """Learns from measured circuits, given as a (circuits x bits) matrix and their fitness"""
+
+    def predict(self, bits: np.ndarray) -> np.ndarray:
+        """Returns the predicted fitness of each row of a (circuits x bits) matrix"""
+
+    def predict_dead(self, bits: np.ndarray) -> Optional[np.ndarray]:
+        """Returns the predicted probability that each row is a dead circuit, None if the model does not predict it"""
+        return None
+
+class NearestNeighbours(PrescreenModel):
+    """
+    Predicts the mean fitness of the k measured genomes closest in Hamming distance. Remembers
+    the last max_entries measurements, bit-packed in a ring so that the archive takes one bit
+    per genome bit.
+    """
+    # Bytes of XORed genomes popcounted at once when predicting
+    CHUNK_BYTES = 1 << 24
+
+    def __init__(self, k: int, max_entries: int):
+        self._k = k
+        self._max_entries = max_entries
+        self._bits: Optional[np.ndarray] = None
+        self._fitness = np.zeros(max_entries)
+        self._observed = 0
+
+    def ready(self):
+        return min(self._observed, self._max_entries) >= self._k
+
+    def observe(self, bits, fitness):
+        packed = np.packbits(np.asarray(bits, dtype=np.uint8), axis=1)
+        if self._bits is None:
+            self._bits = np.zeros((self._max_entries, packed.shape[1]), dtype=np.uint8)
+        # Only the last max_entries of this batch survive anyway
+        packed = packed[-self._max_entries:]
+        fitness = np.asarray(fitness)[-self._max_entries:]
+        slots = (self._observed + np.arange(len(packed))) % self._max_entries
+        self._bits[slots] = packed
+        self._fitness[slots] = fitness
+        self._observed += len(packed)
+
+    def predict(self, bits):
+        packed = np.packbits(np.asarray(bits, dtype=np.uint8), axis=1)
+        archive = self._bits[:min(self._observed, self._max_entries)]
+        distances = np.empty((len(packed), len(archive)), dtype=np.int64)
+        chunk = max(1, self.CHUNK_BYTES // max(1, len(packed) * archive.shape[1]))
+        for start in range(0, len(archive), chunk):
+            xor = packed[:, None, :] ^ archive[None, start:start + chunk, :]
+            distances[:, start:start + chunk] = np.bitwise_count(xor).sum(axis=2, dtype=np.int64)
+        nearest = np.argpartition(distances, self._k - 1, axis=1)[:, :self._k]
+        return self._fitness[nearest].mean(axis=1)
+
+    def predict_dead(self, bits):
+        return None
+
+class SurrogateModel(PrescreenModel):
+    """
+    Predicts with the population's surrogate. The population trains the surrogate itself, so
+    measurements passed to observe() are ignored.
+    """
+    def __init__(self, surrogate: Surrogate):
+        self._surrogate = surrogate
+
+    def ready(self):
+        return self._surrogate.ready()
+
+    def observe(self, bits, fitness):
+        pass
+
+    def predict(self, bits):
+        return self._surrogate.predict(bits)
+
+    def predict_dead(self, bits):
+        return self._surrogate.predict_dead(bits)
+
+def prescreen_model_fac(config: Config, surrogate: Surrogate = None) -> PrescreenModel:
+    match config.get_prescreen_model():
+        case "NEAREST_NEIGHBOURS":
+            return NearestNeighbours(config.get_prescreen_neighbours(), config.get_prescreen_archive_entries())
+        case "SURROGATE":
+            return SurrogateModel(surrogate)
+        case _:
+            raise Exception("Invalid pre-screen model selected.")
+
+class Prescreen:
+    """
+    Decides which offspring are measured on the hardware and estimates the fitness of the others
+    """
+    def __init__(self, model: PrescreenModel, fraction: float, threshold: Optional[float], dead_probability: float = 1.0):
+        """
+        Parameters
+        ----------
+        model : PrescreenModel
+            The model predicting the fitness of offspring
+        fraction : float
+            The fraction of offspring, best predicted first, that are measured
+        threshold : float | None
+            Predicted fitness at or above which offspring are always measured
+        dead_probability : float
+            Predicted probability of being dead at or above which offspring are never measured,
+            if the model predicts it
+        """
+        self._model = model
+        self._fraction = fraction
+        self._threshold = threshold
+        self._dead_probability = dead_probability
+
+    def screen(self, offspring: List[Circuit]) -> Set[Circuit]:
+        """
+        Predicts the fitness of the offspring and gives the predicted fitness to those that will not
+        be measured. Nothing is estimated until the model is ready.
+
+        Parameters
+        ----------
+        offspring : list[Circuit]
+            The circuits that may be left unmeasured
+
+        Returns
+        -------
+        set[Circuit]
+            The circuits whose fitness was estimated instead of measured
+        """
+        if not offspring or not self._model.ready():
+            return set()
+
+        bits = bitstream_matrix(offspring)
+        predictions = self._model.predict(bits)
+        order = np.argsort(-predictions, kind="stable")
+        measured = set(order[:int(math.ceil(self._fraction * len(offspring)))].tolist())
+        if self._threshold is not None:
+            measured.update(np.flatnonzero(predictions >= self._threshold).tolist())
+        dead = self._model.predict_dead(bits)
+        if dead is not None:
+            measured.difference_update(np.flatnonzero(dead >= self._dead_probability).tolist())
+
+        estimated = set()
+        for i, circuit in enumerate(offspring):
+            if i in measured:
+                continue
+            circuit.restore_fitness(float(predictions[i]), [])
+            circuit.set_file_attribute("estimated", "true")
+            estimated.add(circuit)
+        return estimated
+
+    def observe(self, measured: List[Circuit]):
+        """
+        Trains the model on circuits whose fitness was measured
+
+        Parameters
+        ----------
+        measured : list[Circuit]
+            The circuits, after their fitness was calculated
+        """
+        if not measured:
+            return
+        self._model.observe(bitstream_matrix(measured), np.array([c.get_fitness() for c in measured], dtype=np.float64))
+        for circuit in measured:
+            circuit.set_file_attribute("estimated", "false")
@@ -0,0 +1,97 @@
+"""
+Racing
+------
+
+Adaptive sample counts for elite based selection. Instead of measuring every circuit
+NUM_PASSES times, every circuit is measured for a few passes first, then only the circuits
+whose 95% confidence interval still straddles the elite cutoff (the fitness between the last
+elite and the first circuit that is not one) are measured again, until they are clearly on
+one side of it or reach NUM_PASSES passes. Circuits that are clearly hopeless or clearly
+elite stop early, so selection sees the same elites for a fraction of the device time.
+"""
+import math
+from typing import Dict, List
+
+from Circuit.Circuit import Circuit
+from FitnessMemo import CONFIDENCE_Z, FitnessRecord
+
+class Race:
+    """
+    The fitness of every pass measured for the circuits of one generation
+    """
+    def __init__(self, n_elites: int, max_passes: int):
+        """
+        Parameters
+        ----------
+        n_elites : int
+            The number of circuits selection keeps as elites
+        max_passes : int
+            The most passes any circuit is measured for
+        """
+        self._n_elites = n_elites
+        self._max_passes = max_passes
+        self.records: Dict[Circuit, FitnessRecord] = {}
+
+    def add(self, circuit: Circuit):
+        """Adds the fitness the circuit's current data was calculated to as one more pass"""
+        record = self.records.get(circuit)
+        if record is None:
+            record = FitnessRecord()
+            self.records[circuit] = record
+        record.add(circuit.get_fitness(), circuit._data, record.count)
+
+    def passes(self, circuit: Circuit) -> int:
+        """Returns the number of passes a circuit was measured for, 0 if it is not racing"""
+        record = self.records.get(circuit)
+        return record.count if record is not None else 0
+
+    def _half_width(self, record: FitnessRecord, pooled_variance: float) -> float:
+        if record.count >= 2:
+            return record.confidence_half_width()
+        if math.isnan(pooled_variance):
+            return math.inf
+        # A single pass says nothing about its own noise, so borrow that of the other circuits
+        return CONFIDENCE_Z * math.sqrt(pooled_variance / record.count)
+
+    def contenders(self, circuits: List[Circuit]) -> List[Circuit]:
+        """
+        Returns the racing circuits that need another pass
+
+        Parameters
+        ----------
+        circuits : list[Circuit]
+            Every circuit in the population. Those that are not racing (their fitness was reused)
+            count toward the cutoff with their current fitness.
+
+        Returns
+        -------
+        list[Circuit]
+            The circuits whose confidence interval contains the elite cutoff and that were measured
+            for fewer than max_passes passes
+        """
+        if not 0 < self._n_elites < len(circuits):
+            return []
+
+        means = {
+            c: self.records[c].mean if c in self.records else c.get_fitness()
+            for c in circuits
+        }
+        ranked = sorted(means.values(), reverse=True)
+        cutoff = (ranked[self._n_elites - 1] + ranked[self._n_elites]) / 2
+
+        variances = [r.variance() for r in self.records.values() if r.count >= 2]
+        pooled_variance = sum(variances) / len(variances) if variances else math.nan
+
+        contenders = []
+        for circuit in circuits:
+            record = self.records.get(circuit)
+            if record is None or record.count >= self._max_passes:
+                continue
+            if abs(record.mean - cutoff) <= self._half_width(record, pooled_variance):
+                contenders.append(circuit)
+        return contenders
+
+    def finish(self):
+        """Sets the fitness of every racing circuit to its mean over all of its passes"""
+        for circuit, record in self.records.items():
+            circuit.restore_fitness(record.mean, [point for data in record.measurements for point in data])
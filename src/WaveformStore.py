@@ -0,0 +1,190 @@
+"""
+WaveformStore
+-------------
+
+Append-only binary storage of the waveforms returned by VARIANCE evaluations. Waveforms are kept
+as NumPy arrays of ADC samples in a memory-mapped .npy file used as a ring: once it holds capacity
+waveforms, the oldest are overwritten. An index .npy beside it records the generation, circuit and
+length of the waveform in each slot, so waveforms can be looked up by circuit and generation, and
+the live waveform plot reads the newest one straight from the files. Text logs of a waveform are
+only written on demand (see write_waveform_log()).
+"""
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import numpy as np
+from numpy.lib.format import open_memmap
+
+from Config import Config
+
+# ADC samples are at most 12 bits
+SAMPLE_DTYPE = np.uint16
+SAMPLES_FILENAME = "waveforms.npy"
+INDEX_FILENAME = "waveforms_index.npy"
+# sequence is the order waveforms were appended in, -1 for empty slots
+INDEX_DTYPE = np.dtype([
+    ("sequence", np.int64),
+    ("generation", np.int32),
+    ("circuit", np.int32),
+    ("length", np.int32),
+])
+
+def as_samples(samples) -> np.ndarray:
+    """Returns waveform samples (a list of numbers or of their strings) as an array of SAMPLE_DTYPE"""
+    array = np.asarray(samples)
+    if array.dtype.kind in "US":
+        array = array.astype(np.float64)
+    return np.clip(np.round(array), 0, np.iinfo(SAMPLE_DTYPE).max).astype(SAMPLE_DTYPE)
+
+def write_waveform_log(path, samples: np.ndarray):
+    """Writes a waveform as the text log read by older tools: one "index, sample" line per sample"""
+    with open(path, "w") as log:
+        log.writelines(f"{i}, {sample}\n" for i, sample in enumerate(samples.tolist(), 1))
+
+class WaveformStore:
+    """
+    The ring of waveforms in a directory
+    """
+    def __init__(self, directory: Path, capacity: int):
+        """
+        Starts an empty store, replacing any waveforms already in the directory. The files are
+        created once the first waveform is appended, sized by its number of samples.
+
+        Parameters
+        ----------
+        directory : Path
+            The directory the store's files are in
+        capacity : int
+            The number of waveforms kept before the oldest are overwritten
+        """
+        self._directory = Path(directory)
+        self._capacity = capacity
+        self._samples: Optional[np.ndarray] = None
+        self._index: Optional[np.ndarray] = None
+        self._appended = 0
+        self._directory.mkdir(parents=True, exist_ok=True)
+        for filename in (SAMPLES_FILENAME, INDEX_FILENAME):
+            (self._directory / filename).unlink(missing_ok=True)
+
+    @classmethod
+    def _load(cls, directory: Path, mode: str) -> Optional["WaveformStore"]:
+        """Maps the files of the store in a directory, None if they were not created yet"""
+        try:
+            index = np.load(directory / INDEX_FILENAME, mmap_mode=mode)
+            samples = np.load(directory / SAMPLES_FILENAME, mmap_mode=mode)
+        except (FileNotFoundError, ValueError):
+            # ValueError: the files are being created
+            return None
+        if len(index) == 0:
+            return None
+        store = cls.__new__(cls)
+        store._directory = directory
+        store._capacity = len(index)
+        store._samples = samples
+        store._index = index
+        store._appended = int(index["sequence"].max()) + 1
+        return store
+
+    @classmethod
+    def open(cls, directory: Path) -> Optional["WaveformStore"]:
+        """Opens the store in a directory read only, None if no waveform was appended to it yet"""
+        store = cls._load(Path(directory), "r")
+        if store is None or store._appended == 0:
+            return None
+        return store
+
+    @classmethod
+    def resume(cls, directory: Path, capacity: int, generation: int) -> "WaveformStore":
+        """
+        Reopens the store in a directory to append to it when a run is resumed. The waveforms of
+        generations after generation, which the resumed run measures again, are dropped. Starts an
+        empty store if the directory has none.
+
+        Parameters
+        ----------
+        directory : Path
+            The directory the store's files are in
+        capacity : int
+            The number of waveforms kept before the oldest are overwritten, if a new store is started
+        generation : int
+            The generation the run is resumed from
+        """
+        store = cls._load(Path(directory), "r+")
+        if store is None:
+            return cls(directory, capacity)
+        sequence = store._index["sequence"]
+        sequence[store._index["generation"] > generation] = -1
+        store._appended = int(sequence.max()) + 1
+        return store
+
+    def _create(self, length: int):
+        self._samples = open_memmap(self._directory / SAMPLES_FILENAME, mode="w+", dtype=SAMPLE_DTYPE, shape=(self._capacity, length))
+        index = open_memmap(self._directory / INDEX_FILENAME, mode="w+", dtype=INDEX_DTYPE, shape=(self._capacity,))
+        index["sequence"] = -1
+        self._index = index
+
+    def append(self, generation: int, circuit: int, samples) -> bool:
+        """
+        Stores the waveform of a circuit in a generation, overwriting the oldest if the store is full
+
+        Returns
+        -------
+        bool
+            False if the waveform had more samples than the first one appended, in which case
+            only that many are stored
+        """
+        samples = as_samples(samples)
+        if self._samples is None:
+            self._create(len(samples))
+        width = self._samples.shape[1]
+        slot = self._appended % self._capacity
+        stored = samples[:width]
+        self._samples[slot, :len(stored)] = stored
+        # The index is written last so readers never see a slot before its samples
+        self._index[slot] = (self._appended, generation, circuit, len(stored))
+        self._appended += 1
+        return len(samples) <= width
+
+    def flush(self):
+        """Writes appended waveforms to disk"""
+        if self._samples is not None:
+            self._samples.flush()
+            self._index.flush()
+
+    def __len__(self) -> int:
+        return min(self._appended, self._capacity)
+
+    def _waveform(self, slot: int) -> np.ndarray:
+        return np.array(self._samples[slot, :self._index[slot]["length"]])
+
+    def get(self, generation: int, circuit: int) -> Optional[np.ndarray]:
+        """Returns the newest waveform of a circuit in a generation, None if it is not stored (any more)"""
+        if self._index is None:
+            return None
+        slots = np.flatnonzero((self._index["sequence"] >= 0) & (self._index["generation"] == generation) & (self._index["circuit"] == circuit))
+        if len(slots) == 0:
+            return None
+        return self._waveform(slots[np.argmax(self._index["sequence"][slots])])
+
+    def latest(self) -> Optional[Tuple[int, int, np.ndarray]]:
+        """Returns the generation, circuit and samples of the newest waveform, None if there is none"""
+        if self._index is None or self._appended == 0:
+            return None
+        slot = int(np.argmax(self._index["sequence"]))
+        return int(self._index[slot]["generation"]), int(self._index[slot]["circuit"]), self._waveform(slot)
+
+    def entries(self) -> List[Tuple[int, int]]:
+        """Returns the generation and circuit of every stored waveform, oldest first"""
+        if self._index is None:
+            return []
+        slots = [slot for slot in np.argsort(self._index["sequence"]) if self._index[slot]["sequence"] >= 0]
+        return [(int(self._index[slot]["generation"]), int(self._index[slot]["circuit"])) for slot in slots]
+
+def waveform_store_fac(config: Config, resume_generation: Optional[int] = None) -> WaveformStore:
+    """
+    Builds an empty store in the directory set in the config, or reopens the store there if the run
+    is resumed from resume_generation
+    """
+    if resume_generation is not None:
+        return WaveformStore.resume(config.get_waveform_directory(), config.get_waveform_store_capacity(), resume_generation)
+    return WaveformStore(config.get_waveform_directory(), config.get_waveform_store_capacity())
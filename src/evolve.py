@@ -69,6 +69,8 @@ parser.add_argument('-cw','--clear-workers', action='store_true', default=False,
                     help="Clear stale worker records from iCEFARM database before reserving devices.")
 parser.add_argument('-st','--speedtest', action='store_true', default=False,
                     help="Record per-generation timing data to workspace/speedtest.csv for performance comparison.")
+parser.add_argument('-r','--resume', type=str, default=None,
+                    help="Continue the run saved in this checkpoint file (see checkpoint_file in the config) instead of starting a new population.")
 # --help is added by default
 
 def run():
@@ -99,7 +101,8 @@ def run():
         built_config_path=          BUILT_CONFIG_PATH,
         print_action_only=          __args.print_only,
         clear_workers=              __args.clear_workers,
-        speedtest=                  __args.speedtest
+        speedtest=                  __args.speedtest,
+        resume_checkpoint_path=     __args.resume
     )
 
 if __name__ == "__main__":
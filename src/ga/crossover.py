@@ -1,43 +1,92 @@
+from abc import abstractmethod
 from logging import Logger
 from typing import Protocol, TYPE_CHECKING, Tuple, List
 
+import numpy as np
+
 from Circuit.Circuit import Circuit
+from Circuit.FileBasedCircuit import FileBasedCircuit
+from Circuit.ModifiableIndex import ModifiableIndex
 from Config import Config
 
 if TYPE_CHECKING:
-    import numpy as np
     from CircuitPopulation import CircuitPopulation
 
 class Crossover(Protocol):
     def __call__(self, source: Circuit, dest: Circuit) -> bool:
         """Returns whether a crossover was performed."""
 
-class SimpleCrossover(Crossover):
-    def __init__(self, config: Config, rand: "np.random.Generator"):
-        self._rand = rand
-        self._prob = config.get_crossover_probability()
-        self._row_bounds = config.get_routing_rows()[0], config.get_routing_rows()[-1]
-
-    def __call__(self, source: Circuit, dest: Circuit) -> bool:
-        if self._rand.uniform(0, 1) <= self._prob:
-            point = self._rand.integers(*self._row_bounds)
-            dest.crossover(source, point)
-            return True
+    def batch(self, pairs: List[Tuple[Circuit, Circuit]]) -> List[bool]:
+        """
+        Crosses every (source, dest) pair of a generation.
+        Implementations may read every source before writing any dest.
 
-        return False
+        Returns
+        -------
+        list[bool]
+            Whether a crossover was performed on each pair
+        """
+        return [self(source, dest) for source, dest in pairs]
 
-class EachCrossover(Crossover):
+class TableCrossover(Crossover):
+    """
+    Base class of the crossovers that operate on the tile offset table: each crossover is described by a
+    (tiles, rows) mask over the modifiable rows of every modifiable tile, and a batch of crossovers is
+    applied to the population genome as one vectorized copy.
+    """
     def __init__(self, config: Config, rand: "np.random.Generator"):
         self._rand = rand
         self._prob = config.get_crossover_probability()
         self._row_bounds = config.get_routing_rows()[0], config.get_routing_rows()[-1]
 
-    def __call__(self, source: Circuit, dest: Circuit) -> bool:
-        if self._rand.uniform(0, 1) <= self._prob:
-            dest.crossover_each(source, self._row_bounds, self._rand)
-            return True
+    @abstractmethod
+    def _masks(self, n: int, index: ModifiableIndex) -> "np.ndarray":
+        """Returns n crossover masks of shape (tiles, rows)"""
+        pass
 
-        return False
+    def __call__(self, source: Circuit, dest: Circuit) -> bool:
+        return self.batch([(source, dest)])[0]
+
+    def batch(self, pairs: List[Tuple[Circuit, Circuit]]) -> List[bool]:
+        performed = list(self._rand.uniform(0, 1, len(pairs)) <= self._prob)
+        crossed = [pair for pair, done in zip(pairs, performed) if done]
+
+        table_pairs = [pair for pair in crossed if isinstance(pair[1], FileBasedCircuit)]
+        if table_pairs:
+            sources, dests = map(list, zip(*table_pairs))
+            masks = self._masks(len(dests), dests[0].get_genome_index())
+            FileBasedCircuit.crossover_batch(sources, dests, masks)
+
+        # Circuits without a hardware file (i.e. FullySimCircuit) only support point crossover
+        for source, dest in crossed:
+            if not isinstance(dest, FileBasedCircuit):
+                dest.crossover(source, self._rand.integers(*self._row_bounds))
+
+        return performed
+
+class SimpleCrossover(TableCrossover):
+    """Copies the same (randomly chosen) modifiable row of every tile"""
+    def _masks(self, n, index):
+        points = self._rand.integers(*self._row_bounds, size=n)
+        return index.point_mask(np.repeat(points[:, None], index.num_tiles, axis=1))
+
+class EachCrossover(TableCrossover):
+    """Copies a randomly chosen modifiable row of each tile, chosen separately for every tile"""
+    def _masks(self, n, index):
+        return index.point_mask(self._rand.integers(*self._row_bounds, size=(n, index.num_tiles)))
+
+class UniformCrossover(TableCrossover):
+    """Copies each modifiable row of each tile with probability 1/2"""
+    def _masks(self, n, index):
+        return self._rand.random((n, index.num_tiles, len(index.rows))) < 0.5
+
+class TwoPointCrossover(TableCrossover):
+    """Copies every modifiable row of a randomly chosen contiguous run of tiles"""
+    def _masks(self, n, index):
+        points = np.sort(self._rand.integers(0, index.num_tiles + 1, size=(n, 2)), axis=1)
+        tiles = np.arange(index.num_tiles)
+        in_run = (tiles >= points[:, :1]) & (tiles < points[:, 1:])
+        return np.repeat(in_run[:, :, None], len(index.rows), axis=2)
 
 class ConvergenceProportionalCrossover(Crossover):
     """
@@ -74,6 +123,17 @@ class ConvergenceProportionalCrossover(Crossover):
 def crossover_fac(population: "CircuitPopulation", config: Config, logger: Logger, rand: "np.random.Generator"):
     def build():
         # return ConvergenceProportionalCrossover(population, config, logger, rand)
-        return SimpleCrossover(config, rand)
+        match config.get_crossover_type():
+            case "SINGLE_POINT":
+                return SimpleCrossover(config, rand)
+            case "EACH":
+                return EachCrossover(config, rand)
+            case "UNIFORM":
+                return UniformCrossover(config, rand)
+            case "TWO_POINT":
+                return TwoPointCrossover(config, rand)
+            case _:
+                logger.error("Invalid crossover type")
+                raise Exception("Invalid crossover type")
 
     return build
@@ -5,6 +5,26 @@ from Config import Config
 
 import numpy as np
 
+def bitstream_matrix(circuits: List[Circuit]) -> np.ndarray:
+    """
+    Returns the bitstreams of the circuits as a (circuits x bits) matrix.
+    Reads rows straight out of the population genome when every circuit is bound to it.
+    """
+    genome = circuits[0].get_genome() if len(circuits) > 0 else None
+    if genome is not None and all(c.get_genome() is genome for c in circuits):
+        return genome.bits[[c.get_genome_row() for c in circuits]]
+    return np.array([c.get_bitstream() for c in circuits])
+
+def genome_hashes(circuits: List[Circuit]) -> List[int]:
+    """
+    Returns the Zobrist hash of each circuit's bitstream (see Circuit.get_genome_hash).
+    Reads them straight out of the population genome when every circuit is bound to it.
+    """
+    genome = circuits[0].get_genome() if len(circuits) > 0 else None
+    if genome is not None and all(c.get_genome() is genome for c in circuits):
+        return genome.hashes[[c.get_genome_row() for c in circuits]].tolist()
+    return [c.get_genome_hash() for c in circuits]
+
 class DiversityMeasure(Protocol):
     def __call__(self, circuits: List[Circuit]) -> float:
         """Measures and returns diversity of circuits."""
@@ -14,31 +34,17 @@ class HammingDistanceDiversity(DiversityMeasure):
         self._logger = logger
 
     def __call__(self, circuits):
-        running_total = 0
         n = len(circuits)
         num_pairs = n * (n-1) / 2
 
         self._logger.event(4, "Starting Hamming Distance Calculation")
-        bitstreams = [c.get_bitstream() for c in circuits]
-
-        # We now have all the bitstreams, we can do the faster hamming calculation by comparing each bit of them
-        # Then we multiply the count of 1s for that bit by the count of 0s for that bit and add it to the running_total
-        # Divide that by # of pairs at the end (calculation shown below)
-        # TODO do this with numpy
-        running_total = 0
-        n = len(circuits)
-        num_pairs = n * (n-1) / 2
-        self._logger.event(4, "HDIST - Entering loop")
-        for i in range(len(bitstreams[0])):
-            ones_count = 0
-            zero_count = 0
-            for j in range(n):
-                if bitstreams[j][i] == 0:
-                    zero_count = zero_count + 1
-                else:
-                    ones_count = ones_count + 1
-            running_total = running_total + ones_count * zero_count
+        bitstreams = bitstream_matrix(circuits)
 
+        # For each bit, every pair made of a circuit with a 1 and a circuit with a 0 differs in that bit,
+        # so the total distance is the sum over bits of (count of 1s) * (count of 0s)
+        # Divide that by # of pairs at the end
+        ones_count = bitstreams.sum(axis=0, dtype=np.int64)
+        running_total = int((ones_count * (n - ones_count)).sum())
         running_total = running_total / num_pairs
         self._logger.event(4, "HDIST - Final value", running_total)
         return running_total
@@ -57,8 +63,7 @@ class CountUniqueDiversity(DiversityMeasure):
             Number of unique circuits in the population
 
         """
-        bitstreams = np.array([c.get_bitstream() for c in circuits])
-        unique = np.unique(bitstreams, axis=0).shape[0]
+        unique = len(set(genome_hashes(circuits)))
         self._logger.event(2, "Number of Unique Individuals:", unique)
         return int(unique)
 
@@ -68,7 +73,7 @@ class CountDifferingBitsDiversity(DiversityMeasure):
 
     def __call__(self, circuits):
         l = len(circuits)
-        sums = np.array([c.get_bitstream() for c in circuits]).sum(axis=0)
+        sums = bitstream_matrix(circuits).sum(axis=0)
         different = (sums != 0) & (sums != l)
         return int(different.sum())
 
@@ -0,0 +1,148 @@
+from functools import lru_cache
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from Circuit.ModifiableIndex import ModifiableIndex
+
+# Seed of the Zobrist keys, fixed so that a genome hashes the same in every run
+ZOBRIST_SEED = 0x2B1C3
+
+@lru_cache(maxsize=None)
+def zobrist_keys(length: int) -> np.ndarray:
+    """Returns the random 64-bit key of each bit of a genome of the provided length"""
+    return np.random.default_rng(ZOBRIST_SEED).integers(0, 2**64, length, dtype=np.uint64)
+
+def zobrist_hash(bits: np.ndarray) -> int:
+    """
+    Returns the 64-bit Zobrist hash of a genome: the XOR of the keys of its set bits. Flipping a
+    bit XORs its key into the hash, so the hash can be updated in O(flipped bits).
+    """
+    keys = zobrist_keys(bits.shape[-1])
+    return int(np.bitwise_xor.reduce(keys[np.asarray(bits, dtype=bool)]))
+
+class PopulationGenome:
+    """
+    In-memory store of the modifiable bits of every circuit in a population.
+    Each circuit owns one row of an N x L uint8 matrix (one 0/1 value per modifiable bit),
+    laid out tile by tile, then row by row, then column by column, matching the order of
+    a ModifiableIndex. Mutation, crossover and cloning are performed on these rows; a
+    circuit only writes its row back to its hardware file when the file is needed.
+    Each row also has a Zobrist hash (see zobrist_hash), updated with every change to the row,
+    so identical genomes can be found without comparing their bits.
+    """
+
+    def __init__(self, size: int, num_tiles: int, num_rows: int, num_columns: int):
+        """
+        Parameters
+        ----------
+        size : int
+            Number of circuits (rows) in the population
+        num_tiles : int
+            Number of modifiable logic tiles
+        num_rows : int
+            Number of modifiable rows in each tile
+        num_columns : int
+            Number of modifiable columns in each row
+        """
+        self.shape = (num_tiles, num_rows, num_columns)
+        self.length = num_tiles * num_rows * num_columns
+        self.bits = np.zeros((size, self.length), dtype=np.uint8)
+        # Rows that have changed since they were last written to their hardware file
+        self.dirty = np.zeros(size, dtype=bool)
+        self.keys = zobrist_keys(self.length)
+        self.hashes = np.zeros(size, dtype=np.uint64)
+
+    @staticmethod
+    def for_index(size: int, index: "ModifiableIndex") -> "PopulationGenome":
+        """Creates a genome whose rows hold every bit of the provided index."""
+        return PopulationGenome(size, index.num_tiles, len(index.rows), len(index.columns))
+
+    def __len__(self):
+        return self.bits.shape[0]
+
+    def tiles(self, row: int) -> np.ndarray:
+        """Returns a (tiles, rows, columns) view of a row."""
+        return self.bits[row].reshape(self.shape)
+
+    def _flip_hashes(self, rows: np.ndarray, columns: np.ndarray):
+        """Updates the hashes of rows whose bits at the (row, column) pairs were flipped"""
+        np.bitwise_xor.at(self.hashes, rows, self.keys[columns])
+
+    def set_row(self, row: int, bits: np.ndarray):
+        """Replaces every bit of a row."""
+        self.bits[row] = bits
+        self.hashes[row] = zobrist_hash(self.bits[row])
+        self.dirty[row] = True
+
+    def copy_row(self, source: int, dest: int):
+        self.bits[dest] = self.bits[source]
+        self.hashes[dest] = self.hashes[source]
+        self.dirty[dest] = True
+
+    def mutate_row(self, row: int, chance: float, rand: "np.random.Generator"):
+        """Flips each bit of the row with the provided probability."""
+        flips = rand.random(self.length) < chance
+        self.bits[row] ^= flips
+        self.hashes[row] ^= np.bitwise_xor.reduce(self.keys[flips])
+        self.dirty[row] = True
+
+    def mutate_rows(self, rows: np.ndarray, chances: np.ndarray, rand: "np.random.Generator"):
+        """
+        Flips each bit of several rows at once. Rather than drawing a mask over every bit, the number
+        of flips of each row is drawn from its binomial distribution and then that many distinct
+        positions, which flips each bit with the row's chance while drawing only the flipped positions.
+
+        Parameters
+        ----------
+        rows : np.ndarray
+            Distinct genome rows to mutate
+        chances : np.ndarray
+            The probability of flipping each bit, one per row
+        rand : np.random.Generator
+            Generator the mask is drawn with
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        if rows.size == 0:
+            return
+        chances = np.asarray(chances, dtype=float)
+        counts = rand.binomial(self.length, chances)
+        flipped_columns = np.concatenate([rand.choice(self.length, count, replace=False) for count in counts])
+        flipped_rows = np.repeat(rows, counts)
+        # Positions are distinct within a row, so no bit is flipped twice
+        self.bits[flipped_rows, flipped_columns] ^= 1
+        self._flip_hashes(flipped_rows, flipped_columns)
+        self.dirty[rows] = True
+
+    def randomize_row(self, row: int, rand: "np.random.Generator"):
+        self.set_row(row, rand.integers(0, 2, self.length, dtype=np.uint8))
+
+    def crossover_rows(self, sources: np.ndarray, dests: np.ndarray, masks: np.ndarray):
+        """
+        Copies the selected modifiable rows of each tile from the source circuits into the destination circuits.
+        Every source is read before any destination is written, so a circuit may be both a source and a
+        destination in the same call.
+
+        Parameters
+        ----------
+        sources : np.ndarray
+            Genome rows of the circuits to copy from
+        dests : np.ndarray
+            Genome rows of the circuits to copy into, one per source
+        masks : np.ndarray
+            bool array of shape (pairs, tiles, rows), True for each modifiable row to copy
+        """
+        sources = np.asarray(sources, dtype=np.int64)
+        dests = np.asarray(dests, dtype=np.int64)
+        if dests.size == 0:
+            return
+        parents = self.bits[sources].reshape((dests.size,) + self.shape)
+        children = self.bits[dests].reshape((dests.size,) + self.shape)
+        np.copyto(children, parents, where=np.asarray(masks, dtype=bool)[..., None])
+        children = children.reshape(dests.size, self.length)
+        # Only the bits in which the children differ from their old selves change their hashes
+        changed_pairs, changed_columns = np.nonzero(children != self.bits[dests])
+        self.bits[dests] = children
+        self._flip_hashes(dests[changed_pairs], changed_columns)
+        self.dirty[dests] = True
@@ -0,0 +1,111 @@
+from collections import namedtuple
+from typing import Dict, List, Optional
+
+from Circuit.FileBasedCircuit import FileBasedCircuit
+from FitnessMemo import FitnessMemo
+from ga.selection.SelectionMethod import SelectionMethod
+
+# A copy of a circuit sent from one island to another
+Migrant = namedtuple("Migrant", ["bitstream", "fitness", "data", "src_population"])
+
+class Island:
+    """
+    One subpopulation of island evolution. An island is evaluated on its own subset of the reserved
+    devices and runs its own selection, so it moves on to its next generation as soon as its own
+    circuits return. Circuits sent by other islands wait in its inbox until its next selection.
+    """
+    def __init__(self, index: int, circuits: List[FileBasedCircuit], selection: SelectionMethod, memo: Optional[FitnessMemo]):
+        """
+        Parameters
+        ----------
+        index : int
+            The island number, also used as the src_population of the circuits that start on it
+        circuits : list[FileBasedCircuit]
+            The circuits of the island
+        selection : SelectionMethod
+            Selection run on the island's circuits
+        memo : FitnessMemo | None
+            Remembered fitness of the island's genomes, if the re-evaluation policy uses one
+        """
+        self.index = index
+        self.circuits = circuits
+        self.selection = selection
+        self.memo = memo
+        self.serials: List[str] = []
+        self.generation = 0
+        self.inbox: List[Migrant] = []
+
+        # Circuits measured in the current generation, and those that have not returned yet
+        self.to_measure: List[FileBasedCircuit] = []
+        self.late = set()
+        self.failed = False
+
+    def __repr__(self):
+        return f"island{self.index}"
+
+    def ranked(self) -> List[FileBasedCircuit]:
+        """Returns the island's circuits, fittest first"""
+        return sorted(self.circuits, key=lambda c: c.get_fitness(), reverse=True)
+
+    def emigrants(self, size: int) -> List[Migrant]:
+        """
+        Copies the island's best circuits
+
+        Parameters
+        ----------
+        size : int
+            The number of circuits to copy
+
+        Returns
+        -------
+        list[Migrant]
+            The copies, fittest first
+        """
+        return [
+            Migrant(c.get_bitstream(), c.get_fitness(), list(c._data), c.get_file_attribute("src_population"))
+            for c in self.ranked()[:size]
+        ]
+
+    def immigrate(self) -> List[FileBasedCircuit]:
+        """
+        Replaces the least fit circuits of the island with the migrants in its inbox. The island's
+        best circuit is never replaced, so at most all but one of its circuits are.
+
+        Returns
+        -------
+        list[FileBasedCircuit]
+            The circuits that now hold migrants
+        """
+        migrants = sorted(self.inbox, key=lambda m: m.fitness, reverse=True)[:len(self.circuits) - 1]
+        self.inbox = []
+        replaced = self.ranked()[len(self.circuits) - len(migrants):]
+        for circuit, migrant in zip(reversed(replaced), migrants):
+            circuit.set_bitstream(migrant.bitstream)
+            circuit.restore_fitness(migrant.fitness, migrant.data)
+            if migrant.src_population is not None:
+                circuit.set_file_attribute("src_population", migrant.src_population)
+        return replaced
+
+def migration_destinations(topology: str, count: int) -> Dict[int, List[int]]:
+    """
+    Returns the islands each island sends its migrants to
+
+    Parameters
+    ----------
+    topology : str
+        RING or FULLY_CONNECTED
+    count : int
+        The number of islands
+
+    Returns
+    -------
+    dict[int, list[int]]
+        Destination island indices by source island index
+    """
+    match topology:
+        case "RING":
+            return {i: [(i + 1) % count] if count > 1 else [] for i in range(count)}
+        case "FULLY_CONNECTED":
+            return {i: [j for j in range(count) if j != i] for i in range(count)}
+        case _:
+            raise Exception("Invalid migration topology")
@@ -2,19 +2,28 @@ from logging import Logger
 from typing import Protocol, List, Tuple, TYPE_CHECKING
 from Circuit.Circuit import Circuit
 from Config import Config
+from ga.diversity import bitstream_matrix
 from ga.selection import SelectionMethod
 
 if TYPE_CHECKING:
     import numpy as np
+    from ga.surrogate import Surrogate
 
 class Mixin(Protocol):
     def __call__(self, circuits: List[Circuit], selection: SelectionMethod): ...
 
+    def get_state(self) -> dict:
+        """Returns the state the mixin carries from one generation to the next"""
+        return {}
+
+    def set_state(self, state: dict):
+        """Restores a state returned by get_state()"""
+
 class RandomInjection(Mixin):
     """Completely randomize the lowest few circuits of each generation."""
-    def __init__(self, config: Config):
+    def __init__(self, config: Config, population_size: int):
         super().__init__()
-        self._amount = int(config.get_random_injection() * config.get_population_size())
+        self._amount = int(config.get_random_injection() * population_size)
 
     def __call__(self, circuits, selection):
         circuits_to_randomize = circuits[-self._amount:]
@@ -27,7 +36,7 @@ class ChaosInjection(Mixin):
     If progress stalls, perform large mutations on a portion of the population. Ignores the
     top circuit.
     """
-    def __init__(self, config: Config, logger: Logger, rand: "np.random.Generator"):
+    def __init__(self, config: Config, logger: Logger, rand: "np.random.Generator", population_size: int):
         super().__init__()
         self._rand = rand
         self._top_fitness = 0
@@ -35,7 +44,7 @@ class ChaosInjection(Mixin):
         self._logger = logger
 
         self._generation_threshold = 5
-        self._amount_circuits = int(0.1 * config.get_population_size())
+        self._amount_circuits = int(0.1 * population_size)
         self._mutation_chance = config.get_chaos_injection() * config.get_mutation_probability()
 
     def __call__(self, circuits, selection):
@@ -55,15 +64,56 @@ class ChaosInjection(Mixin):
         for circuit in self._rand.choice(non_protected, self._amount_circuits):
             circuit.mutate(chance=self._mutation_chance)
 
-def mixin_fac(config: Config, logger: Logger, rand: "np.random.Generator") -> Tuple[List[Mixin], List[Mixin]]:
+    def get_state(self):
+        return {
+            "top_fitness": self._top_fitness,
+            "generations_without_increase": self._generations_without_increase
+        }
+
+    def set_state(self, state):
+        self._top_fitness = state["top_fitness"]
+        self._generations_without_increase = state["generations_without_increase"]
+
+class SurrogateBias(Mixin):
+    """
+    Mutates offspring again, up to a few times, while the surrogate predicts they are dead
+    """
+    def __init__(self, surrogate: "Surrogate", dead_probability: float, logger: Logger, attempts: int = 3):
+        super().__init__()
+        self._surrogate = surrogate
+        self._dead_probability = dead_probability
+        self._logger = logger
+        self._attempts = attempts
+
+    def __call__(self, circuits: List[Circuit], selection: SelectionMethod):
+        if not self._surrogate.ready():
+            return
+        offspring = [c for c in circuits if c not in selection.protected]
+        for _ in range(self._attempts):
+            if not offspring:
+                break
+            dead = self._surrogate.predict_dead(bitstream_matrix(offspring)) >= self._dead_probability
+            offspring = [c for c, is_predicted_dead in zip(offspring, dead) if is_predicted_dead]
+            if offspring:
+                self._logger.event(3, f"Mutating {len(offspring)} offspring predicted dead again")
+            for circuit in offspring:
+                circuit.mutate()
+
+def mixin_fac(config: Config, logger: Logger, rand: "np.random.Generator", population_size: int = None, surrogate: "Surrogate" = None) -> Tuple[List[Mixin], List[Mixin]]:
+    if population_size is None:
+        population_size = config.get_population_size()
     before = []
     after = []
 
     if config.get_random_injection() > 0:
-        after.append(RandomInjection(config))
+        after.append(RandomInjection(config, population_size))
 
     if config.get_chaos_injection() > 0:
-        after.append(ChaosInjection(config, logger, rand))
+        after.append(ChaosInjection(config, logger, rand, population_size))
+
+    # Runs last, so that offspring changed by the other mixins are checked too
+    if surrogate is not None and config.get_surrogate_bias():
+        after.append(SurrogateBias(surrogate, config.get_surrogate_dead_probability(), logger))
 
     return before, after
 
@@ -1,7 +1,10 @@
+from abc import abstractmethod
+from concurrent.futures import ThreadPoolExecutor
 from logging import Logger
 from typing import Protocol, List, Set, TYPE_CHECKING
 from Config import Config
 from Circuit.Circuit import Circuit
+from Circuit.FileBasedCircuit import FileBasedCircuit
 
 if TYPE_CHECKING:
     import numpy as np
@@ -12,84 +15,148 @@ class Mutation(Protocol):
     def __call__(self, all_circuits: List[Circuit], circuits_to_mutate: Set[Circuit]):
         """Performs an in place mutation on a list of circuits."""
 
-class SimpleMutation(Mutation):
+def mutate_circuits(circuits: List[Circuit], chances: List[float], rand: "np.random.Generator", workers: int):
+    """
+    Mutates a batch of circuits, each with its own chance of flipping each bit.
+    Circuits whose bits are held in a population genome are mutated with a single mask draw over
+    their rows; circuits backed only by a hardware file are mutated by a pool of workers, and any
+    other circuit is mutated in turn.
+
+    Parameters
+    ----------
+    circuits : list[Circuit]
+        Distinct circuits to mutate
+    chances : list[float]
+        The mutation chance of each circuit
+    rand : np.random.Generator
+        Generator the genome mask is drawn with
+    workers : int
+        Maximum number of hardware files mutated concurrently
+    """
+    bound = []
+    files = []
+    for circuit, chance in zip(circuits, chances):
+        if circuit.get_genome() is not None:
+            bound.append((circuit, chance))
+        elif isinstance(circuit, FileBasedCircuit):
+            files.append((circuit, chance))
+        else:
+            circuit.mutate(chance=chance)
+
+    if bound:
+        FileBasedCircuit.mutate_batch([circuit for circuit, _ in bound], [chance for _, chance in bound], rand)
+
+    if len(files) == 1:
+        files[0][0].mutate(chance=files[0][1])
+    elif files:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(lambda pair: pair[0].mutate(chance=pair[1]), files))
+
+class BatchMutation(Mutation):
+    """
+    Base class of the mutations that work out a chance for every circuit and then
+    mutate all of them in one batch.
+    """
+    def __init__(self, config: Config, rand: "np.random.Generator"):
+        self._prob = config.get_mutation_probability()
+        self._rand = rand
+        self._workers = config.get_compile_workers()
+
+    @abstractmethod
+    def _chances(self, all_circuits: List[Circuit], circuits_to_mutate: List[Circuit]) -> List[float]:
+        """Returns the mutation chance of each circuit to mutate"""
+        pass
+
     def __call__(self, all_circuits, circuits_to_mutate):
-        for circuit in circuits_to_mutate:
-            circuit.mutate()
+        # Keep population order so the mask drawn for each circuit does not depend on set ordering
+        circuits = [circuit for circuit in all_circuits if circuit in circuits_to_mutate]
+        mutate_circuits(circuits, self._chances(all_circuits, circuits), self._rand, self._workers)
 
-class FitnessRankMutation(Mutation):
+class SimpleMutation(BatchMutation):
+    def _chances(self, all_circuits, circuits_to_mutate):
+        return [self._prob] * len(circuits_to_mutate)
+
+class FitnessRankMutation(BatchMutation):
     """
     Scales mutation chance from 0.5x to 1.5x linearly by fitness rank starting with the
     highest ranked circuits.
     """
-    def __init__(self, config: Config):
+    def __init__(self, config: Config, rand: "np.random.Generator", population_size: int):
+        super().__init__(config, rand)
         self._prob_start = config.get_mutation_probability() / 2
 
-        if config.get_population_size() == 1:
+        if population_size == 1:
             self._prob_delta = 0
         else:
-            self._prob_delta = config.get_mutation_probability() / (config.get_population_size() - 1)
+            self._prob_delta = config.get_mutation_probability() / (population_size - 1)
 
-    def __call__(self, all_circuits, circuits_to_mutate):
-        for i, circuit, in enumerate(all_circuits):
-            if circuit in circuits_to_mutate:
-                circuit.mutate(chance=self._prob_start + self._prob_delta * i)
+    def _chances(self, all_circuits, circuits_to_mutate):
+        ranks = {circuit: i for i, circuit in enumerate(all_circuits)}
+        return [self._prob_start + self._prob_delta * ranks[circuit] for circuit in circuits_to_mutate]
 
-class FitnessProportionalMutation(Mutation):
+class FitnessProportionalMutation(BatchMutation):
     """
     Maps circuit fitness range linearly to [0.5x, 1.5x] mutation chance, higher fitness
     circuits are given lower mutation chances.
     """
-    def __init__(self, config: Config):
-        self._prob = config.get_mutation_probability()
+    def __init__(self, config: Config, rand: "np.random.Generator"):
+        super().__init__(config, rand)
         self._start_prob = self._prob * 1.5
 
-    def __call__(self, all_circuits, circuits_to_mutate):
+    def _chances(self, all_circuits, circuits_to_mutate):
         highest = all_circuits[0].calculate_fitness()
         lowest = all_circuits[-1].calculate_fitness()
 
         df = highest - lowest
         dm_df = - self._prob / df
 
+        chances = []
         for circuit in circuits_to_mutate:
             fitness_dif = circuit.calculate_fitness() - lowest
             additional_mutation = fitness_dif * dm_df
-            circuit.mutate(chance=self._start_prob + additional_mutation)
+            chances.append(self._start_prob + additional_mutation)
+        return chances
 
-class ConvergenceProportionalMutation(Mutation):
+class ConvergenceProportionalMutation(BatchMutation):
     """
     Implements mutation as described by *Adaptive Probabilities of Crossover and Mutation in Genetic Algorithms*.
     Includes modification of using min.
     """
     #TODO still fine tuning this dont use
-    def __init__(self, config: Config):
+    def __init__(self, config: Config, rand: "np.random.Generator"):
+        super().__init__(config, rand)
         self._prob = config.get_mutation_probability() * 2
         # Paper uses 0.005, thats pretty high for us
         self._base_prob = config.get_mutation_probability() * 0.5
 
-    def __call__(self, all_circuits, circuits_to_mutate):
+    def _chances(self, all_circuits, circuits_to_mutate):
         f_bar = sum(circuit.calculate_fitness() for circuit in all_circuits) / len(all_circuits)
         f_max = max(circuit.calculate_fitness() for circuit in all_circuits)
 
+        chances = []
         for circuit in circuits_to_mutate:
             if f_bar == f_max:
                 multiplier = 4
             else:
                 multiplier = min((f_max - circuit.calculate_fitness()) / (f_max - f_bar), 4)
             print("mutation: ", multiplier)
-            circuit.mutate(chance=self._prob * multiplier + self._base_prob)
+            chances.append(self._prob * multiplier + self._base_prob)
+        return chances
+
+def mutation_fac(config: Config, logger: Logger, rand: "np.random.Generator", population_size: int = None):
+    if population_size is None:
+        population_size = config.get_population_size()
 
-def mutation_fac(config: Config, logger: Logger, rand: "np.random.Generator"):
     def build():
         match config.get_mutation_type():
             case "SIMPLE":
-                return SimpleMutation()
+                return SimpleMutation(config, rand)
             case "RANK":
-                return FitnessRankMutation(config)
+                return FitnessRankMutation(config, rand, population_size)
             case "PROPORTIONAL":
-                return FitnessProportionalMutation(config)
+                return FitnessProportionalMutation(config, rand)
             case "CONVERGENCE":
-                return ConvergenceProportionalMutation(config)
+                return ConvergenceProportionalMutation(config, rand)
             case _:
                 logger.error("Invalid mutation type")
                 raise Exception("Invalid mutation type")
@@ -34,6 +34,8 @@ class ClassicTournamentSelection(SelectionMethod):
     def __call__(self, circuits: List[Circuit]) -> List[Circuit]:
         population = self._rand.permutation(circuits)
         circuits_to_mutate = set()
+        # Crossovers are applied as one batch once every pair is chosen
+        pairs = []
 
         # For all Circuits in the CircuitPopulation, take two random
         # circuits at a time from the population and compare them. Copy
@@ -54,11 +56,13 @@ class ClassicTournamentSelection(SelectionMethod):
                                 winner.get_fitness()
                             ))
 
-            if not self._crossover(winner, loser):
+            pairs.append((winner, loser))
+            circuits_to_mutate.add(loser)
+
+        for (winner, loser), crossed in zip(pairs, self._crossover.batch(pairs)):
+            if not crossed:
                 self._logger.event(3, "Cloning:", winner, " ---> ", loser)
                 loser.copy_from(winner)
 
-            circuits_to_mutate.add(loser)
-
         self._mutate(circuits, circuits_to_mutate)
         return circuits
@@ -52,6 +52,8 @@ class FitnessProportionalSelection(SelectionMethod):
         # disabled).
         circuits_to_mutate = set()
 
+        # Crossovers are applied as one batch once every pair is chosen
+        pairs = []
         for ckt in circuits:
             if self._n_elites:
                 if total_fitness >= 0:
@@ -75,12 +77,14 @@ class FitnessProportionalSelection(SelectionMethod):
                 # 	ckt.copy_from(rand_elite)
                 # else:
                 # 	self.__single_point_crossover(rand_elite, ckt)
-                if not self._crossover(rand_elite, ckt):
-                    self._logger.event(4, "Cloning:", rand_elite, " ---> ", ckt)
-                    ckt.copy_from(rand_elite)
-
+                pairs.append((rand_elite, ckt))
                 circuits_to_mutate.add(ckt)
 
+        for (rand_elite, ckt), crossed in zip(pairs, self._crossover.batch(pairs)):
+            if not crossed:
+                self._logger.event(4, "Cloning:", rand_elite, " ---> ", ckt)
+                ckt.copy_from(rand_elite)
+
         self._mutation(circuits, circuits_to_mutate)
 
         return circuits
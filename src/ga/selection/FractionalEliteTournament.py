@@ -37,6 +37,8 @@ class FractionalEliteTournament(SelectionMethod):
         # generated above. If the Circuit's fitness is less than than
         # the elite's perform crossover (or clone if crossover is
         # disabled) and then mutate the Circuit.
+        # Crossovers are applied as one batch once every pair is chosen
+        pairs = []
         for ckt in circuits:
             rand_elite = self._rand.choice(elite_group)
             if ckt.get_fitness() <= rand_elite.get_fitness() and ckt not in elite_group:
@@ -46,9 +48,12 @@ class FractionalEliteTournament(SelectionMethod):
                 # else:
                 #     self.__single_point_crossover(rand_elite, ckt)
 
-                if not self._crossover(rand_elite, ckt):
-                    self._logger.event(3, "Cloning:", rand_elite, " ---> ", ckt)
-                    ckt.copy_from(rand_elite)
+                pairs.append((rand_elite, ckt))
+
+        for (rand_elite, ckt), crossed in zip(pairs, self._crossover.batch(pairs)):
+            if not crossed:
+                self._logger.event(3, "Cloning:", rand_elite, " ---> ", ckt)
+                ckt.copy_from(rand_elite)
 
         self._mutation(circuits, set(circuits))
 
@@ -50,6 +50,8 @@ class RankProportionalSelection(SelectionMethod):
         # disabled).
         elite_prob_sum = sum(elites.values())
 
+        # Crossovers are applied as one batch once every pair is chosen
+        pairs = []
         for ckt in circuits:
             if self._n_elites:
                 if elite_prob_sum > 0:
@@ -70,9 +72,12 @@ class RankProportionalSelection(SelectionMethod):
                 #     ckt.copy_from(rand_elite)
                 # else:
                 #     self.__single_point_crossover(rand_elite, ckt)
-                if not self._crossover(rand_elite, ckt):
-                    self._logger.event(3, "Cloning:", rand_elite, " ---> ", ckt)
-                    ckt.copy_from(rand_elite)
+                pairs.append((rand_elite, ckt))
+
+        for (rand_elite, ckt), crossed in zip(pairs, self._crossover.batch(pairs)):
+            if not crossed:
+                self._logger.event(3, "Cloning:", rand_elite, " ---> ", ckt)
+                ckt.copy_from(rand_elite)
 
         self._mutation(circuits, set(circuits) - set(elites.keys()))
         return circuits
\ No newline at end of file
@@ -19,6 +19,7 @@ from Config import Config
 if TYPE_CHECKING:
     import numpy as np
     from CircuitPopulation import CircuitPopulation
+    from ga.surrogate import Surrogate
 
 class MixinSelection(SelectionMethod):
     """Wrapper around SelectionMethod to run Mixins before and after selection."""
@@ -46,10 +47,26 @@ class MixinSelection(SelectionMethod):
 
         return circuits
 
-def selection_fac(population: "CircuitPopulation", config: Config, logger: Logger, rand: "np.random.Generator") -> SelectionMethod:
+    def get_state(self) -> List[dict]:
+        """Returns the state of every mixin, which carries over from one generation to the next"""
+        return [mixin.get_state() for mixin in self._before + self._after]
+
+    def set_state(self, state: List[dict]):
+        """Restores a state returned by get_state()"""
+        for mixin, mixin_state in zip(self._before + self._after, state):
+            mixin.set_state(mixin_state)
+
+def selection_fac(population: "CircuitPopulation", config: Config, logger: Logger, rand: "np.random.Generator", population_size: int = None, surrogate: "Surrogate" = None) -> SelectionMethod:
+    """
+    Builds the selection method set in the config, wrapped with its mixins.
+    population_size is the number of circuits selection runs on, the configured population size by default.
+    surrogate is the population's fitness model, if it has one, which biases selection when surrogate_bias is set.
+    """
+    if population_size is None:
+        population_size = config.get_population_size()
     crossover_partial = crossover_fac(population, config, logger, rand)
-    mutation_partial = mutation_fac(config, logger, rand)
-    n_elites = int(math.ceil(config.get_elitism_fraction() * config.get_population_size()))
+    mutation_partial = mutation_fac(config, logger, rand, population_size)
+    n_elites = int(math.ceil(config.get_elitism_fraction() * population_size))
 
     match config.get_selection_type():
         case "SINGLE_ELITE":
@@ -68,5 +85,5 @@ def selection_fac(population: "CircuitPopulation", config: Config, logger: Logge
             logger.error("Invalid Selection method in config.ini. Exiting...")
             exit()
 
-    before_mixins, after_mixins = mixin_fac(config, logger, rand)
+    before_mixins, after_mixins = mixin_fac(config, logger, rand, population_size, surrogate)
     return MixinSelection(before_mixins, selection, after_mixins)
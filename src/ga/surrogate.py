@@ -0,0 +1,191 @@
+"""
+Surrogate
+---------
+
+Fitness model learned online from every circuit measured during a run. After each generation
+the measured genomes update a ridge regression of fitness and a logistic regression of whether a
+circuit is dead (measured nothing but zeros, e.g. no pulses), both over features of the genome
+bits. The model predicts both for offspring that were not measured yet, which the pre-screen and
+the SurrogateBias mixin use to avoid spending hardware evaluations on circuits that are predicted
+to be dead.
+"""
+from typing import Dict, Optional
+
+import numpy as np
+
+from Circuit.Circuit import Circuit
+from Config import Config
+
+# Measurements the model needs before it makes predictions
+MIN_OBSERVATIONS = 10
+# Gradient steps the dead circuit classifier takes on each batch of measurements
+LOGISTIC_STEPS = 20
+
+class Surrogate:
+    """
+    Ridge regression of fitness and logistic regression of the chance a circuit is dead. Genomes
+    longer than the number of features are hashed first: every bit is added, with a random sign,
+    to one of the features, which keeps the model's size independent of the genome's. The features
+    are then used as they are (RIDGE) or through random cosine features (RANDOM_FEATURES), which
+    also capture interactions between bits.
+    """
+    def __init__(self, regularization: float, features: int, random_features: bool, rand: "np.random.Generator"):
+        """
+        Parameters
+        ----------
+        regularization : float
+            The ridge penalty of both regressions
+        features : int
+            The number of features
+        random_features : bool
+            Whether to use random cosine features of the hashed bits
+        rand : np.random.Generator
+            Draws the hashing and random features, once the genome length is known
+        """
+        self._regularization = regularization
+        self._features_count = features
+        self._random_features = random_features
+        self._rand = rand
+        # The feature each bit is added to, and its sign, or None while the genome length is unknown
+        self._buckets: Optional[np.ndarray] = None
+        self._signs: Optional[np.ndarray] = None
+        self._width = 0
+        self._scale = 1.0
+        # Random projection of the hashed bits, and the phase of each random feature
+        self._projection: Optional[np.ndarray] = None
+        self._phases: Optional[np.ndarray] = None
+        self.observations = 0
+
+        # Normal equations of the ridge regression, accumulated over every measurement
+        self._gram: Optional[np.ndarray] = None
+        self._moments: Optional[np.ndarray] = None
+        self._fitness_weights: Optional[np.ndarray] = None
+        self._dead_weights: Optional[np.ndarray] = None
+
+        # Prediction quality on the last batch of measurements, before the model learned from it
+        self.metrics: Dict[str, float] = {}
+
+    def _draw(self, length: int):
+        if length <= self._features_count:
+            self._buckets = np.arange(length)
+            self._signs = np.ones(length)
+        else:
+            self._buckets = self._rand.integers(0, self._features_count, length)
+            self._signs = self._rand.choice([-1.0, 1.0], length)
+        self._width = min(length, self._features_count)
+        # Keeps the hashed features about as large as single bits, however many bits share them
+        self._scale = 1 / np.sqrt(max(length / self._features_count, 1))
+        if self._random_features:
+            self._projection = self._rand.normal(0, 1 / np.sqrt(self._width), (self._width, self._features_count))
+            self._phases = self._rand.uniform(0, 2 * np.pi, self._features_count)
+
+    def _features(self, bits: np.ndarray) -> np.ndarray:
+        if self._buckets is None:
+            self._draw(bits.shape[1])
+        signed = (2 * bits.astype(np.float64) - 1) * self._signs
+        hashed = np.array([np.bincount(self._buckets, weights=row, minlength=self._width) for row in signed]) * self._scale
+        if self._random_features:
+            features = np.sqrt(2 / self._features_count) * np.cos(hashed @ self._projection + self._phases)
+        else:
+            features = hashed
+        # Constant feature for the intercept
+        return np.hstack([features, np.ones((bits.shape[0], 1))])
+
+    def ready(self) -> bool:
+        return self.observations >= MIN_OBSERVATIONS
+
+    def observe(self, bits: np.ndarray, fitness: np.ndarray, dead: np.ndarray):
+        """
+        Learns from measured circuits
+
+        Parameters
+        ----------
+        bits : np.ndarray
+            (circuits x bits) genomes of the circuits
+        fitness : np.ndarray
+            Their measured fitness
+        dead : np.ndarray
+            Whether each of them is dead
+        """
+        if self.ready():
+            self.metrics = prediction_metrics(self.predict(bits), fitness, self.predict_dead(bits), dead)
+
+        features = self._features(bits)
+        if self._gram is None:
+            self._gram = np.zeros((features.shape[1], features.shape[1]))
+            self._moments = np.zeros(features.shape[1])
+            self._dead_weights = np.zeros(features.shape[1])
+        self._gram += features.T @ features
+        self._moments += features.T @ fitness
+        self.observations += len(fitness)
+
+        # Every weight but the intercept's is penalized
+        penalty = np.full(features.shape[1], self._regularization)
+        penalty[-1] = 0
+        self._fitness_weights = np.linalg.solve(self._gram + np.diag(penalty), self._moments)
+
+        # Gradient descent with the step size bounded by the curvature of the logistic loss
+        step = 4 / max(float((features ** 2).sum(axis=1).max()), 1e-12)
+        labels = dead.astype(np.float64)
+        for _ in range(LOGISTIC_STEPS):
+            probabilities = _sigmoid(features @ self._dead_weights)
+            gradient = features.T @ (probabilities - labels) / len(labels) + penalty * self._dead_weights / self.observations
+            self._dead_weights -= step * gradient
+
+    def predict(self, bits: np.ndarray) -> np.ndarray:
+        """Returns the predicted fitness of each genome"""
+        return self._features(bits) @ self._fitness_weights
+
+    def predict_dead(self, bits: np.ndarray) -> np.ndarray:
+        """Returns the predicted probability that each genome is dead"""
+        return _sigmoid(self._features(bits) @ self._dead_weights)
+
+def _sigmoid(x: np.ndarray) -> np.ndarray:
+    return 1 / (1 + np.exp(-np.clip(x, -500, 500)))
+
+def _ranks(values: np.ndarray) -> np.ndarray:
+    return np.argsort(np.argsort(values, kind="stable"), kind="stable").astype(np.float64)
+
+def prediction_metrics(predicted: np.ndarray, fitness: np.ndarray, dead_probability: np.ndarray, dead: np.ndarray) -> Dict[str, float]:
+    """
+    Measures how well predictions matched measurements
+
+    Returns
+    -------
+    dict[str, float]
+        rmse: root mean squared error of the predicted fitness,
+        rank_correlation: Spearman correlation of the predicted and measured fitness (0 if either is constant),
+        dead_accuracy: fraction of circuits correctly predicted dead or alive
+    """
+    rank_correlation = 0.0
+    if len(fitness) > 1:
+        predicted_ranks, ranks = _ranks(predicted), _ranks(fitness)
+        if predicted_ranks.std() > 0 and ranks.std() > 0:
+            rank_correlation = float(np.corrcoef(predicted_ranks, ranks)[0, 1])
+    return {
+        "rmse": float(np.sqrt(np.mean((predicted - fitness) ** 2))),
+        "rank_correlation": rank_correlation,
+        "dead_accuracy": float(np.mean((dead_probability >= 0.5) == dead)),
+    }
+
+def is_dead(circuit: Circuit) -> bool:
+    """Returns whether a measured circuit is dead: every measurement of it was 0"""
+    return not any(circuit._data)
+
+def surrogate_fac(config: Config) -> Optional[Surrogate]:
+    """
+    Builds the surrogate set in the config, or None if there is none. The hashing and random features
+    are drawn from their own generator, so enabling the surrogate does not change the choices evolution makes.
+    """
+    match config.get_surrogate_model():
+        case "NONE":
+            return None
+        case "RIDGE" | "RANDOM_FEATURES":
+            return Surrogate(
+                config.get_surrogate_regularization(),
+                config.get_surrogate_features(),
+                config.get_surrogate_model() == "RANDOM_FEATURES",
+                np.random.default_rng(config.get_random_seed())
+            )
+        case _:
+            raise Exception("Invalid surrogate model selected.")
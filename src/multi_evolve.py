@@ -3,6 +3,16 @@
 
 
 import argparse
+import atexit
+import logging
+import multiprocessing
+import os
+import sys
+from datetime import datetime
+from pathlib import Path
+from Config import Config
+from ConfigBuilder import ConfigBuilder
+from DevicePool import DEVICE_POOL_ENV, reserve_icefarm_client, serve_pool, shared_device_pool_fac
 from Evolution import Evolution
 from evolve import BUILT_CONFIG_PATH, program_description as evolve_program_description
 from arg_parse_utils import add_bool_argument
@@ -43,6 +53,7 @@ parser.add_argument('-d','--description', type=str,default=default_experiment_de
 flags = {'enable':["-p","--print_only", "--no-action","--test"],
          'disable':['-np',"--no-print-only",'--act']}
 add_bool_argument(parser,"print_only",flag_names=flags,default=False)
+add_bool_argument(parser,"concurrent",default=False)
 # --help is added by default
 
 ## need to add a way to create custom experiment descriptions.
@@ -84,9 +95,128 @@ def evolve_list_of_configs_selecting_evolution(*configs:str,
 # create origional function by partially completing the function, relying on None to make the function create it's own evolution_object
 evolve_list_of_configs = partial(evolve_list_of_configs_selecting_evolution,evolution_object=None)
 
+# Each concurrent experiment runs in its own copy of the main directory, under a directory named
+# after the time the experiments were started in this directory
+CONCURRENT_WORKSPACES_DIRECTORY = "./workspace/concurrent"
+# Entries of the main directory left out of those copies: the workspace, and the tests so pytest does not collect them again
+SANDBOX_EXCLUDED = {"workspace", "test", "test_e2e", "conftest.py"}
+
+def _make_sandbox(sandbox:Path):
+    """Creates a directory linking to the main directory's entries, so an experiment
+    can run in it with a workspace of its own. Raises FileExistsError rather than reuse a directory
+    holding the results of an earlier run."""
+    sandbox.mkdir(parents=True)
+    for entry in Path(".").iterdir():
+        if entry.name not in SANDBOX_EXCLUDED and not entry.name.startswith("."):
+            os.symlink(entry.resolve(), sandbox / entry.name)
+    (sandbox / "workspace").mkdir()
+
+def _evaluation_settings(config:Config) -> tuple:
+    """Returns the settings that decide which iCEFARM client (and kind of result) a config evaluates with."""
+    send_waveform = config.get_icefarm_send_waveform() if config.get_fitness_func() == "VARIANCE" else None
+    return config.get_simulation_mode(), config.get_fitness_func(), send_waveform
+
+def _check_concurrent_configs(configs, base_config:str, logger:logging.Logger) -> bool:
+    """Checks that every config uses the REMOTE simulation mode and the evaluation settings of the first one,
+    since the shared pool's client is built from the first config. Logs the configs that do not."""
+    settings = []
+    for config in configs:
+        ConfigBuilder(config, override_base_config=base_config).build_config(BUILT_CONFIG_PATH)
+        built_config = Config(BUILT_CONFIG_PATH)
+        built_config.add_logger(logger)
+        settings.append(_evaluation_settings(built_config))
+
+    valid = True
+    for config, (simulation_mode, fitness_func, send_waveform) in zip(configs, settings):
+        if simulation_mode != "REMOTE":
+            logger.error(f"{config} uses the {simulation_mode} simulation mode, concurrent experiments must use REMOTE")
+            valid = False
+        elif (simulation_mode, fitness_func, send_waveform) != settings[0]:
+            logger.error(f"{config} evaluates with fitness function {fitness_func} (send_waveform: {send_waveform}), "
+                         f"but the shared devices evaluate with {settings[0][1]} (send_waveform: {settings[0][2]}) as set in {configs[0]}")
+            valid = False
+    return valid
+
+def _evolve_in_sandbox(sandbox:str, pool_address:str, evolve_arguments:dict):
+    os.chdir(sandbox)
+    os.environ[DEVICE_POOL_ENV] = pool_address
+    Evolution().evolve(built_config_path=BUILT_CONFIG_PATH, **evolve_arguments)
+
+def evolve_configs_concurrently(*configs:str,
+                           base_config:str,
+                           output_directory:str,
+                           experiment_description:str,
+                           print_action_only:bool=False
+                           ) -> int:
+    """This function evolves a list of configs at the same time, sharing one reservation of iCEFARM devices.
+    The devices set in the first config are reserved, and every experiment evaluates on all of them,
+    its evaluations interleaved with those of the others. Each experiment runs in its own process, in
+    a directory under CONCURRENT_WORKSPACES_DIRECTORY/<start time> with its own workspace.
+    The configs must use the REMOTE simulation mode and the same fitness function and waveform setting,
+    otherwise no experiment is started.
+    Returns the number of experiments that failed."""
+    if (print_action_only):
+        for config_num, config in enumerate(configs, start=1):
+            formatted_name = experiment_description.format(config=config,config_num=config_num)
+            print(f"multi-evolve (concurrent):{{config:{config},output:{output_directory},base_config:{base_config},description:{formatted_name}}}")
+        return 0
+
+    logger = logging.getLogger(program_name)
+    logger.setLevel(logging.INFO)
+    logger.addHandler(logging.StreamHandler(sys.stdout))
+
+    if not os.path.exists("./workspace"):
+        os.mkdir("./workspace")
+    if not _check_concurrent_configs(configs, base_config, logger):
+        return len(configs)
+    ConfigBuilder(configs[0], override_base_config=base_config).build_config(BUILT_CONFIG_PATH)
+    pool_config = Config(BUILT_CONFIG_PATH)
+    pool_config.add_logger(logger)
+    client = reserve_icefarm_client(pool_config, logger)
+    atexit.register(client.endAll)
+    pool = shared_device_pool_fac(client, pool_config, len(configs), logger)
+    pool_address = serve_pool(pool)
+
+    absolute = lambda path: None if path is None else str(Path(path).resolve())
+    context = multiprocessing.get_context("spawn")
+    experiments = []
+    run_directory = Path(CONCURRENT_WORKSPACES_DIRECTORY) / datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+    for config_num, config in enumerate(configs, start=1):
+        sandbox = run_directory / f"{config_num}-{Path(config).stem}"
+        _make_sandbox(sandbox)
+        evolve_arguments = {
+            "primary_config_path":      absolute(config),
+            "base_config_path":         absolute(base_config),
+            "output_directory":         absolute(output_directory),
+            "experiment_description":   experiment_description.format(config=config,config_num=config_num),
+        }
+        process = context.Process(target=_evolve_in_sandbox, args=(str(sandbox), pool_address, evolve_arguments), name=sandbox.name)
+        process.start()
+        logger.info(f"Started {config} in {sandbox}")
+        experiments.append((config, process))
+
+    failed = 0
+    for config, process in experiments:
+        process.join()
+        if process.exitcode != 0:
+            logger.error(f"{config} exited with status {process.exitcode}")
+            failed += 1
+    pool.close()
+    return failed
+
 def run():
     args=parser.parse_args()
 
+    if args.concurrent:
+        failed = evolve_configs_concurrently(
+            *args.configs,
+            base_config=args.base_config,
+            output_directory=args.output_directory,
+            experiment_description=args.description,
+            print_action_only=args.print_only
+        )
+        sys.exit(1 if failed else 0)
+
     evolve_list_of_configs(
         configs=args.configs,
         base_config=args.base_config,
@@ -0,0 +1,51 @@
+'''
+export_waveform.py
+==================
+Writes a waveform from the binary waveform store of a VARIANCE run (see WaveformStore) as a text
+log with one "index, sample" line per sample, the format of workspace/waveformlivedata.log.
+
+Args: the generation and circuit of the waveform, the newest waveform (the current best) if not given
+The code will use the config file for the path to the waveform directory
+'''
+
+from argparse import ArgumentParser
+from Config import Config
+from WaveformStore import WaveformStore, write_waveform_log
+
+program_name = "export_waveform"
+program_description = "This program writes a waveform from the config's waveform directory as a text log"
+program_epilog = None
+
+def run():
+    #Argument Parser is in the run file so sphinx can scan this file without side effects
+    parser = ArgumentParser(prog=program_name,
+                            description=program_description,
+                            epilog=program_epilog)
+    parser.add_argument('-g','--generation',type=int,default=None,
+                    help=f"The generation of the waveform. Default: the newest waveform")
+    parser.add_argument('-c','--circuit',type=int,default=None,
+                    help=f"The index of the circuit of the waveform. Default: the newest waveform")
+    parser.add_argument('-o','--output',type=str,default='./workspace/waveformlivedata.log',
+                    help=f"The text log to write. Default: ./workspace/waveformlivedata.log")
+    args = parser.parse_args()
+
+    config = Config('./workspace/builtconfig.ini')
+    store = WaveformStore.open(config.get_waveform_directory())
+    if store is None:
+        print(f'No waveforms are stored in {config.get_waveform_directory()}.')
+        exit(1)
+
+    if args.generation is None or args.circuit is None:
+        generation, circuit, samples = store.latest()
+    else:
+        generation, circuit = args.generation, args.circuit
+        samples = store.get(generation, circuit)
+        if samples is None:
+            print(f'The waveform of circuit {circuit} in generation {generation} is not stored.')
+            exit(1)
+
+    write_waveform_log(args.output, samples)
+    print(f'Wrote the waveform of circuit {circuit} in generation {generation} to {args.output}')
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,37 @@
+import os
+from pathlib import Path
+from unittest.mock import Mock
+
+import numpy as np
+
+from Circuit.AttributeStore import AttributeStore
+from Circuit.IntrinsicCircuit import IntrinsicCircuit
+
+config = Mock()
+config.get_data_directory.return_value = Path(os.path.join('test', 'out', 'data'))
+config.get_asc_directory.return_value = Path(os.path.join('test', 'out', 'asc'))
+config.get_bin_directory.return_value = Path(os.path.join('test', 'out', 'bin'))
+
+template = Path(os.path.join('test', 'res', 'inputs', 'hardware_file.asc'))
+
+def test_flush_and_load(tmp_path):
+    path = tmp_path.joinpath('attributes.jsonl')
+    store = AttributeStore(path)
+    store.set('hardware1', 'fitness', '1.5')
+    store.set('hardware2', 'fitness', '0.5')
+    store.flush(0)
+    store.set('hardware1', 'fitness', '2.5')
+    store.flush(1)
+    store.flush(2)
+
+    assert len(path.read_text().splitlines()) == 2
+    assert AttributeStore.load(path) == {'hardware1': {'fitness': '2.5'}, 'hardware2': {'fitness': '0.5'}}
+
+def test_circuit_attributes_stay_out_of_file(tmp_path):
+    circuit = IntrinsicCircuit(1, 'attributes', config, template, np.random.default_rng(0), Mock(), Mock(), Mock())
+    contents = circuit.get_hardware_file_path().read_bytes()
+    circuit.set_attribute_store(AttributeStore(tmp_path.joinpath('attributes.jsonl')))
+
+    circuit.set_file_attribute('fitness', '3.0')
+    assert circuit.get_file_attribute('fitness') == '3.0'
+    assert circuit.get_hardware_file_path().read_bytes() == contents
@@ -0,0 +1,40 @@
+import binascii
+import os
+from pathlib import Path
+from shutil import which
+from subprocess import run
+
+import numpy as np
+import pytest
+
+from Circuit.BinPatcher import find_crc, get_bin_patcher
+from Circuit.ModifiableIndex import get_modifiable_index
+
+template = Path(os.path.join('test', 'res', 'inputs', 'hardware_file.asc'))
+rows = [1, 2, 13]
+columns = [13, 14, 23, 24, 39, 40]
+
+def test_find_crc():
+    data = bytearray(b"\xff\x00\x00\xff\x7e\xaa\x99\x7e\x01\x05" + bytes(range(200)) + b"\x22\x00\x00\x01\x06\x00")
+    crc = binascii.crc_hqx(data[10:-5], 0xFFFF)
+    data[-5:-3] = crc.to_bytes(2, "big")
+    assert find_crc(bytes(data)) == (10, len(data) - 5)
+
+@pytest.mark.short
+@pytest.mark.skipif(which("icepack") is None, reason="icepack is not installed")
+def test_patch_matches_icepack(tmp_path):
+    body = template.read_bytes()
+    index = get_modifiable_index(body, rows, columns)
+    patcher = get_bin_patcher(body, index, tmp_path)
+
+    bits = (np.random.default_rng(0).random(len(index)) < 0.5).astype(np.uint8)
+    circuit = np.frombuffer(bytearray(body), dtype=np.uint8)
+    circuit[index.offsets] = bits + ord("0")
+    contents = b".comment FILE_ATTRIBUTES fitness={1.0}\n" + circuit.tobytes()
+    assert patcher.matches(contents)
+
+    asc_path = tmp_path.joinpath("patch_test.asc")
+    bin_path = tmp_path.joinpath("patch_test.bin")
+    asc_path.write_bytes(contents)
+    run(["icepack", asc_path.name, bin_path.name], cwd=tmp_path, check=True)
+    assert patcher.patch(bits) == bin_path.read_bytes()
@@ -0,0 +1,82 @@
+import os
+from pathlib import Path
+from unittest.mock import Mock
+
+import numpy as np
+
+import Circuit.FileBasedCircuit
+from Circuit.CompileCache import CompileCache
+from Circuit.IntrinsicCircuit import IntrinsicCircuit
+
+template = Path(os.path.join('test', 'res', 'inputs', 'hardware_file.asc'))
+
+def test_key_ignores_file_attributes():
+    body = b".logic_tile 1 1\n0000\n"
+    assert CompileCache.key(body) == CompileCache.key(b".comment FILE_ATTRIBUTES fitness={2.0}\n" + body)
+    assert CompileCache.key(body) != CompileCache.key(body.replace(b"0000", b"0001"))
+
+def test_fetch_and_store(tmp_path):
+    cache = CompileCache(tmp_path.joinpath("cache"), 10, 1024)
+    source = tmp_path.joinpath("source.bin")
+    dest = tmp_path.joinpath("dest.bin")
+    source.write_bytes(b"bitstream")
+
+    assert not cache.fetch("a", dest)
+    cache.store("a", source)
+    assert cache.fetch("a", dest)
+    assert dest.read_bytes() == b"bitstream"
+    assert (cache.hits, cache.misses) == (1, 1)
+
+def test_evicts_least_recently_used(tmp_path):
+    cache = CompileCache(tmp_path.joinpath("cache"), 2, 1024)
+    source = tmp_path.joinpath("source.bin")
+    dest = tmp_path.joinpath("dest.bin")
+    source.write_bytes(b"bitstream")
+
+    cache.store("a", source)
+    cache.store("b", source)
+    cache.fetch("a", dest)
+    cache.store("c", source)
+    assert len(cache) == 2
+    assert cache.evictions == 1
+    assert not cache.fetch("b", dest)
+    assert cache.fetch("a", dest)
+
+def test_evicts_by_size(tmp_path):
+    cache = CompileCache(tmp_path.joinpath("cache"), 10, 20)
+    source = tmp_path.joinpath("source.bin")
+    source.write_bytes(b"0123456789")
+    for key in ["a", "b", "c"]:
+        cache.store(key, source)
+    assert len(cache) == 2
+
+def test_reuses_existing_directory(tmp_path):
+    source = tmp_path.joinpath("source.bin")
+    source.write_bytes(b"bitstream")
+    CompileCache(tmp_path.joinpath("cache"), 10, 1024).store("a", source)
+
+    cache = CompileCache(tmp_path.joinpath("cache"), 10, 1024)
+    assert cache.fetch("a", tmp_path.joinpath("dest.bin"))
+
+def test_interrupted_stores_are_discarded(tmp_path):
+    directory = tmp_path.joinpath("cache")
+    directory.mkdir()
+    directory.joinpath("a.tmp").write_bytes(b"bitst")
+
+    cache = CompileCache(directory, 10, 1024)
+    assert len(cache) == 0
+    assert not directory.joinpath("a.tmp").exists()
+
+def test_failed_compiles_are_not_cached(tmp_path, monkeypatch):
+    config = Mock()
+    config.get_data_directory.return_value = tmp_path
+    config.get_asc_directory.return_value = tmp_path
+    config.get_bin_directory.return_value = tmp_path
+    config.get_compile_method.return_value = "ICEPACK"
+    monkeypatch.setattr(Circuit.FileBasedCircuit, "COMPILE_CMD", "false")
+
+    circuit = IntrinsicCircuit(1, 'failed', config, template, np.random.default_rng(0), Mock(), Mock(), Mock())
+    cache = CompileCache(tmp_path.joinpath("cache"), 10, 1024)
+    circuit.set_compile_cache(cache)
+    circuit._compile()
+    assert len(cache) == 0
@@ -0,0 +1,147 @@
+from pathlib import Path
+from unittest.mock import Mock
+
+import numpy as np
+
+from icefarm.client.lib.BatchClient import EvaluationFailed
+
+from Circuit.RemoteCircuit import EvolutionClient
+
+config = Mock()
+config.get_icefarm_client_batch_amount_circuits.return_value = 5
+config.get_icefarm_buffer_batch_amount.return_value = 2
+config.get_icefarm_mode.return_value = "QUICK"
+config.get_icefarm_results_flush_interval_seconds.return_value = 1
+config.get_icefarm_evaluation_retries.return_value = 2
+
+class FakeClient:
+    def __init__(self, results):
+        self.results = results
+
+    def getSerials(self):
+        return ["A", "B"]
+
+    def evaluateEvaluations(self, evaluations, result_timeout, batch_size, target_batches):
+        for evaluation in evaluations:
+            for serial in evaluation.serials:
+                if serial in self.results:
+                    yield serial, evaluation, self.results[serial]
+
+class ShrinkingClient(FakeClient):
+    """Loses device B once it failed to return results"""
+    def __init__(self, results):
+        super().__init__(results)
+        self.serials = ["A", "B"]
+
+    def getSerials(self):
+        return self.serials
+
+    def evaluateEvaluations(self, evaluations, result_timeout, batch_size, target_batches):
+        yield from super().evaluateEvaluations(evaluations, result_timeout, batch_size, target_batches)
+        self.serials = ["A"]
+
+def circuit(name):
+    ckt = Mock()
+    ckt._bitstream_filepath = Path(name + ".bin")
+    return ckt
+
+def test_dispatch_returns_circuits_as_they_complete():
+    client = EvolutionClient(FakeClient({"A": "3", "B": 4}), config, Mock())
+    first, second = circuit("first"), circuit("second")
+    client.dispatch(first, "A", 2)
+    client.dispatch(second, "B", 1)
+
+    completed = dict(client.next_completed() for _ in range(2))
+    assert completed == {first: "A", second: "B"}
+    assert client.get_result(first) == {"A": [3.0, 3.0]}
+    assert client.get_result(second) == {"B": [4]}
+
+def test_dispatch_reports_lost_devices():
+    client = EvolutionClient(FakeClient({}), config, Mock())
+    ckt = circuit("lost")
+    client.dispatch(ckt, "A", 1)
+    assert client.next_completed() == (ckt, "A")
+    assert client.get_result(ckt) == {"A": [EvaluationFailed]}
+
+def test_submit_divides_circuits_among_devices():
+    client = EvolutionClient(FakeClient({"A": 1, "B": 2}), config, Mock())
+    circuits = [circuit(f"c{i}") for i in range(3)]
+    client.submit(circuits, 1)
+
+    completed = [client.next_completed()[0] for _ in range(3)]
+    assert set(completed) == set(circuits)
+    assert client.get_result(circuits[0]) == {"A": [1]}
+    assert client.get_result(circuits[1]) == {"B": [2]}
+    assert client.get_result(circuits[2]) == {"A": [1]}
+
+def test_submit_retries_on_healthy_devices():
+    client = EvolutionClient(FakeClient({"A": 1}), config, Mock())
+    circuits = [circuit("kept"), circuit("retried")]
+    client.submit(circuits, 1)
+
+    completed = dict(client.next_completed() for _ in range(2))
+    assert completed == {circuits[0]: "A", circuits[1]: "A"}
+    assert client.get_result(circuits[1]) == {"A": [1]}
+
+def test_submit_reports_lost_devices():
+    client = EvolutionClient(FakeClient({}), config, Mock())
+    ckt = circuit("lost")
+    client.submit([ckt], 1)
+
+    assert client.next_completed() == (ckt, None)
+    assert client.get_result(ckt) == {"A": [EvaluationFailed]}
+
+def test_stream_yields_circuits_as_they_complete():
+    client = EvolutionClient(FakeClient({"A": 1, "B": 2}), config, Mock())
+    circuits = [circuit(f"c{i}") for i in range(3)]
+    for ckt in circuits:
+        client.evaluate(ckt)
+
+    streamed = []
+    for ckt in client.stream(circuits):
+        streamed.append(ckt)
+        assert client.get_result(ckt)
+    assert sorted(streamed, key=circuits.index) == circuits
+    assert client.get_result(circuits[1]) == {"B": [2]}
+
+def test_stream_yields_failed_circuits_last():
+    client = EvolutionClient(FakeClient({}), config, Mock())
+    ckt = circuit("lost")
+    client.evaluate(ckt)
+
+    assert list(client.stream([ckt])) == [ckt]
+    assert client.get_result(ckt) == {"A": [EvaluationFailed]}
+
+def test_work_stealing_bypasses_stalled_devices():
+    stealing_config = Mock(wraps=config)
+    stealing_config.get_icefarm_scheduler.return_value = "WORK_STEALING"
+    stealing_config.get_icefarm_scheduler_chunk.return_value = 1
+    stealing_config.get_icefarm_speculative_evaluations.return_value = False
+    client = EvolutionClient(FakeClient({"A": 1}), stealing_config, Mock())
+    circuits = [circuit(f"c{i}") for i in range(4)]
+    for ckt in circuits:
+        client.evaluate(ckt)
+
+    # B never returns results, so A takes its evaluations over
+    assert [client.get_result(ckt) for ckt in circuits] == [{"A": [1]}] * 4
+    assert client.throughput.seconds_per_evaluation("A") is not None
+
+def test_waveforms_are_kept_as_arrays():
+    client = EvolutionClient(FakeClient({"A": ("12.5", [1, 2, 4095])}), config, Mock())
+    ckt = circuit("waveform")
+    client.dispatch(ckt, "A", 1)
+    client.next_completed()
+    assert client.get_result(ckt) == {"A": [12.5]}
+    waveform = client.get_waveform(ckt)
+    assert waveform.dtype == np.uint16
+    assert waveform.tolist() == [1, 2, 4095]
+
+def test_evaluations_on_lost_devices_fail():
+    all_config = Mock(wraps=config)
+    all_config.get_icefarm_mode.return_value = "ALL"
+    client = EvolutionClient(ShrinkingClient({"A": 1}), all_config, Mock())
+    ckt = circuit("lost")
+    client.evaluate(ckt)
+
+    assert ckt._serials == ["A", "B"]
+    assert client.get_result(ckt) == {"A": [1], "B": [EvaluationFailed]}
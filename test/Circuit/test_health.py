@@ -0,0 +1,35 @@
+from icefarm.client.lib.BatchClient import EvaluationFailed
+
+from Circuit.Health import DeviceHealth
+
+def device(evaluations, failures, mean):
+    return {"evaluations": evaluations, "failures": failures, "evaluation_time": {"mean": mean}}
+
+def test_slow_and_failing_devices_are_degraded():
+    health = DeviceHealth(0.2, 3, 5)
+    health.observe_telemetry({"devices": {
+        "A": device(10, 0, 1.0),
+        "B": device(10, 0, 1.2),
+        "C": device(10, 0, 5.0),
+        "D": device(5, 5, 1.0),
+    }})
+    scores = health.scores()
+    assert scores["A"]["score"] < 1
+    assert scores["C"]["latency_ratio"] > 3
+    assert scores["D"]["failure_rate"] == 0.5
+    assert health.degraded(["A", "B", "C", "D"]) == ["D", "C"]
+
+def test_outlier_results_are_degraded():
+    health = DeviceHealth(0.2, 3, 5)
+    results = {
+        f"{i}.bin": {"A": [100 + i], "B": [101 + i], "C": [99 + i], "D": [500 + i], "E": [EvaluationFailed]}
+        for i in range(3)
+    }
+    health.observe_results(results)
+    assert health.degraded(["A", "B", "C", "D", "E"]) == ["D"]
+    assert "residual" not in health.scores().get("E", {})
+
+def test_healthiest_device_is_never_degraded():
+    health = DeviceHealth(0.2, 3, 5)
+    health.observe_telemetry({"devices": {"A": device(1, 9, 1.0)}})
+    assert health.degraded(["A"]) == []
@@ -0,0 +1,69 @@
+import os
+from mmap import mmap
+from pathlib import Path
+from shutil import copyfile
+
+import numpy as np
+
+from Circuit.ModifiableIndex import get_modifiable_index
+
+template = Path(os.path.join('test', 'res', 'inputs', 'hardware_file.asc'))
+rows = [1, 2, 13]
+columns = [14, 15, 24, 25, 40, 41]
+
+def open_copy(tmp_path, contents=None):
+    path = tmp_path.joinpath('hardware.asc')
+    copyfile(template, path)
+    if contents is not None:
+        path.write_bytes(contents)
+    f = open(path, 'r+')
+    mm = mmap(f.fileno(), 0)
+    f.close()
+    return mm
+
+def scan_modifiable(hardware_file):
+    """Walks the file tile by tile, the way the modifiable bits were originally located"""
+    offsets = []
+    tile = hardware_file.find(b".logic_tile")
+    while tile > 0:
+        line_start = hardware_file.find(b"\n", tile) + 1
+        line_end = hardware_file.find(b"\n", line_start + 1)
+        line_size = line_end - line_start + 1
+        for row in rows:
+            for col in columns:
+                offsets.append(line_start + line_size * (row - 1) + col)
+        tile = hardware_file.find(b".logic_tile", tile + 1)
+    return offsets
+
+def test_offsets_match_scan(tmp_path):
+    mm = open_copy(tmp_path)
+    index = get_modifiable_index(mm, rows, columns)
+    assert list(index.offsets) == scan_modifiable(mm)
+    assert len(index) == 160 * len(rows) * len(columns)
+
+def test_index_shared_between_bit_values(tmp_path):
+    mm = open_copy(tmp_path)
+    index = get_modifiable_index(mm, rows, columns)
+    index.write_bits(mm, np.ones(len(index), dtype=np.uint8))
+    assert get_modifiable_index(mm, rows, columns) is index
+
+def test_attributes_comment_shifts_offsets(tmp_path):
+    contents = b".comment FILE_ATTRIBUTES fitness={1.5}\n" + template.read_bytes()
+    mm = open_copy(tmp_path, contents)
+    index = get_modifiable_index(mm, rows, columns)
+    bits = np.zeros(len(index), dtype=np.uint8)
+    bits[::2] = 1
+    index.write_bits(mm, bits)
+
+    assert np.array_equal(index.read_bits(mm), bits)
+    assert [mm[offset] for offset in scan_modifiable(mm)] == list(bits + ord('0'))
+
+def test_index_depends_on_layout(tmp_path):
+    index = get_modifiable_index(open_copy(tmp_path), rows, columns)
+    commented = b".comment FILE_ATTRIBUTES fitness={1.5}\n" + template.read_bytes()
+    assert get_modifiable_index(open_copy(tmp_path, commented), rows, columns) is index
+    # A longer line before the first tile moves every tile
+    shifted = template.read_bytes().replace(b"\n", b" \n", 1)
+    shifted_index = get_modifiable_index(open_copy(tmp_path, shifted), rows, columns)
+    assert shifted_index is not index
+    assert list(shifted_index.offsets) == [offset + 1 for offset in index.offsets]
@@ -0,0 +1,141 @@
+import os
+from pathlib import Path
+from unittest.mock import Mock
+
+import numpy as np
+
+from Circuit.IntrinsicCircuit import IntrinsicCircuit
+from ga.genome import PopulationGenome, zobrist_hash
+from ga.mutation import SimpleMutation
+
+config = Mock()
+logger = Mock()
+
+config.get_data_directory.return_value = Path(os.path.join('test', 'out', 'data'))
+config.get_asc_directory.return_value = Path(os.path.join('test', 'out', 'asc'))
+config.get_bin_directory.return_value = Path(os.path.join('test', 'out', 'bin'))
+config.get_accessed_columns.return_value = [14,15,24,25,40,41]
+config.get_routing_type.return_value = 'MOORE'
+config.get_routing_rows.return_value = [1, 2, 13]
+
+template = Path(os.path.join('test', 'res', 'inputs', 'hardware_file.asc'))
+
+def make_population(size):
+    rand = np.random.default_rng(0)
+    circuits = [IntrinsicCircuit(i, f'genome{i}', config, template, rand, logger, Mock(), Mock()) for i in range(size)]
+    genome = PopulationGenome.for_index(size, circuits[0].get_genome_index())
+    for row, circuit in enumerate(circuits):
+        circuit.bind_genome(genome, row)
+    return genome, circuits
+
+def test_bind_loads_file_bits():
+    genome, circuits = make_population(2)
+    assert genome.bits.shape == (2, 160 * 3 * 6)
+    assert np.array_equal(genome.bits[0], genome.bits[1])
+    assert not genome.dirty.any()
+
+def test_mutation_is_rendered_lazily():
+    genome, circuits = make_population(2)
+    before = circuits[0].get_genome_index().read_bits(circuits[0].get_hardware_file())
+    circuits[0].mutate(0.5)
+    assert genome.dirty[0]
+    assert not np.array_equal(circuits[0].get_bitstream(), before)
+
+    rendered = circuits[0].get_genome_index().read_bits(circuits[0].get_hardware_file())
+    assert np.array_equal(rendered, genome.bits[0])
+    assert not genome.dirty[0]
+
+def test_copy_and_crossover_are_row_operations():
+    genome, circuits = make_population(2)
+    circuits[0].randomize_bitstream()
+    circuits[1].copy_from(circuits[0])
+    assert np.array_equal(genome.bits[1], genome.bits[0])
+
+    circuits[1].randomize_bitstream()
+    circuits[1].crossover(circuits[0], 13)
+    tiles0 = genome.tiles(0)
+    tiles1 = genome.tiles(1)
+    # Only the crossover row of each tile comes from the parent
+    assert np.array_equal(tiles1[:, 2], tiles0[:, 2])
+    assert not np.array_equal(tiles1[:, :2], tiles0[:, :2])
+
+def test_crossover_batch_reads_parents_first():
+    genome, circuits = make_population(3)
+    for circuit in circuits:
+        circuit.randomize_bitstream()
+    before = genome.bits.copy()
+    masks = np.zeros((2,) + genome.shape[:2], dtype=bool)
+    masks[:, :, 0] = True
+    # Circuit 1 is both the first child and the second parent
+    circuits[0].crossover_batch([circuits[0], circuits[1]], [circuits[1], circuits[2]], masks)
+    tiles = genome.bits.reshape((3,) + genome.shape)
+    expected = before.reshape((3,) + genome.shape)
+    assert np.array_equal(tiles[1, :, 0], expected[0, :, 0])
+    assert np.array_equal(tiles[2, :, 0], expected[1, :, 0])
+    assert np.array_equal(tiles[2, :, 1:], expected[2, :, 1:])
+
+def test_unbound_crossover_matches_genome():
+    genome, circuits = make_population(2)
+    circuits[0].randomize_bitstream()
+    circuits[1].randomize_bitstream()
+    unbound = IntrinsicCircuit(2, 'genome2', config, template, np.random.default_rng(0), logger, Mock(), Mock())
+    unbound.copy_from(circuits[1])
+
+    circuits[1].crossover(circuits[0], 2)
+    unbound.crossover(circuits[0], 2)
+    assert np.array_equal(unbound.get_bitstream(), circuits[1].get_bitstream())
+
+def test_mutate_rows_uses_each_chance():
+    genome = PopulationGenome(3, 10, 3, 6)
+    genome.mutate_rows([0, 2], [0.0, 1.0], np.random.default_rng(0))
+    assert not genome.bits[0].any()
+    assert not genome.bits[1].any()
+    assert genome.bits[2].all()
+    assert list(genome.dirty) == [True, False, True]
+
+def test_mutate_rows_flips_each_bit_with_its_chance():
+    genome = PopulationGenome(2, 1000, 10, 2)
+    genome.mutate_rows([0, 1], [0.01, 0.2], np.random.default_rng(0))
+    flipped = genome.bits.sum(axis=1)
+    assert 100 < flipped[0] < 300
+    assert 3000 < flipped[1] < 5000
+
+def test_simple_mutation_is_one_seeded_draw():
+    config.get_mutation_probability.return_value = 0.1
+    config.get_compile_workers.return_value = 2
+    results = []
+    for _ in range(2):
+        genome, circuits = make_population(3)
+        SimpleMutation(config, np.random.default_rng(42))(circuits, set(circuits[1:]))
+        assert list(genome.dirty) == [False, True, True]
+        results.append(genome.bits.copy())
+    assert np.array_equal(results[0], results[1])
+
+def assert_hashes_match(genome):
+    assert [int(h) for h in genome.hashes] == [zobrist_hash(row) for row in genome.bits]
+
+def test_hashes_follow_every_row_operation():
+    genome, circuits = make_population(3)
+    assert_hashes_match(genome)
+    assert circuits[0].get_genome_hash() == circuits[1].get_genome_hash()
+
+    circuits[0].randomize_bitstream()
+    circuits[1].mutate(0.1)
+    genome.mutate_rows([1, 2], [0.05, 0.2], np.random.default_rng(1))
+    assert_hashes_match(genome)
+
+    circuits[2].copy_from(circuits[0])
+    assert circuits[2].get_genome_hash() == circuits[0].get_genome_hash()
+
+    masks = np.zeros((2,) + genome.shape[:2], dtype=bool)
+    masks[:, :, 1] = True
+    circuits[0].crossover_batch([circuits[0], circuits[1]], [circuits[1], circuits[2]], masks)
+    circuits[0].set_bitstream(np.ones(genome.length, dtype=np.uint8))
+    assert_hashes_match(genome)
+
+def test_unbound_hash_matches_genome():
+    genome, circuits = make_population(1)
+    circuits[0].mutate(0.3)
+    unbound = IntrinsicCircuit(1, 'genome1', config, template, np.random.default_rng(0), logger, Mock(), Mock())
+    unbound.copy_from(circuits[0])
+    assert unbound.get_genome_hash() == circuits[0].get_genome_hash()
@@ -0,0 +1,49 @@
+from Circuit.Scheduler import Throughput, WorkQueue
+
+def test_throughput_relative_speed():
+    throughput = Throughput()
+    assert throughput.relative_speed("A", ["A", "B"]) == 1.0
+    throughput.record("A", 4, 1.0)
+    throughput.record("B", 1, 1.0)
+    assert throughput.seconds_per_evaluation("A") == 0.25
+    assert throughput.relative_speed("A", ["A", "B"]) == 2.5
+    assert throughput.relative_speed("B", ["A", "B"]) == 0.625
+
+def test_faster_devices_take_larger_chunks():
+    throughput = Throughput()
+    throughput.record("A", 4, 1.0)
+    throughput.record("B", 1, 1.0)
+    queue = WorkQueue(20, ["A", "B"], 4, throughput, False, 0)
+    assert len(queue.take("A")) == 10
+    assert len(queue.take("B")) == 2
+
+def test_lost_evaluations_are_queued_again_on_healthy_devices():
+    queue = WorkQueue(2, ["A", "B"], 1, Throughput(), False, 1)
+    lost, returned = queue.take("A"), queue.take("B")
+    assert queue.claim(returned[0])
+    queue.finish(returned[0])
+    queue.release("B", returned)
+    queue.release("A", lost)
+    # A lost an evaluation, so only B takes work from now on
+    assert queue.take("A") is None
+    assert queue.take("B") == lost
+    queue.release("B", lost)
+    assert queue.done()
+    assert queue.failed == {lost[0]: "B"}
+
+def test_speculative_copies_of_stragglers():
+    throughput = Throughput()
+    throughput.record("A", 1, 10.0)
+    queue = WorkQueue(2, ["A", "B"], 1, throughput, True, 0)
+    slow, fast = queue.take("A"), queue.take("B")
+    assert queue.claim(fast[0])
+    queue.finish(fast[0])
+    queue.release("B", fast)
+    assert queue.take("B") == slow
+    assert queue.claim(slow[0])
+    queue.finish(slow[0])
+    assert queue.done()
+    # The result of the slow device arrives too late and is discarded
+    assert not queue.claim(slow[0])
+    queue.release("A", slow)
+    assert queue.failed == {}
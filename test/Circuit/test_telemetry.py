@@ -0,0 +1,33 @@
+from types import SimpleNamespace
+
+from Circuit.Telemetry import Telemetry, distribution
+
+def evaluation(*serials):
+    return SimpleNamespace(serials=frozenset(serials))
+
+def test_distribution_percentiles():
+    summary = distribution(list(range(101)))
+    assert summary["count"] == 101
+    assert (summary["p50"], summary["p95"], summary["p99"], summary["max"]) == (50, 95, 99, 100)
+    assert distribution([]) == {"count": 0}
+
+def test_batches_devices_and_queue_depth():
+    telemetry = Telemetry()
+    batch = telemetry.dispatch([evaluation("A"), evaluation("A", "B")])
+    batch.result("A", False)
+    batch.result("B", True)
+    batch.finish()
+
+    summary = telemetry.summary(["A", "B", "C"])
+    assert summary["queue_depth"]["max"] == 3
+    assert summary["first_result_latency"]["count"] == 1
+    assert summary["batches"][0]["evaluations"] == 3
+    assert summary["devices"]["A"]["evaluations"] == 1
+    assert summary["devices"]["B"]["failures"] == 1
+    # C was never sent anything, so it was idle the whole time
+    assert summary["devices"]["C"]["idle_seconds"] == summary["seconds"]
+
+    telemetry.reset()
+    # The result that never arrived is no longer outstanding
+    telemetry.dispatch([evaluation("A")])
+    assert telemetry.summary()["queue_depth"]["max"] == 1
@@ -0,0 +1,53 @@
+import numpy as np
+
+from Checkpoint import Checkpoint
+
+def test_round_trip(tmp_path):
+    rand = np.random.default_rng(0)
+    bits = (rand.random((3, 21)) < 0.5).astype(np.uint8)
+    state = {"epoch": 4, "rand_state": rand.bit_generator.state, "overall_best": ["hardware2", float("-inf")]}
+    Checkpoint(["hardware1", "hardware2", "hardware3"], bits, np.array([1.0, 2.5, 0.0]), [[1.0, 2.0], [], [3.0]], state).save(tmp_path.joinpath("checkpoint.npz"))
+
+    checkpoint = Checkpoint.load(tmp_path.joinpath("checkpoint.npz"))
+    assert checkpoint.names == ["hardware1", "hardware2", "hardware3"]
+    assert np.array_equal(checkpoint.bits, bits)
+    assert checkpoint.fitness.tolist() == [1.0, 2.5, 0.0]
+    assert checkpoint.data == [[1.0, 2.0], [], [3.0]]
+    assert checkpoint.state == state
+
+    restored = np.random.default_rng()
+    restored.bit_generator.state = checkpoint.state["rand_state"]
+    assert restored.random() == rand.random()
+
+def test_save_replaces_previous(tmp_path):
+    path = tmp_path.joinpath("checkpoint.npz")
+    for epoch in [1, 2]:
+        Checkpoint(["hardware1"], np.zeros((1, 8), dtype=np.uint8), np.zeros(1), [[]], {"epoch": epoch}).save(path)
+    assert Checkpoint.load(path).state["epoch"] == 2
+    assert [p.name for p in tmp_path.iterdir()] == ["checkpoint.npz"]
+
+class Named:
+    def __init__(self, name):
+        self.name = name
+
+    def __repr__(self):
+        return self.name
+
+def test_swapped_population_round_trip(tmp_path):
+    # Steady state evolution swapped offspring2 into the population in place of hardware2
+    path = tmp_path.joinpath("checkpoint.npz")
+    bits = np.eye(3, 8, dtype=np.uint8)
+    Checkpoint(["hardware1", "offspring2", "hardware3"], bits, np.array([1.0, 3.0, 2.0]), [[1.0], [3.0], [2.0]], {"epoch": 5}).save(path)
+    checkpoint = Checkpoint.load(path)
+
+    fresh = [Named(name) for name in ["hardware1", "hardware2", "hardware3", "offspring1", "offspring2"]]
+    matched = checkpoint.match(fresh)
+    assert {name: str(c) for name, c in matched.items()} == {"hardware1": "hardware1", "offspring2": "offspring2", "hardware3": "hardware3"}
+    assert np.array_equal(checkpoint.bits[checkpoint.names.index("offspring2")], bits[1])
+
+    # Resumed with a single device, so offspring2 no longer exists
+    fewer = [Named(name) for name in ["hardware1", "hardware2", "hardware3", "offspring1"]]
+    matched = checkpoint.match(fewer)
+    assert str(matched["offspring2"]) == "hardware2"
+    assert len(set(map(id, matched.values()))) == 3
+    assert checkpoint.match(fewer[:2]) is None
@@ -0,0 +1,45 @@
+from unittest.mock import Mock
+
+import numpy as np
+
+from Circuit.ModifiableIndex import ModifiableIndex
+from ga.crossover import EachCrossover, SimpleCrossover, TwoPointCrossover, UniformCrossover
+
+config = Mock()
+config.get_crossover_probability.return_value = 1.0
+config.get_routing_rows.return_value = [1, 2, 13]
+
+index = Mock(spec=ModifiableIndex)
+index.rows = (1, 2, 13)
+index.num_tiles = 4
+index.point_mask = lambda points: ModifiableIndex.point_mask(index, points)
+
+def test_point_masks_select_one_row_per_tile():
+    rand = np.random.default_rng(0)
+    simple = SimpleCrossover(config, rand)._masks(5, index)
+    assert simple.shape == (5, 4, 3)
+    # Crossover points are drawn from [1, 13), so row 13 is never selected
+    assert not simple[:, :, 2].any()
+    assert (simple.sum(axis=2) <= 1).all()
+    # The same row is used in every tile
+    assert (simple == simple[:, :1]).all()
+
+    each = EachCrossover(config, rand)._masks(5, index)
+    assert (each.sum(axis=2) <= 1).all()
+
+def test_uniform_and_two_point_masks():
+    rand = np.random.default_rng(0)
+    uniform = UniformCrossover(config, rand)._masks(100, index)
+    assert 0.4 < uniform.mean() < 0.6
+
+    two_point = TwoPointCrossover(config, rand)._masks(100, index)
+    for mask in two_point:
+        tiles = np.nonzero(mask.all(axis=1))[0]
+        assert mask.any(axis=1).sum() == tiles.size
+        if tiles.size:
+            assert np.array_equal(tiles, np.arange(tiles[0], tiles[-1] + 1))
+
+def test_batch_falls_back_for_simulated_circuits():
+    source, dest = Mock(), Mock()
+    assert SimpleCrossover(config, np.random.default_rng(0)).batch([(source, dest)]) == [True]
+    dest.crossover.assert_called_once()
@@ -0,0 +1,97 @@
+from threading import Thread
+from unittest.mock import Mock
+
+import pytest
+from icefarm.client.lib.BatchClient import EvaluationFailed
+from icefarm.client.lib.pulsecount import PulseCountEvaluation
+
+from DevicePool import FairShareQueue, PoolClient, SharedDevicePool, connect_pool, serve_pool
+from LocalFarm import LocalClient, LocalFarm, bitstream_digest, pulse_count
+
+@pytest.fixture
+def bitstreams(tmp_path):
+    paths = []
+    for i in range(6):
+        path = tmp_path / f"{i}.bin"
+        path.write_bytes(bytes([i]) * 16)
+        paths.append(path)
+    return paths
+
+def local_pool(devices=2, latency=0.0):
+    client = LocalClient(LocalFarm(devices, latency, 0, 0), "pulsecount", Mock())
+    client.reserve(devices)
+    return client, SharedDevicePool(client, chunk=4, in_flight=2, logger=Mock(), batch_size=2)
+
+def evaluate(client, bitstreams):
+    evaluations = [PulseCountEvaluation(client.getSerials(), path) for path in bitstreams]
+    results = {}
+    for serial, evaluation, result in client.evaluateEvaluations(evaluations):
+        results.setdefault(evaluation.filepath, {})[serial] = result
+    return results
+
+def test_queue_interleaves_experiments():
+    queue = FairShareQueue()
+    queue.put("a", ["a0", "a1", "a2", "a3"])
+    queue.put("b", ["b0"])
+    queue.put("c", ["c0", "c1"])
+    assert queue.take(4) == ["a0", "b0", "c0", "a1"]
+    assert queue.take(4) == ["c1", "a2", "a3"]
+    assert queue.take(4, block=False) == []
+
+def test_closing_the_queue_wakes_takers():
+    queue = FairShareQueue()
+    taken = []
+    taker = Thread(target=lambda: taken.append(queue.take(1)))
+    taker.start()
+    queue.close()
+    taker.join(timeout=5)
+    assert taken == [[]]
+
+def test_experiments_get_every_result(bitstreams):
+    pool_client, pool = local_pool()
+    a, b = PoolClient(pool, Mock(), poll_seconds=0.1), PoolClient(pool, Mock(), poll_seconds=0.1)
+    a._name, b._name = "a", "b"
+    results = {}
+    threads = [
+        Thread(target=lambda: results.update(a=evaluate(a, bitstreams[:4]))),
+        Thread(target=lambda: results.update(b=evaluate(b, bitstreams[4:]))),
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=30)
+    pool.close()
+
+    assert a.getSerials() == pool_client.getSerials()
+    for name, paths in (("a", bitstreams[:4]), ("b", bitstreams[4:])):
+        assert set(results[name]) == set(paths)
+        for path, by_serial in results[name].items():
+            assert by_serial == {serial: pulse_count(bitstream_digest(path)) for serial in pool_client.getSerials()}
+
+def test_devices_without_a_result_fail(bitstreams):
+    pool_client, pool = local_pool()
+    pool_client.end(["LOCAL0001"])
+    client = PoolClient(pool, Mock(), poll_seconds=0.1)
+    evaluations = [PulseCountEvaluation(["LOCAL0000", "LOCAL0001"], path) for path in bitstreams[:2]]
+    results = [(serial, result) for serial, _, result in client.evaluateEvaluations(evaluations)]
+    pool.close()
+    assert sorted(serial for serial, result in results if result is EvaluationFailed) == ["LOCAL0001", "LOCAL0001"]
+    assert len(results) == 4
+
+def test_reservation_is_left_to_the_pool():
+    pool_client, pool = local_pool()
+    client = PoolClient(pool, Mock())
+    assert client.reserve(5) == pool_client.getSerials()
+    assert client.available() == 0
+    client.end(["LOCAL0000"])
+    client.endAll()
+    pool.close()
+    assert pool_client.getSerials() == ["LOCAL0000", "LOCAL0001"]
+
+def test_pool_is_served_to_other_processes(bitstreams):
+    pool_client, pool = local_pool()
+    client = PoolClient(connect_pool(serve_pool(pool)), Mock(), poll_seconds=0.1)
+    results = evaluate(client, bitstreams[:2])
+    pool.close()
+    assert set(results) == set(bitstreams[:2])
+    assert all(len(by_serial) == 2 for by_serial in results.values())
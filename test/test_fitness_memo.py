@@ -0,0 +1,77 @@
+import numpy as np
+
+from FitnessMemo import ConfidenceInterval, Decision, EveryKGenerations, FitnessMemo, FitnessRecord, UntilNSamples
+from ga.genome import zobrist_hash
+
+class MemoCircuit:
+    def __init__(self, bits):
+        self.bits = np.array(bits, dtype=np.uint8)
+        self._data = []
+        self._fitness = 0
+
+    def get_genome_hash(self):
+        return zobrist_hash(self.bits)
+
+    def get_fitness(self):
+        return self._fitness
+
+    def restore_fitness(self, fitness, data):
+        self._fitness = fitness
+        self._data = list(data)
+
+def measure(circuits, fitness):
+    for circuit in circuits:
+        circuit._fitness = fitness
+        circuit._data = [fitness]
+
+def test_record_running_stats():
+    record = FitnessRecord()
+    for i, fitness in enumerate([1.0, 2.0, 3.0, 4.0]):
+        record.add(fitness, [fitness], i)
+    assert record.count == 4
+    assert record.mean == 2.5
+    assert np.isclose(record.variance(), np.var([1, 2, 3, 4], ddof=1))
+    assert record.last_generation == 3
+
+def test_policies():
+    record = FitnessRecord()
+    record.add(1.0, [], 0)
+    assert EveryKGenerations(2)(record, 1) == Decision.REUSE
+    assert EveryKGenerations(2)(record, 2) == Decision.TOP_UP
+    assert UntilNSamples(2)(record, 1) == Decision.TOP_UP
+    assert ConfidenceInterval(0.1, 10)(record, 1) == Decision.TOP_UP
+    record.add(1.0, [], 1)
+    assert UntilNSamples(2)(record, 2) == Decision.REUSE
+    assert ConfidenceInterval(0.1, 10)(record, 2) == Decision.REUSE
+
+def test_duplicates_measured_once_and_topped_up():
+    memo = FitnessMemo(UntilNSamples(2), 100)
+    circuits = [MemoCircuit([0, 1]), MemoCircuit([0, 1]), MemoCircuit([1, 1])]
+
+    to_measure = memo.plan(circuits, 0)
+    assert to_measure == [circuits[0], circuits[2]]
+    measure(to_measure, 1.0)
+    memo.record(circuits, to_measure, 0)
+    assert circuits[1].get_fitness() == 1.0
+
+    to_measure = memo.plan(circuits, 1)
+    measure(to_measure, 3.0)
+    memo.record(circuits, to_measure, 1)
+    assert [c.get_fitness() for c in circuits] == [2.0, 2.0, 2.0]
+
+    assert memo.plan(circuits, 2) == []
+
+def test_state_round_trip():
+    memo = FitnessMemo(UntilNSamples(3), 100)
+    circuits = [MemoCircuit([0, 1]), MemoCircuit([1, 1])]
+    to_measure = memo.plan(circuits, 0)
+    measure(to_measure, 2.0)
+    memo.record(circuits, to_measure, 0)
+
+    restored = FitnessMemo(UntilNSamples(3), 100)
+    restored.set_state(memo.get_state())
+    assert len(restored) == 2
+    assert restored.plan(circuits, 1) == circuits
+    measure(circuits, 4.0)
+    restored.record(circuits, circuits, 1)
+    assert [c.get_fitness() for c in circuits] == [3.0, 3.0]
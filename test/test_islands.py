@@ -0,0 +1,60 @@
+import numpy as np
+
+from ga.islands import Island, Migrant, migration_destinations
+
+class IslandCircuit:
+    def __init__(self, fitness):
+        self.bits = np.array([fitness], dtype=np.uint8)
+        self._fitness = fitness
+        self._data = [fitness]
+        self.attributes = {"src_population": "0"}
+
+    def get_bitstream(self):
+        return self.bits.copy()
+
+    def set_bitstream(self, bits):
+        self.bits = bits
+
+    def get_fitness(self):
+        return self._fitness
+
+    def restore_fitness(self, fitness, data):
+        self._fitness = fitness
+        self._data = list(data)
+
+    def get_file_attribute(self, attribute):
+        return self.attributes.get(attribute)
+
+    def set_file_attribute(self, attribute, value):
+        self.attributes[attribute] = value
+
+def test_destinations():
+    assert migration_destinations("RING", 3) == {0: [1], 1: [2], 2: [0]}
+    assert migration_destinations("RING", 1) == {0: []}
+    assert migration_destinations("FULLY_CONNECTED", 3) == {0: [1, 2], 1: [0, 2], 2: [0, 1]}
+
+def test_emigrants_are_the_fittest():
+    island = Island(0, [IslandCircuit(f) for f in [1, 5, 3]], None, None)
+    migrants = island.emigrants(2)
+    assert [m.fitness for m in migrants] == [5, 3]
+    assert migrants[0].bitstream.tolist() == [5]
+
+def test_immigrants_replace_the_least_fit():
+    circuits = [IslandCircuit(f) for f in [4, 1, 2, 3]]
+    island = Island(1, circuits, None, None)
+    island.inbox = [Migrant(np.array([9]), 9, [9], "2"), Migrant(np.array([7]), 7, [7], "0")]
+
+    replaced = island.immigrate()
+    assert set(replaced) == {circuits[1], circuits[2]}
+    assert circuits[1].get_fitness() == 9 and circuits[1].bits.tolist() == [9]
+    assert circuits[1].get_file_attribute("src_population") == "2"
+    assert circuits[2].get_fitness() == 7
+    assert island.inbox == []
+
+def test_best_circuit_is_never_replaced():
+    circuits = [IslandCircuit(f) for f in [4, 1]]
+    island = Island(0, circuits, None, None)
+    island.inbox = [Migrant(np.array([9]), 9, [9], "1")] * 3
+    island.immigrate()
+    assert circuits[0].get_fitness() == 4
+    assert circuits[1].get_fitness() == 9
@@ -0,0 +1,61 @@
+from unittest.mock import Mock
+
+import pytest
+from icefarm.client.lib.BatchClient import EvaluationFailed
+from icefarm.client.lib.pulsecount import PulseCountEvaluation
+
+from LocalFarm import LocalClient, LocalFarm, WAVEFORM_SAMPLES
+
+@pytest.fixture
+def bitstreams(tmp_path):
+    paths = []
+    for i in range(4):
+        path = tmp_path / f"{i}.bin"
+        path.write_bytes(bytes([i]) * 16)
+        paths.append(path)
+    return paths
+
+def evaluate(client, bitstreams, batch_size=2):
+    evaluations = [PulseCountEvaluation(client.getSerials(), path) for path in bitstreams]
+    results = {}
+    for serial, evaluation, result in client.evaluateEvaluations(evaluations, batch_size=batch_size):
+        results.setdefault(evaluation.filepath, {})[serial] = result
+    return results
+
+def test_results_depend_only_on_the_bitstream(bitstreams):
+    client = LocalClient(LocalFarm(2, [0, 0.001], 0, 0), "pulsecount", Mock())
+    client.reserve(2)
+    results = evaluate(client, bitstreams)
+    assert all(len(set(by_serial.values())) == 1 for by_serial in results.values())
+    assert results == evaluate(client, bitstreams)
+    assert len(set(next(iter(r.values())) for r in results.values())) == len(bitstreams)
+
+def test_variance_results_include_the_waveform(bitstreams):
+    client = LocalClient(LocalFarm(1, 0, 0, 0), "variance", Mock(), send_waveform=True)
+    client.reserve(1)
+    fitness, samples = next(iter(evaluate(client, bitstreams[:1])[bitstreams[0]].values()))
+    assert isinstance(fitness, float)
+    assert len(samples) == WAVEFORM_SAMPLES
+
+def test_reservations():
+    farm = LocalFarm(3, 0, 0, 0)
+    client = LocalClient(farm, "pulsecount", Mock())
+    assert client.reserveSpecific(["LOCAL0001"]) == ["LOCAL0001"]
+    assert client.reserve(2) == ["LOCAL0000", "LOCAL0002"]
+    assert client.available() == 0
+    with pytest.raises(Exception):
+        client.reserve(1)
+    client.endAll()
+    assert client.getSerials() == []
+    assert farm.available() == 3
+
+def test_failed_devices_end_their_reservation(bitstreams):
+    farm = LocalFarm(2, 0, 0, 0)
+    farm.devices["LOCAL0001"].failure_rate = 1
+    client = LocalClient(farm, "pulsecount", Mock())
+    client.reserve(2)
+    results = evaluate(client, bitstreams)
+    assert all(by_serial["LOCAL0001"] is EvaluationFailed for by_serial in results.values())
+    assert all(by_serial["LOCAL0000"] is not EvaluationFailed for by_serial in results.values())
+    assert client.getSerials() == ["LOCAL0000"]
+    assert farm.available() == 0
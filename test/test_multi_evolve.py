@@ -1,8 +1,10 @@
 #! /bin/python
+import logging
 import pytest
 
 from collections.abc import Iterator  
 from functools import partial
+from pathlib import Path
 
 from typing import Callable
 #from typing import override
@@ -147,4 +149,32 @@ def test_multiple_config_recieved(configs_name:[str],test_evolution_object:TestE
     for i in range(len(configs_name)):
         assert configs_name[i] == configs_evolved[i], "Error: "+str(configs_name)+"!="+str(configs_evolved)
 
-
+def test_sandboxes_are_not_reused(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "src").mkdir()
+    (tmp_path / "workspace").mkdir()
+    sandbox = tmp_path / "workspace" / "concurrent" / "run" / "1-config"
+    multi_evolve._make_sandbox(sandbox)
+    assert (sandbox / "src").is_symlink()
+    assert (sandbox / "workspace").is_dir()
+    assert not (sandbox / "workspace" / "concurrent").exists()
+    (sandbox / "workspace" / "result.log").touch()
+    with pytest.raises(FileExistsError):
+        multi_evolve._make_sandbox(sandbox)
+    assert (sandbox / "workspace" / "result.log").exists()
+
+def test_concurrent_configs_must_share_evaluation_settings(tmp_path, monkeypatch):
+    base_config = str(Path("data", "default_config.ini").resolve())
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "workspace").mkdir()
+    def write_config(name, simulation_mode, fitness_func):
+        (tmp_path / name).write_text(f"[TOP-LEVEL PARAMETERS]\nsimulation_mode = {simulation_mode}\n[FITNESS PARAMETERS]\nfitness_func = {fitness_func}\n")
+        return name
+    variance = write_config("variance.ini", "REMOTE", "VARIANCE")
+    pulses = write_config("pulses.ini", "REMOTE", "PULSE_COUNT")
+    intrinsic = write_config("intrinsic.ini", "FULLY_INTRINSIC", "VARIANCE")
+    logger = logging.getLogger("test_multi_evolve")
+
+    assert multi_evolve._check_concurrent_configs([variance, variance], base_config, logger)
+    assert not multi_evolve._check_concurrent_configs([variance, pulses], base_config, logger)
+    assert not multi_evolve._check_concurrent_configs([variance, intrinsic], base_config, logger)
@@ -0,0 +1,72 @@
+import numpy as np
+
+from Prescreen import NearestNeighbours, Prescreen
+
+class ScreenCircuit:
+    def __init__(self, bits, fitness=0.0):
+        self.bits = np.array(bits, dtype=np.uint8)
+        self._fitness = fitness
+        self._data = []
+        self.attributes = {}
+
+    def get_genome(self):
+        return None
+
+    def get_bitstream(self):
+        return self.bits
+
+    def get_fitness(self):
+        return self._fitness
+
+    def restore_fitness(self, fitness, data):
+        self._fitness = fitness
+        self._data = list(data)
+
+    def set_file_attribute(self, attribute, value):
+        self.attributes[attribute] = value
+
+def test_nearest_neighbours_predicts_from_the_closest_genomes():
+    model = NearestNeighbours(1, 10)
+    assert not model.ready()
+    model.observe(np.array([[0, 0, 0, 0], [1, 1, 1, 1]]), np.array([0.0, 10.0]))
+    assert model.ready()
+    assert model.predict(np.array([[0, 0, 0, 1], [1, 1, 0, 1]])).tolist() == [0.0, 10.0]
+
+def test_nearest_neighbours_forgets_old_measurements():
+    model = NearestNeighbours(1, 1)
+    model.observe(np.array([[0, 0]]), np.array([1.0]))
+    model.observe(np.array([[1, 1]]), np.array([5.0]))
+    assert model.predict(np.array([[0, 0]])).tolist() == [5.0]
+
+def test_nearest_neighbours_compares_every_bit_in_chunks(monkeypatch):
+    monkeypatch.setattr(NearestNeighbours, "CHUNK_BYTES", 1)
+    rand = np.random.default_rng(0)
+    archive = (rand.random((5, 21)) < 0.5).astype(np.uint8)
+    model = NearestNeighbours(1, 5)
+    model.observe(archive, np.arange(5.0))
+    queries = archive.copy()
+    # The last bit is not in the first packed byte
+    queries[:, -1] ^= 1
+    assert model.predict(queries).tolist() == [0.0, 1.0, 2.0, 3.0, 4.0]
+
+def test_nothing_is_estimated_until_the_model_is_ready():
+    prescreen = Prescreen(NearestNeighbours(2, 10), 0.5, None)
+    assert prescreen.screen([ScreenCircuit([0, 0])]) == set()
+
+def test_least_promising_offspring_are_estimated():
+    prescreen = Prescreen(NearestNeighbours(1, 10), 0.25, None)
+    prescreen.observe([ScreenCircuit([0, 0, 0, 0], 0.0), ScreenCircuit([1, 1, 1, 1], 10.0), ScreenCircuit([1, 1, 0, 0], 4.0)])
+
+    offspring = [ScreenCircuit(bits) for bits in [[0, 0, 0, 1], [1, 1, 1, 1], [1, 1, 0, 0], [0, 0, 1, 0]]]
+    estimated = prescreen.screen(offspring)
+    assert estimated == {offspring[0], offspring[2], offspring[3]}
+    assert offspring[2].get_fitness() == 4.0
+    assert offspring[2].attributes == {"estimated": "true"}
+    assert offspring[1].attributes == {}
+
+def test_threshold_measures_promising_offspring():
+    prescreen = Prescreen(NearestNeighbours(1, 10), 0.25, 3.0)
+    prescreen.observe([ScreenCircuit([0, 0], 0.0), ScreenCircuit([1, 1], 10.0), ScreenCircuit([1, 0], 4.0)])
+
+    offspring = [ScreenCircuit(bits) for bits in [[1, 1], [1, 0], [0, 0]]]
+    assert prescreen.screen(offspring) == {offspring[2]}
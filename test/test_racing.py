@@ -0,0 +1,58 @@
+from Racing import Race
+
+class RaceCircuit:
+    def __init__(self, fitness=0.0):
+        self._fitness = fitness
+        self._data = []
+
+    def get_fitness(self):
+        return self._fitness
+
+    def restore_fitness(self, fitness, data):
+        self._fitness = fitness
+        self._data = list(data)
+
+def run_pass(race, circuits, fitnesses):
+    for circuit, fitness in zip(circuits, fitnesses):
+        circuit._fitness = fitness
+        circuit._data = [fitness]
+        race.add(circuit)
+
+def test_only_circuits_near_the_cutoff_race_on():
+    circuits = [RaceCircuit() for _ in range(4)]
+    race = Race(2, 5)
+    run_pass(race, circuits, [100, 50.5, 49.5, 0])
+    run_pass(race, circuits, [102, 52.5, 47.5, 2])
+
+    assert race.contenders(circuits) == [circuits[1], circuits[2]]
+
+def test_single_pass_borrows_the_pooled_noise():
+    circuits = [RaceCircuit() for _ in range(3)]
+    race = Race(1, 5)
+    run_pass(race, circuits[:2], [10, 0])
+    assert race.contenders(circuits) == circuits[:2]
+
+    run_pass(race, circuits[:1], [10])
+    run_pass(race, circuits[1:2], [0])
+    run_pass(race, circuits[2:], [1])
+    assert race.contenders(circuits) == []
+
+def test_passes_are_capped_and_averaged():
+    circuits = [RaceCircuit(), RaceCircuit()]
+    race = Race(1, 2)
+    run_pass(race, circuits, [1, 2])
+    run_pass(race, circuits, [3, 0])
+    assert race.contenders(circuits) == []
+
+    race.finish()
+    assert [c.get_fitness() for c in circuits] == [2, 1]
+    assert circuits[0]._data == [1, 3]
+    assert race.passes(circuits[0]) == 2
+
+def test_reused_circuits_count_toward_the_cutoff():
+    raced, reused = RaceCircuit(), RaceCircuit(5)
+    race = Race(1, 5)
+    run_pass(race, [raced], [1.9])
+    run_pass(race, [raced], [2.1])
+    assert race.contenders([raced, reused]) == []
+    assert race.passes(reused) == 0
@@ -0,0 +1,67 @@
+from unittest.mock import Mock
+
+import numpy as np
+
+from ga.mixins import SurrogateBias
+from ga.surrogate import Surrogate, prediction_metrics
+
+rand = np.random.default_rng(0)
+
+def genomes(count):
+    return rand.integers(0, 2, (count, 16))
+
+def test_ridge_learns_fitness_and_dead_circuits():
+    surrogate = Surrogate(0.1, 64, False, np.random.default_rng(1))
+    assert not surrogate.ready()
+    for _ in range(5):
+        bits = genomes(20)
+        surrogate.observe(bits, 3.0 * bits[:, 0] + bits[:, 1], bits[:, 2] == 0)
+    assert surrogate.ready()
+
+    bits = genomes(50)
+    assert np.allclose(surrogate.predict(bits), 3.0 * bits[:, 0] + bits[:, 1], atol=0.1)
+    assert np.mean((surrogate.predict_dead(bits) >= 0.5) == (bits[:, 2] == 0)) > 0.9
+    assert surrogate.metrics["rank_correlation"] > 0.9
+
+def test_random_features_are_drawn_once():
+    surrogate = Surrogate(1.0, 8, True, np.random.default_rng(1))
+    bits = genomes(20)
+    surrogate.observe(bits, bits.sum(axis=1).astype(float), np.zeros(20, dtype=bool))
+    assert surrogate.predict(bits).tolist() == surrogate.predict(bits).tolist()
+
+def test_prediction_metrics():
+    metrics = prediction_metrics(np.array([1.0, 2.0, 3.0]), np.array([1.0, 2.0, 5.0]), np.array([0.9, 0.1, 0.2]), np.array([True, False, True]))
+    assert np.isclose(metrics["rmse"], np.sqrt(4 / 3))
+    assert metrics["rank_correlation"] == 1.0
+    assert np.isclose(metrics["dead_accuracy"], 2 / 3)
+
+class BiasCircuit:
+    def __init__(self, dead):
+        self.dead = dead
+        self.mutations = 0
+
+    def get_genome(self):
+        return None
+
+    def get_bitstream(self):
+        return np.array([1 if self.dead else 0])
+
+    def mutate(self):
+        self.mutations += 1
+        self.dead = False
+
+def test_bias_mutates_offspring_predicted_dead():
+    surrogate = Mock()
+    surrogate.predict_dead.side_effect = lambda bits: bits[:, 0].astype(float)
+    elite, alive, dead = BiasCircuit(True), BiasCircuit(False), BiasCircuit(True)
+    selection = Mock(protected={elite})
+
+    SurrogateBias(surrogate, 0.9, Mock())([elite, alive, dead], selection)
+    assert [c.mutations for c in (elite, alive, dead)] == [0, 0, 1]
+
+def test_long_genomes_are_hashed():
+    surrogate = Surrogate(1.0, 8, False, np.random.default_rng(1))
+    bits = rand.integers(0, 2, (20, 1000))
+    surrogate.observe(bits, bits[:, :500].sum(axis=1).astype(float), np.zeros(20, dtype=bool))
+    assert surrogate.predict(bits).shape == (20,)
+    assert surrogate._gram.shape == (9, 9)
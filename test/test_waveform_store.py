@@ -0,0 +1,73 @@
+import numpy as np
+
+from WaveformStore import SAMPLE_DTYPE, WaveformStore, as_samples, write_waveform_log
+
+def test_waveforms_are_found_by_generation_and_circuit(tmp_path):
+    store = WaveformStore(tmp_path, 8)
+    store.append(1, 3, [1, 2, 3])
+    store.append(1, 4, [4, 5, 6])
+    store.append(2, 3, [7, 8, 9])
+    assert store.get(1, 3).tolist() == [1, 2, 3]
+    assert store.get(2, 3).tolist() == [7, 8, 9]
+    assert store.get(2, 4) is None
+    generation, circuit, samples = store.latest()
+    assert (generation, circuit, samples.tolist()) == (2, 3, [7, 8, 9])
+    assert store.entries() == [(1, 3), (1, 4), (2, 3)]
+
+def test_the_oldest_waveforms_are_overwritten(tmp_path):
+    store = WaveformStore(tmp_path, 2)
+    for generation in range(5):
+        store.append(generation, 0, [generation] * 4)
+    assert len(store) == 2
+    assert store.entries() == [(3, 0), (4, 0)]
+    assert store.get(2, 0) is None
+    assert store.latest()[2].tolist() == [4] * 4
+
+def test_longer_waveforms_are_truncated(tmp_path):
+    store = WaveformStore(tmp_path, 4)
+    assert store.append(0, 0, [1, 2, 3])
+    assert store.append(0, 1, [1, 2])
+    assert not store.append(0, 2, [1, 2, 3, 4])
+    assert store.get(0, 1).tolist() == [1, 2]
+    assert store.get(0, 2).tolist() == [1, 2, 3]
+
+def test_readers_see_appended_waveforms(tmp_path):
+    assert WaveformStore.open(tmp_path) is None
+    store = WaveformStore(tmp_path, 4)
+    store.append(0, 1, [10, 20])
+    store.flush()
+    reader = WaveformStore.open(tmp_path)
+    assert reader.latest()[2].tolist() == [10, 20]
+    store.append(1, 1, [30, 40])
+    store.flush()
+    assert WaveformStore.open(tmp_path).latest()[:2] == (1, 1)
+    # A new store replaces the old waveforms
+    WaveformStore(tmp_path, 4)
+    assert WaveformStore.open(tmp_path) is None
+
+def test_resumed_stores_keep_checkpointed_waveforms(tmp_path):
+    store = WaveformStore(tmp_path, 4)
+    for generation in range(3):
+        store.append(generation, 0, [generation, generation])
+    store.flush()
+    resumed = WaveformStore.resume(tmp_path, 4, 1)
+    assert resumed.entries() == [(0, 0), (1, 0)]
+    resumed.append(2, 1, [5, 6])
+    assert resumed.entries() == [(0, 0), (1, 0), (2, 1)]
+    assert resumed.get(2, 0) is None
+    assert resumed.latest()[2].tolist() == [5, 6]
+
+def test_resuming_without_a_store_starts_one(tmp_path):
+    store = WaveformStore.resume(tmp_path, 4, 3)
+    assert len(store) == 0
+    store.append(4, 0, [1])
+    assert store.entries() == [(4, 0)]
+
+def test_samples_are_converted():
+    samples = as_samples(["1", "2.0", "4095"])
+    assert samples.dtype == SAMPLE_DTYPE
+    assert samples.tolist() == [1, 2, 4095]
+
+def test_text_log(tmp_path):
+    write_waveform_log(tmp_path / "waveform.log", np.array([5, 6], dtype=SAMPLE_DTYPE))
+    assert (tmp_path / "waveform.log").read_text() == "1, 5\n2, 6\n"